@@ -0,0 +1,84 @@
+"""
+Authentication overhead microbenchmark.
+
+Drives `GET /users/me`, which does nothing but resolve the current user,
+in-process and reports latency and SQL statements per request with the
+user cache disabled and enabled.
+
+    python -m benchmarks.auth --requests 500
+"""
+import time
+import asyncio
+import argparse
+import statistics
+from typing import Dict
+
+from fastapi import FastAPI
+from sqlalchemy import event
+
+from src import crud
+from src.core.app import create_app
+from src.core.config import settings
+from src.db.session import engine
+from benchmarks.utils import asgi_request, benchmark_user
+
+
+async def measure(app: FastAPI, token: str, requests: int) -> Dict[str, float]:
+    """
+    Call `GET /users/me` repeatedly.
+
+    :param app: Application.
+    :param token: Bearer token.
+    :param requests: Number of requests.
+    :return: Latency percentiles in ms and statements per request.
+    """
+    statements = 0
+
+    def before_cursor_execute(*args):
+        nonlocal statements
+        statements += 1
+
+    latencies = []
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        for _ in range(requests):
+            started = time.perf_counter()
+            status, _ = await asgi_request(app, "GET", f"{settings.API_V1_STR}/users/me", token)
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert status == 200, status
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {"p50": quantiles[49], "p95": quantiles[94], "statements": statements / requests}
+
+
+async def main(requests: int) -> None:
+    engine.echo = False
+    # One client sends all the requests, which the rate limits would reject
+    settings.RATE_LIMIT_ENABLED = False
+    app = create_app()
+    await asgi_request(app, "GET", f"{settings.API_V1_STR}/genres/")
+
+    cache_ttl = crud.user.cache_ttl
+    runs = {}
+    async with benchmark_user() as (user, token):
+        for label, ttl in (("no user cache", None), ("user cache", cache_ttl or 30)):
+            crud.user.cache_ttl = ttl
+            await crud.user.invalidate_cache(user.id)
+            runs[label] = await measure(app, token, requests)
+        crud.user.cache_ttl = cache_ttl
+        await crud.user.invalidate_cache(user.id)
+    await engine.dispose()
+
+    for label, result in runs.items():
+        print(
+            f"{label:<14} p50 {result['p50']:>7.3f} ms  p95 {result['p95']:>7.3f} ms  "
+            f"{result['statements']:.2f} statements/request"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500, help="Requests per run")
+    asyncio.run(main(parser.parse_args().requests))
@@ -0,0 +1,96 @@
+"""
+Load test of token validation with the JWT and the Redis auth strategies.
+
+Resolves the user of a token the way every authenticated request does,
+with many requests in flight, and reports latency percentiles and
+throughput per strategy. Needs REDIS_HOST for the Redis strategy.
+
+    python -m benchmarks.auth_load --requests 2000 --concurrency 50
+"""
+import time
+import asyncio
+import argparse
+import statistics
+from typing import Dict
+
+from fastapi_async_sqlalchemy import db
+from fastapi_users.authentication import Strategy
+from fastapi_users.db import SQLAlchemyUserDatabase
+
+from src.core.app import create_app
+from src.core.config import settings
+from src.db.session import engine
+from src.models import User
+from src.modules.auth.manager import UserManager, get_jwt_strategy, redis_strategy
+from benchmarks.utils import asgi_request, benchmark_user
+
+
+async def load(strategy: Strategy, token: str, requests: int, concurrency: int) -> Dict[str, float]:
+    """
+    Validate a token `requests` times with `concurrency` workers.
+
+    :param strategy: Auth strategy.
+    :param token: Token issued by the strategy.
+    :param requests: Total number of validations.
+    :param concurrency: Validations in flight.
+    :return: Latency percentiles in ms and requests per second.
+    """
+    latencies = []
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            async with db():
+                user_manager = UserManager(SQLAlchemyUserDatabase(db.session, User))
+                user = await strategy.read_token(token, user_manager)
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert user is not None
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {"p50": quantiles[49], "p95": quantiles[94], "p99": quantiles[98], "rps": requests / elapsed}
+
+
+async def main(requests: int, concurrency: int) -> None:
+    engine.echo = False
+    # One client sends all the requests, which the rate limits would reject
+    settings.RATE_LIMIT_ENABLED = False
+    app = create_app()
+    await asgi_request(app, "GET", f"{settings.API_V1_STR}/genres/")
+
+    strategies = {"jwt": get_jwt_strategy()}
+    if redis_strategy:
+        strategies["redis"] = redis_strategy
+    else:
+        print("REDIS_HOST is not set, skipping the redis strategy")
+
+    runs = {}
+    async with benchmark_user() as (user, _):
+        for name, strategy in strategies.items():
+            token = await strategy.write_token(user)
+            # Warm up connections and caches
+            await load(strategy, token, concurrency, concurrency)
+            runs[name] = await load(strategy, token, requests, concurrency)
+        if redis_strategy:
+            await redis_strategy.revoke_all(user.id)
+    await engine.dispose()
+
+    for name, result in runs.items():
+        print(
+            f"{name:<6} p50 {result['p50']:>7.3f} ms  p95 {result['p95']:>7.3f} ms  "
+            f"p99 {result['p99']:>7.3f} ms  {result['rps']:>8.0f} req/s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="Validations per strategy")
+    parser.add_argument("--concurrency", type=int, default=50, help="Validations in flight")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
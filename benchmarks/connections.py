@@ -0,0 +1,118 @@
+"""
+Connection checkout benchmark for the request-scoped session.
+
+Drives the app in-process and counts pool checkouts per request, once with
+the auth dependencies sharing the request session and once with them
+opening a session of their own, as they did before the sessions were
+unified. Creates a throwaway user and removes it with its books afterwards.
+
+    python -m benchmarks.connections --requests 50
+"""
+import time
+import asyncio
+import argparse
+from collections import defaultdict
+from typing import AsyncIterator, Dict
+
+from fastapi import FastAPI
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.asyncio.session import AsyncSession
+
+from src import crud
+from src.core.app import create_app
+from src.core.config import settings
+from src.db.session import engine, get_async_session
+from benchmarks.utils import asgi_request, benchmark_user
+
+
+async def separate_session() -> AsyncIterator[AsyncSession]:
+    """The former `get_async_session`: a new sessionmaker and session per call."""
+    async_session = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with async_session() as session:
+        yield session
+
+
+async def run_scenario(app: FastAPI, token: str, requests: int) -> Dict[str, Dict[str, int]]:
+    """
+    Run the book lifecycle requests and count the checkouts of each.
+
+    :param app: Application.
+    :param token: Bearer token of the benchmark user.
+    :param requests: Number of iterations.
+    :return: Checkouts and elapsed nanoseconds per request label.
+    """
+    checkouts = 0
+
+    def on_checkout(*args):
+        nonlocal checkouts
+        checkouts += 1
+
+    _, authors = await asgi_request(app, "GET", "/api/v1/authors/")
+    _, genres = await asgi_request(app, "GET", "/api/v1/genres/")
+    book = {
+        "name": "Benchmark", "description": "", "condition": "new", "page_count": 1,
+        "author_id": authors["items"][0]["id"], "genre_id": genres["items"][0]["id"],
+        "owner_id": "00000000-0000-0000-0000-000000000000",
+    }
+
+    results = defaultdict(lambda: {"checkouts": 0, "ns": 0})
+    event.listen(engine.sync_engine, "checkout", on_checkout)
+    try:
+        for _ in range(requests):
+            book_id = None
+            for label, method, path, body, auth in (
+                ("GET /books/", "GET", "/api/v1/books/?limit=10", None, False),
+                ("GET /users/me", "GET", "/api/v1/users/me", None, True),
+                ("POST /books/", "POST", "/api/v1/books/", book, True),
+                ("PUT /books/{id}", "PUT", "/api/v1/books/{id}", book, True),
+                ("DELETE /books/{id}", "DELETE", "/api/v1/books/{id}", None, True),
+            ):
+                checkouts, started = 0, time.perf_counter_ns()
+                status, response = await asgi_request(
+                    app, method, path.format(id=book_id), token if auth else None, body
+                )
+                results[label]["ns"] += time.perf_counter_ns() - started
+                results[label]["checkouts"] += checkouts
+                assert status < 400, (label, status, response)
+                if method == "POST":
+                    book_id = response["id"]
+    finally:
+        event.remove(engine.sync_engine, "checkout", on_checkout)
+
+    return results
+
+
+async def main(requests: int) -> None:
+    engine.echo = False
+    # One client sends all the requests, which the rate limits would reject
+    settings.RATE_LIMIT_ENABLED = False
+    app = create_app()
+    # Builds the middleware stack, which initializes the request sessions
+    await asgi_request(app, "GET", "/api/v1/genres/")
+
+    # Resolve the user from the database on every request, as the auth session does
+    crud.user.cache_ttl = None
+
+    runs = {}
+    async with benchmark_user() as (_, token):
+        app.dependency_overrides[get_async_session] = separate_session
+        runs["separate sessions"] = await run_scenario(app, token, requests)
+        app.dependency_overrides.clear()
+        runs["shared session"] = await run_scenario(app, token, requests)
+    await engine.dispose()
+
+    for label in runs["shared session"]:
+        print(label)
+        for phase, results in runs.items():
+            result = results[label]
+            print(
+                f"  {phase:<18} {result['checkouts'] / requests:>5.2f} checkouts/request  "
+                f"{result['ns'] / requests / 1e6:>8.3f} ms/request"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50, help="Iterations per scenario")
+    asyncio.run(main(parser.parse_args().requests))
@@ -0,0 +1,154 @@
+"""
+Nearby search benchmark.
+
+Builds the in-memory KD-tree over random pickup locations and compares
+radius queries with a linear haversine scan. With `--db` the same number
+of locations is seeded in a transaction that is rolled back, and
+`crud.book.nearby` is timed with and without the coordinate index.
+
+    python -m benchmarks.geo --locations 1000000 --db
+"""
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from typing import Awaitable, Callable, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from src import crud
+from src.db.session import engine
+from src.utils.geo import KDTree, haversine
+
+# Area the random locations are spread over: (min lat, max lat, min lon, max lon)
+AREA = (35.0, 60.0, -10.0, 30.0)
+
+
+def random_points(count: int, seed: int = 1) -> List[Tuple[int, float, float]]:
+    """Random points in the benchmark area."""
+    rng = random.Random(seed)
+    min_lat, max_lat, min_lon, max_lon = AREA
+    return [(i, rng.uniform(min_lat, max_lat), rng.uniform(min_lon, max_lon)) for i in range(count)]
+
+
+async def timed(query: Callable[[], Awaitable[int]], queries: int) -> Tuple[float, float, int]:
+    """
+    Run a query repeatedly.
+
+    :param query: Query returning the number of hits.
+    :param queries: Number of runs.
+    :return: p50 and p95 latency in ms and hits of the last run.
+    """
+    latencies, hits = [], 0
+    for _ in range(queries):
+        started = time.perf_counter()
+        hits = await query()
+        latencies.append((time.perf_counter() - started) * 1000)
+    quantiles = statistics.quantiles(latencies, n=20) if len(latencies) > 1 else latencies * 19
+    return quantiles[9], quantiles[18], hits
+
+
+async def in_memory(points: List[Tuple[int, float, float]], centers, radius: float, queries: int) -> None:
+    started = time.perf_counter()
+    tree = KDTree(points)
+    print(f"KD-tree build       {time.perf_counter() - started:>9.2f} s   {len(tree)} locations")
+
+    async def tree_query():
+        lat, lon = random.choice(centers)
+        return len(tree.within(lat, lon, radius))
+
+    async def linear_query():
+        lat, lon = random.choice(centers)
+        return sum(1 for _, point_lat, point_lon in points if haversine(lat, lon, point_lat, point_lon) <= radius)
+
+    for label, query, runs in (("KD-tree", tree_query, queries), ("linear scan", linear_query, 3)):
+        p50, p95, hits = await timed(query, runs)
+        print(f"{label:<19} p50 {p50:>9.3f} ms  p95 {p95:>9.3f} ms  {hits} hits")
+
+
+async def seed(conn: AsyncConnection, locations: int) -> None:
+    """
+    Seed books with random pickup locations, ten locations per book.
+
+    :param conn: Database connection, rolled back by the caller.
+    :param locations: Number of locations.
+    """
+    min_lat, max_lat, min_lon, max_lon = AREA
+    author_id = (await conn.execute(text(
+        "INSERT INTO authors (full_name, created_at, updated_at) "
+        "VALUES ('geo-benchmark', now(), now()) RETURNING id"
+    ))).scalar_one()
+    genre_id = (await conn.execute(text(
+        "INSERT INTO genres (name, created_at, updated_at) "
+        "VALUES ('geo-benchmark', now(), now()) RETURNING id"
+    ))).scalar_one()
+    await conn.execute(text(
+        "INSERT INTO books (name, description, condition, page_count, author_id, genre_id, "
+        "created_at, updated_at) "
+        "SELECT 'geo-' || i, '', 'USED', 100, :author_id, :genre_id, now(), now() "
+        "FROM generate_series(1, :books) i"
+    ), {"author_id": author_id, "genre_id": genre_id, "books": max(locations // 10, 1)})
+    await conn.execute(text(
+        "INSERT INTO book_locations (address, latitude, longitude, book_id, created_at, updated_at) "
+        "SELECT 'geo-' || i, "
+        "CAST(:min_lat AS float8) + random() * CAST(:lat_span AS float8), "
+        "CAST(:min_lon AS float8) + random() * CAST(:lon_span AS float8), "
+        "(SELECT min(id) FROM books WHERE author_id = :author_id) + i % :books, now(), now() "
+        "FROM generate_series(1, :locations) i"
+    ), {
+        "min_lat": min_lat, "lat_span": max_lat - min_lat, "min_lon": min_lon, "lon_span": max_lon - min_lon,
+        "author_id": author_id, "books": max(locations // 10, 1), "locations": locations,
+    })
+    await conn.execute(text("ANALYZE books"))
+    await conn.execute(text("ANALYZE book_locations"))
+
+
+async def in_database(locations: int, centers, radius: float, queries: int) -> None:
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            started = time.perf_counter()
+            await seed(conn, locations)
+            print(f"seed                {time.perf_counter() - started:>9.2f} s   {locations} locations")
+
+            session = AsyncSession(bind=conn)
+
+            async def nearby_query():
+                lat, lon = random.choice(centers)
+                rows, _ = await crud.book.nearby(
+                    lat, lon, radius, None, "geo-benchmark", None, limit=50, db_session=session
+                )
+                return len(rows)
+
+            p50, p95, hits = await timed(nearby_query, queries)
+            print(f"{'SQL with index':<19} p50 {p50:>9.3f} ms  p95 {p95:>9.3f} ms  {hits} books")
+
+            await conn.execute(text("DROP INDEX ix_book_locations_latitude_longitude"))
+            p50, p95, hits = await timed(nearby_query, min(queries, 10))
+            print(f"{'SQL without index':<19} p50 {p50:>9.3f} ms  p95 {p95:>9.3f} ms  {hits} books")
+        finally:
+            await transaction.rollback()
+    await engine.dispose()
+
+
+async def main(locations: int, radius: float, queries: int, db: bool) -> None:
+    engine.echo = False
+    points = random_points(locations)
+    # Centers on seeded points, so every query has hits
+    centers = [(lat, lon) for _, lat, lon in random.Random(2).sample(points, 100)]
+
+    await in_memory(points, centers, radius, queries)
+    if db:
+        await in_database(locations, centers, radius, queries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--locations", type=int, default=1_000_000, help="Pickup locations")
+    parser.add_argument("--radius", type=float, default=20_000, help="Radius in meters")
+    parser.add_argument("--queries", type=int, default=100, help="Queries per run")
+    parser.add_argument("--db", action="store_true", help="Also benchmark the SQL query")
+    args = parser.parse_args()
+    asyncio.run(main(args.locations, args.radius, args.queries, args.db))
@@ -0,0 +1,143 @@
+"""
+Notification stream benchmark.
+
+Opens many idle notification streams for one throwaway user against a
+running server, reports the server memory per stream (with `--pid` of a
+single worker) and the fan-out latency of notifications published through
+Redis, from publishing until every stream received them. The server has
+to share REDIS_HOST with the benchmark and use the `jwt` auth backend.
+
+    ulimit -n 20000
+    python -m benchmarks.notifications --url http://localhost:8000 --streams 10000 --pid <worker pid>
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from typing import List, Tuple
+from urllib.parse import urlsplit
+
+from src.core.app import create_app
+from src.modules.notifications.broker import RedisNotificationBroker, notification_broker
+from benchmarks.utils import asgi_request, benchmark_user
+
+
+def cpu_seconds(pid: int) -> float:
+    """User and system CPU time of a process."""
+    with open(f"/proc/{pid}/stat") as stat:
+        fields = stat.read().rpartition(")")[2].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def rss_kb(pid: int) -> int:
+    """Resident memory of a process in kB."""
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+async def open_stream(host: str, port: int, path: str, token: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Open a notification stream and read its response headers."""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(
+        f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAuthorization: Bearer {token}\r\n"
+        f"Accept: text/event-stream\r\n\r\n".encode()
+    )
+    await writer.drain()
+    status = await reader.readline()
+    if b" 200 " not in status:
+        raise RuntimeError(f"Stream refused: {status.decode().strip()}")
+    while await reader.readline() not in (b"\r\n", b""):
+        pass
+    return reader, writer
+
+
+class FanOut:
+    """Arrival times of the notifications of one publish on every stream."""
+
+    def __init__(self, streams: int) -> None:
+        self.arrivals: List[float] = []
+        self.streams = streams
+        self.done = asyncio.Event()
+
+    def arrived(self) -> None:
+        self.arrivals.append(time.perf_counter())
+        if len(self.arrivals) == self.streams:
+            self.done.set()
+
+
+async def receive(reader: asyncio.StreamReader, fan_outs: List[FanOut]) -> None:
+    """Record the arrival of every notification of a stream; the n-th goes to the n-th fan-out."""
+    received = 0
+    while line := await reader.readline():
+        if line.startswith(b"data:"):
+            fan_outs[received].arrived()
+            received += 1
+
+
+async def main(url: str, streams: int, notifications: int, batch: int, pid: int | None) -> None:
+    if not isinstance(notification_broker, RedisNotificationBroker):
+        raise RuntimeError("REDIS_HOST is not set, notifications cannot reach the server")
+
+    app = create_app()
+    await asgi_request(app, "GET", "/api/v1/genres/")
+    server = urlsplit(url)
+    path = "/api/v1/notifications/stream"
+
+    async with benchmark_user() as (user, token):
+        rss_before = rss_kb(pid) if pid else 0
+        started = time.perf_counter()
+        connections = []
+        for offset in range(0, streams, batch):
+            connections += await asyncio.gather(*(
+                open_stream(server.hostname, server.port or 80, path, token)
+                for _ in range(min(batch, streams - offset))
+            ))
+        print(f"open {streams} streams   {time.perf_counter() - started:>8.2f} s")
+        if pid:
+            # Let the server settle before measuring
+            await asyncio.sleep(2)
+            growth = rss_kb(pid) - rss_before
+            print(f"server memory        {growth / 1024:>8.1f} MB   {growth / streams:.1f} kB per stream")
+
+        fan_outs = [FanOut(streams) for _ in range(notifications)]
+        readers = [asyncio.create_task(receive(reader, fan_outs)) for reader, _ in connections]
+
+        fan_out, deliveries = [], []
+        cpu_before = cpu_seconds(pid) if pid else 0
+        for n in range(notifications):
+            published = time.perf_counter()
+            await notification_broker.publish(user.id, json.dumps({"n": n}))
+            await fan_outs[n].done.wait()
+            arrivals = [(arrival - published) * 1000 for arrival in fan_outs[n].arrivals]
+            fan_out.append(max(arrivals))
+            deliveries += arrivals
+
+        deliveries.sort()
+        print(f"delivery             p50 {deliveries[len(deliveries) // 2]:>8.2f} ms  "
+              f"p99 {deliveries[int(len(deliveries) * 0.99)]:>8.2f} ms")
+        print(f"fan-out to all       p50 {statistics.median(fan_out):>8.2f} ms  max {max(fan_out):>8.2f} ms")
+        if pid:
+            cpu = (cpu_seconds(pid) - cpu_before) / notifications * 1000
+            print(f"server CPU           {cpu:>8.2f} ms per fan-out   {cpu * 1000 / streams:.1f} us per stream")
+
+        for task in readers:
+            task.cancel()
+        for _, writer in connections:
+            writer.close()
+        await notification_broker.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000", help="Server URL")
+    parser.add_argument("--streams", type=int, default=10_000, help="Idle streams to open")
+    parser.add_argument("--notifications", type=int, default=20, help="Notifications to fan out")
+    parser.add_argument("--batch", type=int, default=500, help="Streams opened at once")
+    parser.add_argument("--pid", type=int, help="Server worker pid, to measure its memory")
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.streams, args.notifications, args.batch, args.pid))
@@ -0,0 +1,200 @@
+"""
+Query plan benchmark for the lookup indexes.
+
+Seeds the configured database with a synthetic catalog and runs the hot
+lookup queries with `EXPLAIN ANALYZE`, first without and then with the
+indexes declared on the models. The search query runs on the GIN indexes,
+which stay in place in both runs, so its plan shows whether each branch
+starts from its index. Run it against a throwaway database only: the
+lookup indexes are dropped and recreated.
+
+    python -m benchmarks.query_plans --books 1000000
+"""
+import json
+import asyncio
+import argparse
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncConnection
+
+from src.core.utils import get_sqlalchemy_uri
+from src.models import Book, BookRequest, BookLocation
+
+
+# Lookup indexes only; the primary key and search (GIN) indexes stay in place
+INDEXES = [
+    index
+    for model in (Book, BookRequest, BookLocation)
+    for index in model.__table__.indexes
+    if [column.name for column in index.columns] != ["id"]
+    and not index.dialect_options["postgresql"]["using"]
+]
+
+QUERIES = {
+    "books by condition": (
+        "SELECT * FROM books WHERE condition = 'USED' AND id > :last_id "
+        "ORDER BY id LIMIT 51"
+    ),
+    "books by genre": (
+        "SELECT books.* FROM books JOIN genres ON genres.id = books.genre_id "
+        "WHERE genres.name = 'genre-7' ORDER BY books.id LIMIT 51"
+    ),
+    "books by author": (
+        "SELECT books.* FROM books JOIN authors ON authors.id = books.author_id "
+        "WHERE authors.full_name = 'author-42' ORDER BY books.id LIMIT 51"
+    ),
+    "locations by book": (
+        "SELECT * FROM book_locations WHERE book_id IN (:book_id, :book_id + 1)"
+    ),
+    "requests by book": (
+        "SELECT * FROM book_requests WHERE book_id = :book_id ORDER BY id LIMIT 51"
+    ),
+    "request by book and requester": (
+        "SELECT * FROM book_requests WHERE book_id = :book_id "
+        "AND requester_id = (SELECT requester_id FROM book_requests "
+        "WHERE book_id = :book_id LIMIT 1)"
+    ),
+    "requests by book and status": (
+        "SELECT * FROM book_requests WHERE book_id = :book_id AND status = 'PENDING'"
+    ),
+    # Same shape as crud.book.search
+    "books search": (
+        "SELECT books.id, ts_rank(books.search_vector, websearch_to_tsquery('english', :q)) "
+        "+ word_similarity(:q, books.name) + coalesce(word_similarity(:q, authors.full_name), 0) AS rank "
+        "FROM books JOIN ("
+        "SELECT id FROM books WHERE search_vector @@ websearch_to_tsquery('english', :q) "
+        "UNION SELECT id FROM books WHERE name %> :q "
+        "UNION SELECT books.id FROM books JOIN authors ON authors.id = books.author_id "
+        "WHERE authors.full_name %> :q"
+        ") matches ON matches.id = books.id "
+        "LEFT JOIN authors ON authors.id = books.author_id "
+        "ORDER BY rank DESC, books.id LIMIT 51"
+    ),
+}
+
+
+async def seed(conn: AsyncConnection, books: int) -> None:
+    """
+    Fill the catalog tables with synthetic rows using set-based inserts.
+
+    :param conn: Database connection.
+    :param books: Number of books to create.
+    """
+    existing = (await conn.execute(text("SELECT count(*) FROM books"))).scalar_one()
+    if existing >= books:
+        return
+
+    await conn.execute(text(
+        "INSERT INTO authors (full_name, created_at, updated_at) "
+        "SELECT 'author-' || i, now(), now() FROM generate_series(1, 1000) i "
+        "ON CONFLICT DO NOTHING"
+    ))
+    await conn.execute(text(
+        "INSERT INTO genres (name, created_at, updated_at) "
+        "SELECT 'genre-' || i, now(), now() FROM generate_series(1, 50) i "
+        "ON CONFLICT DO NOTHING"
+    ))
+    await conn.execute(text(
+        "INSERT INTO \"user\" (id, email, hashed_password, is_active, is_superuser, is_verified) "
+        "SELECT gen_random_uuid(), 'bench-' || i || '@example.com', 'x', true, false, true "
+        "FROM generate_series(1, 1000) i ON CONFLICT DO NOTHING"
+    ))
+    await conn.execute(text(
+        "INSERT INTO books (name, description, condition, page_count, author_id, genre_id, "
+        "created_at, updated_at) "
+        "SELECT 'book-' || i, 'description-' || i, "
+        "(ARRAY['NEW', 'USED', 'DAMAGED'])[1 + i % 3]::bookcondition, 100 + i % 400, "
+        "(SELECT min(id) FROM authors) + i % 1000, (SELECT min(id) FROM genres) + i % 50, "
+        "now(), now() "
+        "FROM generate_series(1, :count) i"
+    ), {"count": books - existing})
+    await conn.execute(text(
+        "INSERT INTO book_locations (address, book_id, created_at, updated_at) "
+        "SELECT 'address-' || id, id, now(), now() FROM books"
+    ))
+    # Every tenth book gets three requests from different users
+    await conn.execute(text(
+        "INSERT INTO book_requests (book_id, requester_id, status, created_at, updated_at) "
+        "SELECT b.id, u.id, 'PENDING', now(), now() "
+        "FROM (SELECT id FROM books WHERE id % 10 = 0) b "
+        "CROSS JOIN LATERAL (SELECT id FROM \"user\" "
+        "OFFSET (b.id / 10) % 997 LIMIT 3) u "
+        "ON CONFLICT DO NOTHING"
+    ))
+    await conn.commit()
+
+
+def summarize_plan(node: Dict[str, Any]) -> List[str]:
+    """
+    Flatten a JSON plan into `Node Type(index or relation)` labels.
+
+    :param node: Plan node.
+    :return: Labels of the scan nodes.
+    """
+    labels = []
+    if "Scan" in node["Node Type"]:
+        target = node.get("Index Name") or node.get("Relation Name")
+        labels.append(f"{node['Node Type']}({target})")
+    for child in node.get("Plans", []):
+        labels.extend(summarize_plan(child))
+    return labels
+
+
+async def explain(conn: AsyncConnection, params: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Run every benchmark query with EXPLAIN ANALYZE.
+
+    :param conn: Database connection.
+    :param params: Query parameters.
+    :return: Plan summary and execution time per query.
+    """
+    results = {}
+    for label, sql in QUERIES.items():
+        response = await conn.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}"), params)
+        plan = response.scalar_one()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        results[label] = {
+            "plan": summarize_plan(plan[0]["Plan"]),
+            "ms": plan[0]["Execution Time"],
+        }
+    return results
+
+
+async def main(books: int) -> None:
+    engine = create_async_engine(get_sqlalchemy_uri())
+
+    async with engine.connect() as conn:
+        await seed(conn, books)
+
+        params = {
+            "last_id": (await conn.execute(text("SELECT max(id) / 2 FROM books"))).scalar_one(),
+            "book_id": (await conn.execute(text(
+                "SELECT max(book_id) FROM book_requests"
+            ))).scalar_one(),
+            "q": "author-42",
+        }
+
+        runs = {}
+        for phase, create in (("without indexes", False), ("with indexes", True)):
+            for index in INDEXES:
+                await conn.run_sync(index.drop, checkfirst=True)
+                if create:
+                    await conn.run_sync(index.create)
+            await conn.execute(text("ANALYZE authors, books, book_requests, book_locations"))
+            await conn.commit()
+            runs[phase] = await explain(conn, params)
+
+    await engine.dispose()
+
+    for label in QUERIES:
+        print(label)
+        for phase, results in runs.items():
+            result = results[label]
+            print(f"  {phase:<16} {result['ms']:>10.3f} ms  {', '.join(result['plan'])}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--books", type=int, default=1_000_000, help="Number of books to seed")
+    asyncio.run(main(parser.parse_args().books))
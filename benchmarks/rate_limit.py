@@ -0,0 +1,96 @@
+"""
+Rate limiting overhead microbenchmark.
+
+Sends requests through `RateLimitMiddleware` around an app that only
+responds, anonymously and with a JWT, and reports the latency added per
+request by the in-process limiter and, with `REDIS_HOST` set, by the
+Redis limiter. No database is needed.
+
+    python -m benchmarks.rate_limit --requests 5000
+"""
+import time
+import uuid
+import asyncio
+import argparse
+import statistics
+from typing import Dict, List
+
+from starlette.responses import Response
+from starlette.types import ASGIApp
+
+from src.api import rate_limit
+from src.api.rate_limit import RateLimitMiddleware
+from src.core.config import settings
+from src.db.rate_limit import MemoryRateLimiter, RedisRateLimiter
+from src.db.redis import cache_redis
+from src.models import User
+from src.modules.auth.manager import get_jwt_strategy
+
+
+async def empty_app(scope, receive, send) -> None:
+    await Response(b"")(scope, receive, send)
+
+
+async def measure(app: ASGIApp, requests: int, token: str | None) -> List[float]:
+    """
+    Call the app repeatedly, each request from another client.
+
+    :param app: ASGI app.
+    :param requests: Number of requests.
+    :param token: Bearer token, or None for anonymous clients keyed by IP.
+    :return: Latencies in µs.
+    """
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    latencies = []
+    for i in range(requests):
+        scope = {
+            "type": "http", "method": "GET", "path": f"{settings.API_V1_STR}/books/", "query_string": b"",
+            "headers": headers, "client": (f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", 1234),
+        }
+        started = time.perf_counter()
+        await app(scope, receive, send)
+        latencies.append((time.perf_counter() - started) * 1_000_000)
+    return latencies
+
+
+async def main(requests: int) -> None:
+    # High enough that every request is allowed and counted
+    settings.RATE_LIMIT_GROUPS = {"/books": requests * 2}
+    token = await get_jwt_strategy().write_token(User(id=uuid.uuid4()))
+    limiters = {"memory": MemoryRateLimiter(settings.RATE_LIMIT_MAX_KEYS)}
+    if cache_redis:
+        limiters["redis"] = RedisRateLimiter(cache_redis)
+    else:
+        print("REDIS_HOST is not set, skipping the redis limiter")
+
+    base: Dict[str, float] = {}
+    for client, client_token in (("ip", None), ("jwt", token)):
+        await measure(empty_app, requests // 10, client_token)
+        base[client] = statistics.median(await measure(empty_app, requests, client_token))
+        print(f"{'none':<7} {client:<4} p50 {base[client]:>8.1f} µs")
+
+    for name, limiter in limiters.items():
+        rate_limit.rate_limiter = limiter
+        middleware = RateLimitMiddleware(empty_app)
+        for client, client_token in (("ip", None), ("jwt", token)):
+            # Warm up connections and the script cache
+            await measure(middleware, requests // 10, client_token)
+            latencies = await measure(middleware, requests, client_token)
+            quantiles = statistics.quantiles(latencies, n=100)
+            print(
+                f"{name:<7} {client:<4} p50 {quantiles[49]:>8.1f} µs  p99 {quantiles[98]:>8.1f} µs  "
+                f"overhead p50 {quantiles[49] - base[client]:>8.1f} µs"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per run")
+    asyncio.run(main(parser.parse_args().requests))
@@ -0,0 +1,266 @@
+"""
+API scenario benchmarks over seeded data.
+
+Drives the app in-process with `asgi_request` (no server and no HTTP
+client in the measurement) and reports throughput, latency percentiles
+and SQL statements per request for each scenario:
+
+- browse: catalog pages, following cursors, every other one by genre
+- search: full-text search for the seeded words
+- popular: most requested books, following cursors
+- request: seeded users requesting seeded books
+- accept: owners accepting pending requests, one per book
+
+Run `benchmarks.seed` first; `request` and `accept` use up the seeded
+data, so seed again (or `--drop` and seed) before comparing runs. Results
+can be compared with a stored baseline, which fails the run when a
+scenario regressed, and saved as the new baseline.
+
+    python -m benchmarks.scenarios --requests 500 --concurrency 10 --baseline benchmarks/baselines/scenarios.json
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List
+
+from fastapi import FastAPI
+from sqlalchemy import text
+
+from src.core.config import settings
+from src.core.instrumentation import RequestMetrics, current_request, instrument_engine
+from src.db.session import engine
+from src.models import User
+from src.modules.auth.manager import get_jwt_strategy
+from benchmarks.seed import SEED_EMAIL, WORDS
+from benchmarks.utils import asgi_request
+
+# Relative slowdown (p95, p99) or throughput loss tolerated against the baseline
+TOLERANCE = 0.25
+# Relative increase of statements per request tolerated, as the mix of
+# created, duplicate and own-book requests varies between runs
+QUERIES_TOLERANCE = 0.05
+
+
+@dataclass
+class Context:
+    """Seeded data and measurements shared by the requests of a scenario."""
+    app: FastAPI
+    users: List[Any]
+    genres: List[int]
+    book_ids: range
+    pending: List[Any] = field(default_factory=list)
+    tokens: Dict[Any, str] = field(default_factory=dict)
+    cursor: str | None = None
+    latencies: List[float] = field(default_factory=list)
+    statements: List[int] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+
+    async def token(self, user_id) -> str:
+        if user_id not in self.tokens:
+            self.tokens[user_id] = await get_jwt_strategy().write_token(User(id=user_id))
+        return self.tokens[user_id]
+
+    async def call(self, method: str, path: str, user_id=None, body: Any = None) -> Any:
+        """Send a request and record its latency, statements and status."""
+        token = await self.token(user_id) if user_id else None
+        metrics = RequestMetrics()
+        context_token = current_request.set(metrics)
+        started = time.perf_counter()
+        try:
+            status, content = await asgi_request(self.app, method, path, token, body)
+        finally:
+            current_request.reset(context_token)
+        self.latencies.append((time.perf_counter() - started) * 1000)
+        self.statements.append(metrics.statements)
+        self.statuses[status] += 1
+        return content
+
+
+async def browse(ctx: Context, i: int) -> None:
+    path = "/api/v1/books/?limit=50"
+    if i % 2:
+        path += f"&genre=seed-genre-{1 + i % len(ctx.genres)}"
+    elif ctx.cursor:
+        path += f"&cursor={ctx.cursor}"
+    page = await ctx.call("GET", path, random.choice(ctx.users))
+    if not i % 2:
+        ctx.cursor = page and page.get("next_cursor")
+
+
+async def search(ctx: Context, i: int) -> None:
+    query = f"{WORDS[i % len(WORDS)]}+{WORDS[i * 7 % len(WORDS)]}"
+    await ctx.call("GET", f"/api/v1/books/search?q={query}&limit=20", random.choice(ctx.users))
+
+
+async def popular(ctx: Context, i: int) -> None:
+    path = "/api/v1/books/popular?limit=20"
+    if ctx.cursor and i % 5:
+        path += f"&cursor={ctx.cursor}"
+    page = await ctx.call("GET", path, random.choice(ctx.users))
+    ctx.cursor = page and page.get("next_cursor")
+
+
+async def request(ctx: Context, i: int) -> None:
+    await ctx.call("POST", f"/api/v1/book-requests/{random.choice(ctx.book_ids)}", random.choice(ctx.users))
+
+
+async def accept(ctx: Context, i: int) -> None:
+    request_id, owner_id = ctx.pending.pop()
+    await ctx.call("PATCH", f"/api/v1/book-requests/{request_id}", owner_id)
+
+
+SCENARIOS: Dict[str, Callable[[Context, int], Awaitable[None]]] = {
+    "browse": browse,
+    "search": search,
+    "popular": popular,
+    "request": request,
+    "accept": accept,
+}
+
+
+async def load_context(app: FastAPI, requests: int) -> Context:
+    """Load the seeded users, genres, book id range and pending requests."""
+    async with engine.connect() as conn:
+        users = (await conn.execute(
+            text('SELECT id FROM "user" WHERE email LIKE :email'), {"email": SEED_EMAIL}
+        )).scalars().all()
+        genres = (await conn.execute(text("SELECT id FROM genres WHERE name LIKE 'seed-genre-%'"))).scalars().all()
+        first, last = (await conn.execute(
+            text("SELECT min(id), max(id) FROM books WHERE name LIKE 'seed-%'")
+        )).one()
+        # One request per book, as accepting one rejects the others
+        pending = (await conn.execute(text(
+            "SELECT DISTINCT ON (r.book_id) r.id, b.owner_id FROM book_requests r "
+            "JOIN books b ON b.id = r.book_id "
+            "WHERE b.name LIKE 'seed-%' AND r.status = 'PENDING' AND NOT EXISTS ("
+            "SELECT 1 FROM book_requests a WHERE a.book_id = r.book_id AND a.status = 'ACCEPTED') "
+            "ORDER BY r.book_id DESC LIMIT :requests"
+        ), {"requests": requests})).all()
+    if not users or first is None:
+        raise RuntimeError("No seeded data, run `python -m benchmarks.seed` first")
+    return Context(app, list(users), list(genres), range(first, last + 1), [tuple(row) for row in pending])
+
+
+async def run_scenario(ctx: Context, scenario: str, requests: int, concurrency: int) -> Dict[str, float]:
+    """
+    Run `requests` requests of a scenario with `concurrency` in flight.
+
+    :return: Throughput, latency percentiles in ms, statements per request and error rate.
+    """
+    if scenario == "accept" and len(ctx.pending) < requests:
+        raise RuntimeError(f"Only {len(ctx.pending)} pending requests left to accept, seed again")
+    ctx.latencies, ctx.statements, ctx.statuses, ctx.cursor = [], [], Counter(), None
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            await SCENARIOS[scenario](ctx, i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(ctx.latencies, n=100)
+    errors = sum(count for status, count in ctx.statuses.items() if status >= 500)
+    return {
+        "rps": round(requests / elapsed, 1),
+        "p50": round(quantiles[49], 2),
+        "p95": round(quantiles[94], 2),
+        "p99": round(quantiles[98], 2),
+        "queries_per_request": round(statistics.mean(ctx.statements), 2),
+        "error_rate": round(errors / requests, 4),
+    }
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    """
+    Compare results with a baseline.
+
+    Latency and throughput vary between runs, so they regress beyond a
+    relative tolerance; statements per request and errors are nearly
+    deterministic and regress on any real increase.
+
+    :return: Descriptions of the regressions.
+    """
+    regressions = []
+    for scenario, result in results.items():
+        base = baseline.get(scenario)
+        if base is None:
+            continue
+        for metric in ("p95", "p99"):
+            if result[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{scenario}: {metric} {result[metric]} ms, baseline {base[metric]} ms")
+        if result["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{scenario}: {result['rps']} requests/s, baseline {base['rps']}")
+        if result["queries_per_request"] > base["queries_per_request"] * (1 + QUERIES_TOLERANCE):
+            regressions.append(
+                f"{scenario}: {result['queries_per_request']} queries per request, "
+                f"baseline {base['queries_per_request']}"
+            )
+        if result["error_rate"] > base["error_rate"]:
+            regressions.append(f"{scenario}: error rate {result['error_rate']}, baseline {base['error_rate']}")
+    return regressions
+
+
+async def main(args: argparse.Namespace) -> int:
+    engine.echo = False
+    # Statements are counted per request here, not by the metrics middleware
+    settings.METRICS_ENABLED = False
+    instrument_engine(engine)
+    from src.core.app import create_app
+    app = create_app()
+
+    warmup = min(args.concurrency * 2, args.requests)
+    ctx = await load_context(app, args.requests + warmup)
+    results = {}
+    print(f"{'scenario':<10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}  statuses")
+    for scenario in args.scenarios:
+        # Warm up caches and connections outside the measurement
+        await run_scenario(ctx, scenario, warmup, args.concurrency)
+        results[scenario] = result = await run_scenario(ctx, scenario, args.requests, args.concurrency)
+        statuses = " ".join(f"{status}x{count}" for status, count in sorted(ctx.statuses.items()))
+        print(
+            f"{scenario:<10} {result['rps']:>8} {result['p50']:>8} {result['p95']:>8} {result['p99']:>8} "
+            f"{result['queries_per_request']:>8}  {statuses}"
+        )
+    await engine.dispose()
+
+    report = {
+        "books": len(ctx.book_ids),
+        "users": len(ctx.users),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "scenarios": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as output:
+            json.dump(report, output, indent=2)
+        return 0
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = compare(results, json.load(baseline)["scenarios"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10, help="Requests in flight")
+    parser.add_argument("--baseline", help="Baseline JSON to compare with, exits with 1 on regressions")
+    parser.add_argument("--save-baseline", help="Store the results as the baseline JSON")
+    parser.add_argument("--output", help="Also write the results as JSON")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="Relative latency/throughput tolerance")
+    sys.exit(asyncio.run(main(parser.parse_args())))
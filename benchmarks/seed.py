@@ -0,0 +1,186 @@
+"""
+Synthetic data seeder for the benchmarks.
+
+Bulk inserts users, authors, genres, books with pickup locations and
+pending book requests with INSERT ... SELECT over generate_series, one
+transaction per chunk of books, so 10k and 10M books take the same
+code path. Seeded rows are tagged with a `seed-` prefix, left alone by
+the app's own data and removed with `--drop`. Seeded users are verified
+and share the password `seed`.
+
+    python -m benchmarks.seed --books 1000000
+    python -m benchmarks.seed --drop
+"""
+import time
+import asyncio
+import argparse
+from dataclasses import dataclass
+
+from fastapi_users.password import PasswordHelper
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.db.session import engine
+
+SEED_PREFIX = "seed-"
+SEED_EMAIL = "seed-%@seed.example.com"
+# Words of the seeded names and descriptions, for the search scenario
+WORDS = (
+    "dragon", "river", "garden", "winter", "empire", "shadow", "harbor", "forest", "silver", "journey",
+    "kingdom", "ocean", "mountain", "secret", "letters", "island", "machine", "summer", "night", "memory",
+)
+# Area of the seeded pickup locations: (min lat, lat span, min lon, lon span)
+AREA = (35.0, 25.0, -10.0, 40.0)
+
+
+@dataclass
+class SeedConfig:
+    books: int = 10_000
+    users: int = 1_000
+    authors: int = 500
+    genres: int = 20
+    locations_per_book: int = 2
+    requests_per_book: int = 2
+    chunk_size: int = 100_000
+
+
+async def seed_references(conn: AsyncConnection, config: SeedConfig) -> None:
+    """Seed users, authors and genres, keeping the ones of an earlier run."""
+    password = PasswordHelper().hash("seed")
+    await conn.execute(text(
+        'INSERT INTO "user" (id, email, hashed_password, is_active, is_superuser, is_verified, '
+        "created_at, updated_at) "
+        "SELECT gen_random_uuid(), 'seed-' || i || '@seed.example.com', :password, true, false, true, "
+        "now(), now() FROM generate_series(1, :users) i ON CONFLICT DO NOTHING"
+    ), {"password": password, "users": config.users})
+    await conn.execute(text(
+        "INSERT INTO authors (full_name, created_at, updated_at) "
+        "SELECT 'seed-author-' || i, now(), now() FROM generate_series(1, :authors) i ON CONFLICT DO NOTHING"
+    ), {"authors": config.authors})
+    await conn.execute(text(
+        "INSERT INTO genres (name, created_at, updated_at) "
+        "SELECT 'seed-genre-' || i, now(), now() FROM generate_series(1, :genres) i ON CONFLICT DO NOTHING"
+    ), {"genres": config.genres})
+
+
+async def seed_books(conn: AsyncConnection, start: int, stop: int, config: SeedConfig) -> None:
+    """
+    Seed the books `start` to `stop` with their locations and requests.
+
+    :param conn: Connection, committed by the caller.
+    :param start: First book number.
+    :param stop: Last book number.
+    :param config: Seed configuration.
+    """
+    last_id = (await conn.execute(text("SELECT coalesce(max(id), 0) FROM books"))).scalar_one()
+    # The request counters of the books are written with them
+    requests = min(config.requests_per_book, config.users - 1)
+    refs = (
+        "WITH refs AS (SELECT "
+        "(SELECT array_agg(id ORDER BY id) FROM \"user\" WHERE email LIKE :email) AS users, "
+        "(SELECT array_agg(id ORDER BY id) FROM authors WHERE full_name LIKE 'seed-author-%') AS authors, "
+        "(SELECT array_agg(id ORDER BY id) FROM genres WHERE name LIKE 'seed-genre-%') AS genres, "
+        "CAST(:words AS text[]) AS words) "
+    )
+    await conn.execute(text(
+        refs +
+        "INSERT INTO books (name, description, condition, page_count, owner_id, author_id, genre_id, "
+        "request_count, pending_count, created_at, updated_at) "
+        "SELECT 'seed-' || i || ' ' || words[1 + i % 20] || ' ' || words[1 + i / 20 % 20], "
+        "'A ' || words[1 + i / 400 % 20] || ' story about ' || words[1 + i % 7 * 3 % 20], "
+        "(CAST(ARRAY['NEW', 'USED', 'DAMAGED'] AS bookcondition[]))[1 + i % 3], 50 + i % 900, "
+        "users[1 + i % cardinality(users)], authors[1 + i % cardinality(authors)], "
+        "genres[1 + i % cardinality(genres)], :requests, :requests, now() - i * interval '1 second', now() "
+        "FROM refs, generate_series(CAST(:start AS int), :stop) i"
+    ), {"email": SEED_EMAIL, "words": list(WORDS), "start": start, "stop": stop, "requests": requests})
+
+    if config.locations_per_book:
+        min_lat, lat_span, min_lon, lon_span = AREA
+        await conn.execute(text(
+            "INSERT INTO book_locations (address, latitude, longitude, book_id, created_at, updated_at) "
+            "SELECT 'seed-' || b.id || '-' || j, "
+            "CAST(:min_lat AS float8) + random() * CAST(:lat_span AS float8), "
+            "CAST(:min_lon AS float8) + random() * CAST(:lon_span AS float8), b.id, now(), now() "
+            "FROM books b, generate_series(1, :per_book) j WHERE b.id > :last_id"
+        ), {
+            "min_lat": min_lat, "lat_span": lat_span, "min_lon": min_lon, "lon_span": lon_span,
+            "per_book": config.locations_per_book, "last_id": last_id,
+        })
+
+    if requests:
+        # Requesters follow the owner in the user list, so none requests its own book
+        await conn.execute(text(
+            "WITH refs AS (SELECT array_agg(id ORDER BY id) AS users FROM \"user\" WHERE email LIKE :email), "
+            "owners AS (SELECT b.id, array_position(refs.users, b.owner_id) AS owner, refs.users "
+            "FROM books b, refs WHERE b.id > :last_id) "
+            "INSERT INTO book_requests (book_id, requester_id, status, created_at, updated_at) "
+            "SELECT owners.id, users[1 + (owner - 1 + k) % cardinality(users)], 'PENDING', now(), now() "
+            "FROM owners, generate_series(1, :per_book) k"
+        ), {"email": SEED_EMAIL, "per_book": requests, "last_id": last_id})
+
+
+async def seed(config: SeedConfig) -> None:
+    started = time.perf_counter()
+    async with engine.begin() as conn:
+        await seed_references(conn, config)
+    for start in range(1, config.books + 1, config.chunk_size):
+        stop = min(start + config.chunk_size - 1, config.books)
+        async with engine.begin() as conn:
+            await seed_books(conn, start, stop, config)
+        elapsed = time.perf_counter() - started
+        print(f"{stop:>10} books   {elapsed:>8.1f} s   {stop / elapsed:>10.0f} books/s")
+
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in ("user", "authors", "genres", "books", "book_locations", "book_requests"):
+            await conn.execute(text(f'ANALYZE "{table}"'))
+
+
+async def drop() -> None:
+    """Remove all seeded rows."""
+    seed_books = "SELECT b.id FROM books b JOIN \"user\" u ON u.id = b.owner_id WHERE u.email LIKE :email"
+    async with engine.begin() as conn:
+        for statement in (
+            f"DELETE FROM book_requests WHERE book_id IN ({seed_books}) "
+            "OR requester_id IN (SELECT id FROM \"user\" WHERE email LIKE :email)",
+            f"DELETE FROM book_locations WHERE book_id IN ({seed_books})",
+            f"DELETE FROM books WHERE id IN ({seed_books})",
+            "DELETE FROM \"user\" WHERE email LIKE :email",
+            "DELETE FROM authors WHERE full_name LIKE 'seed-author-%'",
+            "DELETE FROM genres WHERE name LIKE 'seed-genre-%'",
+        ):
+            result = await conn.execute(text(statement), {"email": SEED_EMAIL})
+            print(f"{result.rowcount:>10} rows   {statement.split(' WHERE')[0]}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine.echo = False
+    try:
+        if args.drop:
+            await drop()
+        else:
+            await seed(SeedConfig(
+                books=args.books,
+                users=args.users,
+                authors=args.authors,
+                genres=args.genres,
+                locations_per_book=args.locations_per_book,
+                requests_per_book=args.requests_per_book,
+                chunk_size=args.chunk_size,
+            ))
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    defaults = SeedConfig()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--books", type=int, default=defaults.books, help="Books to add")
+    parser.add_argument("--users", type=int, default=defaults.users, help="Users owning and requesting them")
+    parser.add_argument("--authors", type=int, default=defaults.authors, help="Authors")
+    parser.add_argument("--genres", type=int, default=defaults.genres, help="Genres")
+    parser.add_argument("--locations-per-book", type=int, default=defaults.locations_per_book)
+    parser.add_argument("--requests-per-book", type=int, default=defaults.requests_per_book)
+    parser.add_argument("--chunk-size", type=int, default=defaults.chunk_size, help="Books per transaction")
+    parser.add_argument("--drop", action="store_true", help="Remove the seeded rows instead")
+    asyncio.run(main(parser.parse_args()))
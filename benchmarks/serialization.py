@@ -0,0 +1,107 @@
+"""
+Response serialization microbenchmark.
+
+Serializes a page of books with their author, genre and locations the
+way FastAPI does for a response model, with the json module and with
+orjson, and with the `FAST_RESPONSES` path, and reports books per second.
+No database is needed, the books are built in memory.
+
+    python -m benchmarks.serialization --books 10000
+"""
+import gc
+import time
+import uuid
+import asyncio
+import argparse
+from typing import Any, Awaitable, Callable, List
+
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from src.api import responses
+from src.core.config import settings
+from src.models import Author, Book, BookLocation, Genre
+from src.models.book import BookCondition
+from src.schemas.book import BookRead
+from src.schemas.page import Page
+
+
+def make_books(count: int) -> List[Book]:
+    """
+    Build transient books with their relationships.
+
+    :param count: Number of books.
+    :return: Books.
+    """
+    author = Author(id=1, full_name="J. R. R. Tolkien")
+    genre = Genre(id=1, name="Fantasy")
+    owner_id = uuid.uuid4()
+    return [
+        Book(
+            id=i,
+            name=f"Book {i}",
+            description="There and Back Again " * 10,
+            condition=BookCondition.USED,
+            page_count=300 + i % 200,
+            owner_id=owner_id,
+            author=author,
+            genre=genre,
+            locations=[BookLocation(address=f"{i} Main St"), BookLocation(address=f"{i} High St")],
+        )
+        for i in range(count)
+    ]
+
+
+async def fastapi_default(page: Page, response_class: type[Response]) -> bytes:
+    """Validate against the response model, dump to Python objects and encode."""
+    field = create_response_field(name="Response", type_=Page[BookRead])
+    content = await serialize_response(field=field, response_content=page, is_coroutine=True)
+    return response_class(content).body
+
+
+async def fast_responses(page: Page) -> bytes:
+    """Validate once and dump straight to JSON bytes."""
+    return responses.serialize(Page[BookRead], page, Response()).body
+
+
+async def measure(serializer: Callable[[], Awaitable[bytes]], books: int, rounds: int) -> float:
+    """
+    Run a serializer and keep the best round.
+
+    :param serializer: Serializer of the page.
+    :param books: Books in the page.
+    :param rounds: Number of rounds.
+    :return: Books per second.
+    """
+    best = float("inf")
+    for _ in range(rounds):
+        gc.collect()
+        started = time.perf_counter()
+        await serializer()
+        best = min(best, time.perf_counter() - started)
+    return books / best
+
+
+async def main(count: int, rounds: int) -> None:
+    settings.FAST_RESPONSES = True
+    page = Page(items=make_books(count), next_cursor=None)
+
+    runs: List[tuple[str, Callable[[], Awaitable[Any]]]] = [
+        ("fastapi + json", lambda: fastapi_default(page, JSONResponse)),
+        ("fastapi + orjson", lambda: fastapi_default(page, ORJSONResponse)),
+        ("fast responses", lambda: fast_responses(page)),
+    ]
+    baseline = None
+    for label, serializer in runs:
+        books_per_second = await measure(serializer, count, rounds)
+        baseline = baseline or books_per_second
+        print(f"{label:<17} {books_per_second:>10.0f} books/s  {books_per_second / baseline:>5.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--books", type=int, default=10000, help="Books per page")
+    parser.add_argument("--rounds", type=int, default=7, help="Rounds per serializer")
+    args = parser.parse_args()
+    asyncio.run(main(args.books, args.rounds))
@@ -0,0 +1,99 @@
+import json
+import time
+import asyncio
+import contextlib
+from typing import Any, AsyncIterator, Dict, Tuple
+
+from fastapi import FastAPI
+from sqlalchemy import delete
+from fastapi_async_sqlalchemy import db
+
+from src import crud
+from src.models import Book, User
+from src.modules.auth.manager import get_jwt_strategy
+from src.utils.dummy_data import create_user
+
+
+async def asgi_request(
+    app: FastAPI,
+    method: str,
+    path: str,
+    token: str | None = None,
+    body: Any = None
+) -> Tuple[int, Any]:
+    """
+    Call the app in-process, without a server or an HTTP client.
+
+    :param app: Application.
+    :param method: HTTP method.
+    :param path: Path with the query string.
+    :param token: Bearer token.
+    :param body: JSON body.
+    :return: Status code and decoded JSON body / None.
+    """
+    path, _, query = path.partition("?")
+    headers = [(b"host", b"localhost")]
+    if token:
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    data = b""
+    if body is not None:
+        data = json.dumps(body).encode()
+        headers.append((b"content-type", b"application/json"))
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 80),
+    }
+    requests = [{"type": "http.request", "body": data, "more_body": False}]
+    done = asyncio.Event()
+    response: Dict[str, Any] = {"status": None, "body": b""}
+
+    async def receive() -> Dict[str, Any]:
+        if requests:
+            return requests.pop(0)
+        # The client stays connected until the response is complete
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+            if not message.get("more_body"):
+                done.set()
+
+    await app(scope, receive, send)
+    return response["status"], json.loads(response["body"]) if response["body"] else None
+
+
+@contextlib.asynccontextmanager
+async def benchmark_user() -> AsyncIterator[Tuple[User, str]]:
+    """
+    Create a throwaway verified user and remove it with its books afterwards.
+
+    Needs an app whose middleware stack was built, e.g. by one request.
+
+    :return: User and its JWT.
+    """
+    email = f"benchmark-{time.time_ns()}@example.com"
+    await create_user(email, "benchmark")
+    async with db():
+        user = await crud.user.get_by_email(email)
+    try:
+        yield user, await get_jwt_strategy().write_token(user)
+    finally:
+        async with db():
+            await db.session.execute(delete(Book).where(Book.owner_id == user.id))
+            await db.session.execute(delete(User).where(User.id == user.id))
+            await db.session.commit()
@@ -1,4 +1,5 @@
 #!/bin/sh
 
 alembic upgrade head
-uvicorn src.main:app --host 0.0.0.0 --port 8000
+# Notification streams stay open, so they are cut after the grace period on shutdown
+uvicorn src.main:app --host 0.0.0.0 --port 8000 --timeout-graceful-shutdown 10
@@ -20,17 +20,9 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 
+# Naming convention is declared on Base.metadata
 target_metadata = Base.metadata
 
-target_metadata.naming_convention = {
-   "ix": "ix_%(column_0_label)s",
-   "uq": "uq_%(table_name)s_%(column_0_name)s",
-   "ck": "ck_%(table_name)s_%(constraint_name)s",
-   "fk": "fk_%(table_name)s_%(column_0_name)"
-         "s_%(referred_table_name)s",
-   "pk": "pk_%(table_name)s"
-}
-
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
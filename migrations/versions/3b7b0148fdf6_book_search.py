@@ -0,0 +1,69 @@
+"""book search
+
+Revision ID: 3b7b0148fdf6
+Revises: d6fd498cc111
+Create Date: 2026-10-18 14:21:37.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7b0148fdf6'
+down_revision: Union[str, None] = 'd6fd498cc111'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, column, operator class)
+INDEXES = [
+    ('ix_books_search_vector', 'books', 'search_vector', None),
+    ('ix_books_name_trgm', 'books', 'name', 'gin_trgm_ops'),
+    ('ix_authors_full_name_trgm', 'authors', 'full_name', 'gin_trgm_ops'),
+]
+
+
+def upgrade() -> None:
+    op.execute(sa.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    op.add_column(
+        'books',
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+                "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+
+    # Build indexes without locking writes on large tables
+    with op.get_context().autocommit_block():
+        for name, table, column, ops in INDEXES:
+            op.create_index(
+                name,
+                table,
+                [column],
+                postgresql_using='gin',
+                postgresql_ops={column: ops} if ops else {},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    op.drop_column('books', 'search_vector')
@@ -0,0 +1,45 @@
+"""location coordinates
+
+Revision ID: 5e9a3c1f7b24
+Revises: 8c41e2a7d5b0
+Create Date: 2026-10-18 11:24:09.530912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e9a3c1f7b24'
+down_revision: Union[str, None] = '8c41e2a7d5b0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('book_locations', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('book_locations', sa.Column('longitude', sa.Float(), nullable=True))
+
+    # Build the index without locking writes on large tables
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_book_locations_latitude_longitude',
+            'book_locations',
+            ['latitude', 'longitude'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_book_locations_latitude_longitude',
+            table_name='book_locations',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('book_locations', 'longitude')
+    op.drop_column('book_locations', 'latitude')
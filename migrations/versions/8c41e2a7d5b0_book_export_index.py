@@ -0,0 +1,39 @@
+"""book export index
+
+Revision ID: 8c41e2a7d5b0
+Revises: 3b7b0148fdf6
+Create Date: 2026-10-18 11:20:41.172305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41e2a7d5b0'
+down_revision: Union[str, None] = '3b7b0148fdf6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Build the index without locking writes on large tables
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_books_updated_at_id',
+            'books',
+            ['updated_at', 'id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_books_updated_at_id',
+            table_name='books',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
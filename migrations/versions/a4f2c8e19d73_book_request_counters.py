@@ -0,0 +1,52 @@
+"""book request counters
+
+Revision ID: a4f2c8e19d73
+Revises: 5e9a3c1f7b24
+Create Date: 2026-10-18 15:02:37.418206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4f2c8e19d73'
+down_revision: Union[str, None] = '5e9a3c1f7b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Constant defaults do not rewrite the table
+    op.add_column('books', sa.Column('request_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('books', sa.Column('pending_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        "UPDATE books SET request_count = counts.requests, pending_count = counts.pending "
+        "FROM (SELECT book_id, count(*) AS requests, count(*) FILTER (WHERE status = 'PENDING') AS pending "
+        "FROM book_requests GROUP BY book_id) AS counts "
+        "WHERE books.id = counts.book_id"
+    )
+
+    # Build the index without locking writes on large tables
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_books_pending_count_id',
+            'books',
+            ['pending_count', 'id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_books_pending_count_id',
+            table_name='books',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('books', 'pending_count')
+    op.drop_column('books', 'request_count')
@@ -0,0 +1,69 @@
+"""lookup indexes
+
+Revision ID: d6fd498cc111
+Revises: 61521013020b
+Create Date: 2026-10-18 11:02:13.418921
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6fd498cc111'
+down_revision: Union[str, None] = '61521013020b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, unique)
+INDEXES = [
+    ('ix_books_genre_id_id', 'books', ['genre_id', 'id'], False),
+    ('ix_books_author_id_id', 'books', ['author_id', 'id'], False),
+    ('ix_books_condition_id', 'books', ['condition', 'id'], False),
+    ('ix_books_owner_id', 'books', ['owner_id'], False),
+    ('ix_book_requests_book_id_requester_id', 'book_requests', ['book_id', 'requester_id'], True),
+    ('ix_book_requests_book_id_status', 'book_requests', ['book_id', 'status'], False),
+    ('ix_book_locations_book_id', 'book_locations', ['book_id'], False),
+]
+
+
+def upgrade() -> None:
+    # Requests created by racing duplicate POSTs would block the unique index.
+    # Keep one request of each (book_id, requester_id) pair: the accepted one,
+    # which records the giveaway, or else the oldest.
+    op.execute(
+        sa.text(
+            "DELETE FROM book_requests WHERE id IN ("
+            "SELECT id FROM ("
+            "SELECT id, row_number() OVER ("
+            "PARTITION BY book_id, requester_id ORDER BY status = 'ACCEPTED' DESC, id"
+            ") AS position FROM book_requests"
+            ") ranked WHERE position > 1)"
+        )
+    )
+
+    # Build indexes without locking writes on large tables
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=unique,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
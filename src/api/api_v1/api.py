@@ -2,13 +2,15 @@ from fastapi import APIRouter
 
 from src.modules.auth.manager import auth_core, auth_backend
 from src.schemas.user import UserRead, UserCreate
-from src.modules.auth.routers import users_router
+from src.modules.auth.routers import users_router, sessions_router
 from src.api.api_v1.endpoints import (
     genre,
     author,
     book,
     pickup,
-    request
+    request,
+    notification,
+    monitoring
 )
 
 
@@ -17,9 +19,15 @@ api_router = APIRouter()
 # Auth routes
 api_router.include_router(
     auth_core.get_auth_router(auth_backend, requires_verification=True),
-    prefix="/auth/jwt",
+    prefix=f"/auth/{auth_backend.name}",
     tags=["auth"]
 )
+if auth_backend.name == "redis":
+    api_router.include_router(
+        sessions_router,
+        prefix=f"/auth/{auth_backend.name}",
+        tags=["auth"]
+    )
 api_router.include_router(
     auth_core.get_register_router(UserRead, UserCreate),
     prefix="/auth",
@@ -77,3 +85,17 @@ api_router.include_router(
     prefix="/book-requests",
     tags=["book-request"],
 )
+
+# Notification routes
+api_router.include_router(
+    notification.router,
+    prefix="/notifications",
+    tags=["notification"],
+)
+
+# Monitoring routes
+api_router.include_router(
+    monitoring.router,
+    prefix="/monitoring",
+    tags=["monitoring"],
+)
@@ -1,9 +1,10 @@
-from typing import List
 from fastapi import APIRouter, HTTPException, Response, Depends
 
 from src import crud
 from src.models import User
-from src.api.deps import current_active_superuser
+from src.api.http_cache import ConditionalGet
+from src.api.deps import current_active_superuser, pagination_params, total_count_param
+from src.schemas.page import Page, PaginationParams
 from src.schemas.author import AuthorRead, AuthorCreate, AuthorUpdate
 
 
@@ -11,14 +12,26 @@ router = APIRouter()
 
 
 @router.get("/")
-async def get_authors() -> List[AuthorRead]:
+async def get_authors(
+    pagination: PaginationParams = Depends(pagination_params),
+    total: str | None = Depends(total_count_param),
+    http_cache: ConditionalGet = Depends()
+) -> Page[AuthorRead]:
     """
     Get all authors.
 
-    :return: List of genre author objects.
+    :param pagination: Pagination params.
+    :param total: Send the number of authors in `X-Total-Count`.
+    :param http_cache: Conditional GET helper.
+    :return: Page of author objects.
     """
-    authors = await crud.author.get_multi()
-    return authors
+    authors, next_cursor = await crud.author.get_page_cached(
+        cursor=pagination.cursor,
+        limit=pagination.limit
+    )
+    count = total and await crud.author.get_count(approximate=total == "approximate")
+
+    return http_cache.check_page(authors, next_cursor, total=count) or Page(items=authors, next_cursor=next_cursor)
 
 
 @router.get(
@@ -28,19 +41,23 @@ async def get_authors() -> List[AuthorRead]:
         409: {"description": "Author already exists"},
     }
 )
-async def get_author_by_id(author_id: int) -> AuthorRead:
+async def get_author_by_id(
+    author_id: int,
+    http_cache: ConditionalGet = Depends()
+) -> AuthorRead:
     """
     Get author by id.
 
     :param author_id: Author id.
+    :param http_cache: Conditional GET helper.
     :return: Author object.
     """
-    author = await crud.author.get(_id=author_id)
+    author = await crud.author.get_cached(_id=author_id)
 
     if not author:
         raise HTTPException(status_code=404, detail="Author not found")
 
-    return author
+    return http_cache.check_object(author) or author
 
 
 @router.post("/", responses={409: {"description": "Author already exists"}}, status_code=201)
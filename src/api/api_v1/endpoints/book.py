@@ -1,11 +1,20 @@
-from typing import List, Annotated
-from fastapi import APIRouter, HTTPException, Response, Query, Depends
+from datetime import datetime, timezone
+from typing import Annotated, Literal
+from fastapi import APIRouter, HTTPException, Response, Request, Query, Depends
+from fastapi.responses import StreamingResponse
 
 from src import crud
+from src.crud.book import book_read_options
 from src.models import User
-from src.api.deps import current_active_user
+from src.api.deps import current_active_superuser, current_active_user, pagination_params, total_count_param
+from src.api.http_cache import ConditionalGet
+from src.api.responses import serialize
 from src.models.book import BookCondition
-from src.schemas.book import BookRead, BookCreate, BookUpdate
+from src.core.config import settings
+from src.schemas.book import BookRead, BookCreate, BookUpdate, BookImportResult, BookNearbyRead, BookPopularRead
+from src.schemas.page import Page, PaginationParams
+from src.utils.bulk_export import export_books
+from src.utils.bulk_import import import_books, iter_csv_rows, iter_ndjson_rows
 
 
 router = APIRouter()
@@ -16,14 +25,178 @@ async def get_books(
     genre: Annotated[str, Query(...)] = None,
     author: Annotated[str, Query(...)] = None,
     condition: Annotated[BookCondition, Query(...)] = None,
-) -> List[BookRead]:
+    pagination: PaginationParams = Depends(pagination_params),
+    total: str | None = Depends(total_count_param),
+    http_cache: ConditionalGet = Depends(),
+) -> Page[BookRead]:
     """
     Get all books.
 
-    :return: List of book objects.
+    :param genre: Genre name.
+    :param author: Author name.
+    :param condition: Book condition.
+    :param pagination: Pagination params.
+    :param total: Send the number of matching books in `X-Total-Count`.
+    :param http_cache: Conditional GET helper.
+    :return: Page of book objects.
     """
-    books = await crud.book.filter_by_params(genre, author, condition)
-    return books
+    books, next_cursor = await crud.book.filter_by_params(
+        genre,
+        author,
+        condition,
+        cursor=pagination.cursor,
+        limit=pagination.limit,
+        options=book_read_options
+    )
+    count = total and await crud.book.count_by_params(
+        genre,
+        author,
+        condition,
+        approximate=total == "approximate"
+    )
+    return http_cache.check_page(books, next_cursor, total=count) or serialize(
+        Page[BookRead], Page(items=books, next_cursor=next_cursor), http_cache.response
+    )
+
+
+@router.get("/search")
+async def search_books(
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    pagination: PaginationParams = Depends(pagination_params),
+    http_cache: ConditionalGet = Depends(),
+) -> Page[BookRead]:
+    """
+    Search books by name, description and author, best match first.
+
+    :param q: Search query.
+    :param pagination: Pagination params.
+    :param http_cache: Conditional GET helper.
+    :return: Page of book objects.
+    """
+    books, next_cursor = await crud.book.search(
+        q,
+        cursor=pagination.cursor,
+        limit=pagination.limit,
+        options=book_read_options
+    )
+    return http_cache.check_page(books, next_cursor) or serialize(
+        Page[BookRead], Page(items=books, next_cursor=next_cursor), http_cache.response
+    )
+
+
+@router.get("/popular")
+async def get_popular_books(
+    pagination: PaginationParams = Depends(pagination_params),
+    http_cache: ConditionalGet = Depends(),
+) -> Page[BookPopularRead]:
+    """
+    Get books with pending requests, most requested first.
+
+    :param pagination: Pagination params.
+    :param http_cache: Conditional GET helper.
+    :return: Page of book objects with their request counters.
+    """
+    books, next_cursor = await crud.book.popular(
+        cursor=pagination.cursor,
+        limit=pagination.limit,
+        options=book_read_options
+    )
+    return http_cache.check_page(books, next_cursor) or serialize(
+        Page[BookPopularRead], Page(items=books, next_cursor=next_cursor), http_cache.response
+    )
+
+
+@router.get("/nearby")
+async def get_nearby_books(
+    lat: Annotated[float, Query(ge=-90, le=90)],
+    lon: Annotated[float, Query(ge=-180, le=180)],
+    radius: Annotated[float, Query(gt=0, le=settings.NEARBY_RADIUS_MAX)] = settings.NEARBY_RADIUS_DEFAULT,
+    genre: Annotated[str, Query(...)] = None,
+    author: Annotated[str, Query(...)] = None,
+    condition: Annotated[BookCondition, Query(...)] = None,
+    pagination: PaginationParams = Depends(pagination_params),
+    http_cache: ConditionalGet = Depends(),
+) -> Page[BookNearbyRead]:
+    """
+    Get books with a pickup location near a point, nearest first.
+
+    Every book is returned once, with its nearest pickup location.
+
+    :param lat: Latitude in degrees.
+    :param lon: Longitude in degrees.
+    :param radius: Radius in meters.
+    :param genre: Genre name.
+    :param author: Author name.
+    :param condition: Book condition.
+    :param pagination: Pagination params.
+    :param http_cache: Conditional GET helper.
+    :return: Page of books with their nearest location and its distance in meters.
+    """
+    rows, next_cursor = await crud.book.nearby(
+        lat,
+        lon,
+        radius,
+        genre,
+        author,
+        condition,
+        cursor=pagination.cursor,
+        limit=pagination.limit,
+        options=book_read_options
+    )
+    books = [book for book, _, _ in rows]
+    items = [{"book": book, "location": location, "distance": distance} for book, location, distance in rows]
+    return http_cache.check_page(books, next_cursor) or serialize(
+        Page[BookNearbyRead], Page(items=items, next_cursor=next_cursor), http_cache.response
+    )
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Streamed books",
+            "content": {"application/x-ndjson": {}, "text/csv": {}},
+        },
+    },
+)
+async def get_books_export(
+    genre: Annotated[str, Query(...)] = None,
+    author: Annotated[str, Query(...)] = None,
+    condition: Annotated[BookCondition, Query(...)] = None,
+    updated_since: Annotated[datetime, Query(...)] = None,
+    export_format: Annotated[Literal["ndjson", "csv"], Query(alias="format")] = "ndjson",
+    user: User = Depends(current_active_superuser)
+) -> StreamingResponse:
+    """
+    Export books as NDJSON or CSV, streamed with constant memory.
+
+    Rows have the book fields, `author` and `genre` names, `id`, `owner_id`
+    and `updated_at`; CSV exports can be imported again with `POST /books/bulk`.
+    With `updated_since` rows are ordered by `updated_at`, so the last
+    `updated_at` of an export starts the next incremental one.
+
+    Required role:
+    - Be a superuser
+
+    :param genre: Genre name.
+    :param author: Author name.
+    :param condition: Book condition.
+    :param updated_since: Only books updated at or after this time.
+    :param export_format: `ndjson` / `csv`.
+    :param user: Active superuser object.
+    :return: Streamed books.
+    """
+    if updated_since and updated_since.tzinfo:
+        # updated_at is stored as naive UTC
+        updated_since = updated_since.astimezone(timezone.utc).replace(tzinfo=None)
+
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        export_books(export_format, genre, author, condition, updated_since),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="books.{export_format}"'},
+    )
 
 
 @router.get(
@@ -33,22 +206,33 @@ async def get_books(
         409: {"description": "Book already exists"},
     }
 )
-async def get_book_by_id(book_id: int) -> BookRead:
+async def get_book_by_id(
+    book_id: int,
+    http_cache: ConditionalGet = Depends()
+) -> BookRead:
     """
     Get book by id.
 
     :param book_id: Book id.
+    :param http_cache: Conditional GET helper.
     :return: Book object.
     """
-    book = await crud.book.get(_id=book_id)
+    book = await crud.book.get(_id=book_id, options=book_read_options)
 
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
 
-    return book
+    return http_cache.check_object(book) or serialize(BookRead, book, http_cache.response)
 
 
-@router.post("/", responses={409: {"description": "Book already exists"}}, status_code=201)
+@router.post(
+    "/",
+    responses={
+        404: {"description": "Genre or author not found"},
+        409: {"description": "Book already exists"},
+    },
+    status_code=201
+)
 async def create_book(
     book_new: BookCreate,
     user: User = Depends(current_active_user)
@@ -65,27 +249,73 @@ async def create_book(
     :param user: Active user object.
     :return: Created book object.
     """
-    # Check if genre exists
-    genre = await crud.genre.get(_id=book_new.genre_id)
-    if not genre:
-        raise HTTPException(status_code=404, detail="Genre not found")
-
-    # Check if author exists
-    author = await crud.author.get(_id=book_new.author_id)
-    if not author:
-        raise HTTPException(status_code=404, detail="Author not found")
-
     # Overwrite owner id
     book_new.owner_id = user.id
 
-    book = await crud.book.create(obj_in=book_new)
+    # Missing genre or author fails the insert and is reported as 404
+    book = await crud.book.create(obj_in=book_new, options=book_read_options)
     return book
 
 
+@router.post(
+    "/bulk",
+    responses={
+        403: {"description": "Only superusers can create missing authors and genres"},
+        415: {"description": "Unsupported content type"},
+    },
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+            "required": True,
+        },
+    },
+)
+async def create_books_bulk(
+    request: Request,
+    create_missing: Annotated[bool, Query(...)] = False,
+    user: User = Depends(current_active_user)
+) -> BookImportResult:
+    """
+    Import books from an NDJSON or CSV body.
+
+    Rows have the book fields plus `author`/`genre` names or
+    `author_id`/`genre_id`. The body is streamed and stored in chunks, so
+    invalid rows are reported without rejecting the rest of the import.
+    owner_id of every book is the id of the active user.
+
+    Required role:
+    - Be a verified user
+    - Be a superuser to create missing authors and genres
+
+    :param request: Request with the streamed body.
+    :param create_missing: Create authors and genres that do not exist.
+    :param user: Active user object.
+    :return: Import result.
+    """
+    if create_missing and not user.is_superuser:
+        raise HTTPException(
+            status_code=403,
+            detail="Only superusers can create missing authors and genres"
+        )
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in ("application/x-ndjson", "application/jsonl"):
+        rows = iter_ndjson_rows(request.stream())
+    elif content_type == "text/csv":
+        rows = iter_csv_rows(request.stream())
+    else:
+        raise HTTPException(status_code=415, detail="Unsupported content type")
+
+    return await import_books(rows, owner_id=user.id, create_missing=create_missing)
+
+
 @router.put(
-    "/{author_id}",
+    "/{book_id}",
     responses={
-        404: {"description": "Book not found"},
+        404: {"description": "Book, genre or author not found"},
         409: {"description": "Book already exists"},
     }
 )
@@ -115,17 +345,12 @@ async def update_book(
     if book.owner_id != user.id:
         raise HTTPException(status_code=403, detail="User is not the owner of the book")
 
-    # Check if genre exists
-    genre = await crud.genre.get(_id=book_new.genre_id)
-    if not genre:
-        raise HTTPException(status_code=404, detail="Genre not found")
-
-    # Check if author exists
-    author = await crud.author.get(_id=book_new.author_id)
-    if not author:
-        raise HTTPException(status_code=404, detail="Author not found")
-
-    book = await crud.book.update(obj_current=book, obj_new=book_new)
+    # Missing genre or author fails the update and is reported as 404
+    book = await crud.book.update(
+        obj_current=book,
+        obj_new=book_new,
+        options=book_read_options
+    )
     return book
 
 
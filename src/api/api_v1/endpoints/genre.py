@@ -1,9 +1,10 @@
-from typing import List
 from fastapi import APIRouter, HTTPException, Response, Depends
 
 from src import crud
 from src.models import User
-from src.api.deps import current_active_superuser
+from src.api.http_cache import ConditionalGet
+from src.api.deps import current_active_superuser, pagination_params, total_count_param
+from src.schemas.page import Page, PaginationParams
 from src.schemas.genre import GenreRead, GenreCreate, GenreUpdate
 
 
@@ -11,14 +12,26 @@ router = APIRouter()
 
 
 @router.get("/")
-async def get_genres() -> List[GenreRead]:
+async def get_genres(
+    pagination: PaginationParams = Depends(pagination_params),
+    total: str | None = Depends(total_count_param),
+    http_cache: ConditionalGet = Depends()
+) -> Page[GenreRead]:
     """
     Get all genres.
 
-    :return: List of genre objects.
+    :param pagination: Pagination params.
+    :param total: Send the number of genres in `X-Total-Count`.
+    :param http_cache: Conditional GET helper.
+    :return: Page of genre objects.
     """
-    genres = await crud.genre.get_multi()
-    return genres
+    genres, next_cursor = await crud.genre.get_page_cached(
+        cursor=pagination.cursor,
+        limit=pagination.limit
+    )
+    count = total and await crud.genre.get_count(approximate=total == "approximate")
+
+    return http_cache.check_page(genres, next_cursor, total=count) or Page(items=genres, next_cursor=next_cursor)
 
 
 @router.get(
@@ -28,19 +41,23 @@ async def get_genres() -> List[GenreRead]:
         409: {"description": "Genre already exists"},
     }
 )
-async def get_genre_by_id(genre_id: int) -> GenreRead:
+async def get_genre_by_id(
+    genre_id: int,
+    http_cache: ConditionalGet = Depends()
+) -> GenreRead:
     """
     Get genre by id.
 
     :param genre_id: Genre id.
+    :param http_cache: Conditional GET helper.
     :return: Genre object.
     """
-    genre = await crud.genre.get(_id=genre_id)
+    genre = await crud.genre.get_cached(_id=genre_id)
 
     if not genre:
         raise HTTPException(status_code=404, detail="Genre not found")
 
-    return genre
+    return http_cache.check_object(genre) or genre
 
 
 @router.post("/", responses={409: {"description": "Genre already exists"}}, status_code=201)
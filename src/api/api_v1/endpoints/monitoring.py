@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends
+
+from src.models import User
+from src.api.deps import current_active_superuser
+from src.db.session import engine
+from src.modules.jobs.queue import job_queue
+from src.schemas.monitoring import JobQueueStats, PoolStats
+
+
+router = APIRouter()
+
+
+@router.get("/db-pool")
+async def get_db_pool_stats(user: User = Depends(current_active_superuser)) -> PoolStats:
+    """
+    Get database connection pool usage, to size the pool.
+
+    Wait times are in seconds and counted since the pool was created.
+
+    Required role:
+    - Superuser
+
+    :param user: Active superuser object.
+    :return: Pool statistics.
+    """
+    return PoolStats(**engine.pool.stats())
+
+
+@router.get("/jobs")
+async def get_job_queue_stats(user: User = Depends(current_active_superuser)) -> JobQueueStats:
+    """
+    Get background job queue depths and latencies.
+
+    Times are averages in seconds; the wait time is counted from the job
+    getting ready to a worker starting it.
+
+    Required role:
+    - Superuser
+
+    :param user: Active superuser object.
+    :return: Job queue statistics.
+    """
+    return JobQueueStats(**await job_queue.stats())
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from redis.exceptions import RedisError
+
+from src.models import User
+from src.api.deps import current_active_user
+from src.modules.notifications.broker import TooManyConnections, notification_broker
+from src.modules.notifications.stream import event_stream
+
+router = APIRouter()
+
+
+@router.get(
+    "/stream",
+    response_class=StreamingResponse,
+    responses={
+        200: {"description": "Notification stream", "content": {"text/event-stream": {}}},
+        503: {"description": "Notifications unavailable"},
+    },
+)
+async def stream_notifications(user: User = Depends(current_active_user)) -> StreamingResponse:
+    """
+    Stream the notifications of the current user as server-sent events.
+
+    Events are `BookRequestNotification` JSON objects: owners are told about
+    new requests for their books and requesters whether their requests were
+    accepted or rejected. Notifications sent while the stream is closed are
+    not replayed. After an `overflow` event the stream ends; reconnect and
+    reload the requests.
+
+    Roles required:
+    - Be a verified user
+
+    :param user: Active user object.
+    :return: Event stream.
+    """
+    try:
+        subscription = await notification_broker.subscribe(user.id)
+    except TooManyConnections:
+        raise HTTPException(status_code=503, detail="Too many notification streams")
+    except RedisError:
+        raise HTTPException(status_code=503, detail="Notifications unavailable")
+
+    return StreamingResponse(
+        event_stream(notification_broker, subscription),
+        media_type="text/event-stream",
+        # Proxies must pass events through as they come
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,14 +1,26 @@
-from fastapi import APIRouter, HTTPException, Response, Depends
+from typing import Annotated, List
+
+from fastapi import APIRouter, Body, HTTPException, Response, Depends
 
 from src import crud
+from src.crud.book import book_read_options
+from src.crud.pickup import location_book_options, location_read_options
 from src.models import User
 from src.api.deps import current_active_user
-from src.schemas.book import BookLocationRead, BookLocationCreate
+from src.core.config import settings
+from src.schemas.book import BookRead, BookLocationBase, BookLocationRead, BookLocationCreate, BookLocationUpdate
 
 router = APIRouter()
 
 
-@router.post("/", status_code=201)
+@router.post(
+    "/",
+    responses={
+        403: {"description": "User is not the owner of the book"},
+        404: {"description": "Book not found"},
+    },
+    status_code=201
+)
 async def add_pickup_location_for_book(
     pickup_location_new: BookLocationCreate,
     current_user: User = Depends(current_active_user)
@@ -21,16 +33,147 @@ async def add_pickup_location_for_book(
     - Be the owner of the book
 
     :param pickup_location_new: Pickup location to add.
-    :param current_user: Superuser user object.
+    :param current_user: Active user object.
     :return: The pickup location.
     """
-    # Check if book exists
-    book = await crud.book.get(_id=pickup_location_new.book_id)
+    # Lock the book, so concurrent additions cannot pass the limit together
+    book = await crud.book.get(_id=pickup_location_new.book_id, for_update=True)
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
 
-    pickup_location = await crud.pickup.create(obj_in=pickup_location_new)
+    # Check if user is owner of the book
+    if book.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="User is not the owner of the book")
+
+    # Same limit as replacing the locations
+    if await crud.pickup.count_for_book(book.id) >= settings.BOOK_LOCATIONS_MAX:
+        raise HTTPException(
+            status_code=422,
+            detail=f"A book can have at most {settings.BOOK_LOCATIONS_MAX} pickup locations",
+        )
+
+    pickup_location = await crud.pickup.create(
+        obj_in=pickup_location_new,
+        options=location_read_options
+    )
     return pickup_location
 
 
-# TODO: Add EDIT & DELETE endpoints
+@router.put(
+    "/{book_id}",
+    responses={
+        403: {"description": "User is not the owner of the book"},
+        404: {"description": "Book not found"},
+    }
+)
+async def replace_pickup_locations_for_book(
+    book_id: int,
+    pickup_locations: Annotated[List[BookLocationBase], Body(max_length=settings.BOOK_LOCATIONS_MAX)],
+    current_user: User = Depends(current_active_user)
+) -> BookRead:
+    """
+    Replace all pickup locations of a book.
+
+    Locations that are in both the current and the new set are kept as
+    they are, the others are removed or added, in one transaction.
+
+    Roles required:
+    - Be a verified user
+    - Be the owner of the book
+
+    :param book_id: Book id.
+    :param pickup_locations: New pickup locations of the book.
+    :param current_user: Active user object.
+    :return: Book with its new pickup locations.
+    """
+    # Lock the book, so concurrent replacements are applied one after the other
+    book = await crud.book.get(_id=book_id, for_update=True)
+    if not book:
+        raise HTTPException(status_code=404, detail="Book not found")
+
+    # Check if user is owner of the book
+    if book.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="User is not the owner of the book")
+
+    await crud.pickup.replace_for_book(book_id=book_id, locations=pickup_locations)
+    return await crud.book.get(_id=book_id, options=book_read_options)
+
+
+@router.put(
+    "/{book_id}/{location_id}",
+    responses={
+        403: {"description": "User is not the owner of the book"},
+        404: {"description": "Pickup location not found"},
+    }
+)
+async def update_pickup_location(
+    book_id: int,
+    location_id: int,
+    pickup_location_new: BookLocationUpdate,
+    current_user: User = Depends(current_active_user)
+) -> BookLocationRead:
+    """
+    Update a pickup location of a book.
+
+    Roles required:
+    - Be a verified user
+    - Be the owner of the book
+
+    :param book_id: Book id.
+    :param location_id: Pickup location id.
+    :param pickup_location_new: New pickup location.
+    :param current_user: Active user object.
+    :return: The updated pickup location.
+    """
+    pickup_location = await crud.pickup.get(_id=location_id, options=location_book_options)
+    if not pickup_location or pickup_location.book_id != book_id:
+        raise HTTPException(status_code=404, detail="Pickup location not found")
+
+    # Check if user is owner of the book
+    if pickup_location.book.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="User is not the owner of the book")
+
+    # Unset coordinates are cleared as well
+    pickup_location = await crud.pickup.update(
+        obj_current=pickup_location,
+        obj_new=pickup_location_new.model_dump(),
+        options=location_read_options
+    )
+    return pickup_location
+
+
+@router.delete(
+    "/{book_id}/{location_id}",
+    responses={
+        403: {"description": "User is not the owner of the book"},
+        404: {"description": "Pickup location not found"},
+    }
+)
+async def delete_pickup_location(
+    book_id: int,
+    location_id: int,
+    current_user: User = Depends(current_active_user)
+) -> Response:
+    """
+    Delete a pickup location of a book.
+
+    Roles required:
+    - Be a verified user
+    - Be the owner of the book
+
+    :param book_id: Book id.
+    :param location_id: Pickup location id.
+    :param current_user: Active user object.
+    :return: 204 response.
+    """
+    pickup_location = await crud.pickup.get(_id=location_id, options=location_book_options)
+    if not pickup_location or pickup_location.book_id != book_id:
+        raise HTTPException(status_code=404, detail="Pickup location not found")
+
+    # Check if user is owner of the book
+    if pickup_location.book.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="User is not the owner of the book")
+
+    await crud.pickup.remove(_id=location_id)
+
+    return Response(status_code=204)
@@ -1,11 +1,19 @@
-from typing import List
 from fastapi import APIRouter, HTTPException, Response, Depends
 
 from src import crud
+from src.crud.book import book_read_options
+from src.crud.request import request_read_options
 from src.models import User
 from src.models.book import BookRequestStatus
-from src.api.deps import current_active_superuser, current_active_user
-from src.schemas.book import BookRequestRead, BookRequestCreate, BookRequestUpdate
+from src.api.http_cache import ConditionalGet
+from src.api.responses import serialize
+from src.api.deps import current_active_superuser, current_active_user, pagination_params, total_count_param
+from src.modules.jobs.queue import enqueue, enqueue_many
+from src.modules.jobs.tasks import JobName
+from src.modules.notifications.broker import notify, notify_many
+from src.schemas.notification import BookRequestNotification
+from src.schemas.book import BookRequestRead, BookRequestCreate
+from src.schemas.page import Page, PaginationParams
 
 
 router = APIRouter()
@@ -14,8 +22,11 @@ router = APIRouter()
 @router.get("/{book_id}")
 async def get_book_requests(
     book_id: int,
+    pagination: PaginationParams = Depends(pagination_params),
+    total: str | None = Depends(total_count_param),
+    http_cache: ConditionalGet = Depends(),
     user: User = Depends(current_active_user)
-) -> List[BookRequestRead]:
+) -> Page[BookRequestRead]:
     """
     Get all book request.
 
@@ -24,8 +35,12 @@ async def get_book_requests(
     - Be the owner of the book
 
     :param book_id: Book id.
+    :param pagination: Pagination params.
+    :param total: Send the number of requests for the book in `X-Total-Count`,
+        `approximate` reads the request counter of the book.
+    :param http_cache: Conditional GET helper.
     :param user: Current user.
-    :return: List of book request objects.
+    :return: Page of book request objects.
     """
     # Check if book exists
     book = await crud.book.get(book_id)
@@ -42,8 +57,21 @@ async def get_book_requests(
             detail="You are not the owner of the book"
         )
 
-    book_requests = await crud.request.get_by_book(book_id=book_id)
-    return book_requests
+    book_requests, next_cursor = await crud.request.get_by_book(
+        book_id=book_id,
+        cursor=pagination.cursor,
+        limit=pagination.limit,
+        options=request_read_options
+    )
+    count = None
+    if total == "approximate":
+        # Maintained with the request writes, so no query is needed
+        count = book.request_count
+    elif total:
+        count = await crud.request.count_by_book(book_id)
+    return http_cache.check_page(book_requests, next_cursor, public=False, total=count) or serialize(
+        Page[BookRequestRead], Page(items=book_requests, next_cursor=next_cursor), http_cache.response
+    )
 
 
 @router.post("/{book_id}", status_code=201)
@@ -93,11 +121,27 @@ async def create_book_request(
         status=BookRequestStatus.PENDING
     )
 
-    book_request = await crud.request.create(obj_in=book_request)
+    book_request = await crud.request.create(
+        obj_in=book_request,
+        options=request_read_options
+    )
+    await enqueue(JobName.NOTIFY_BOOK_REQUEST_CREATED, request_id=book_request.id)
+    await notify(book.owner_id, BookRequestNotification(
+        event="book_request_created",
+        request_id=book_request.id,
+        book_id=book_id,
+        status=book_request.status
+    ))
     return book_request
 
 
-@router.patch("/{request_id}")
+@router.patch(
+    "/{request_id}",
+    responses={
+        404: {"description": "Book request not found"},
+        409: {"description": "A request was already accepted for this book"},
+    }
+)
 async def accept_book_request(
     request_id: int,
     user: User = Depends(current_active_user)
@@ -121,31 +165,49 @@ async def accept_book_request(
             detail="Book request not found"
         )
 
-    # TODO: Check if request was already accepted
+    # Lock the book so concurrent accepts for it are serialized
+    book = await crud.book.get(
+        book_request.book_id,
+        options=book_read_options,
+        for_update=True
+    )
 
     # Check if user is the owner of the book
-    book = await crud.book.get(book_request.book_id)
     if book.owner_id != user.id:
         raise HTTPException(
             status_code=403,
             detail="You are not the owner of the book"
         )
 
-    # Accept request
-    book_request_new = BookRequestUpdate(
-        book_id=book_request.book_id,
-        requester_id=book_request.requester_id,
-        status=BookRequestStatus.ACCEPTED
-    )
-    book_request = await crud.request.update(
-        obj_current=book_request,
-        obj_new=book_request_new,
-    )
-
-    # Reject all other requests
-    await crud.request.reject_all_requests_for_book(
-        book_id=book_request.book_id
-    )
+    # Check if a request was already accepted
+    if await crud.request.has_accepted(book_id=book.id):
+        raise HTTPException(
+            status_code=409,
+            detail="A request was already accepted for this book"
+        )
 
+    # Accept request and reject all other requests
+    book_request, rejected = await crud.request.accept(book_request, book)
+    # One e-mail job per requester, so a failed delivery is retried alone
+    await enqueue_many(JobName.NOTIFY_BOOK_REQUEST_DECIDED, [
+        {"request_id": book_request.id, "event": BookRequestStatus.ACCEPTED.value},
+        *({"request_id": rejected_id, "event": BookRequestStatus.REJECTED.value} for rejected_id, _ in rejected),
+    ])
+    await notify_many([
+        (book_request.requester_id, BookRequestNotification(
+            event="book_request_accepted",
+            request_id=book_request.id,
+            book_id=book.id,
+            status=BookRequestStatus.ACCEPTED
+        )),
+        *(
+            (requester_id, BookRequestNotification(
+                event="book_request_rejected",
+                request_id=rejected_id,
+                book_id=book.id,
+                status=BookRequestStatus.REJECTED
+            ))
+            for rejected_id, requester_id in rejected
+        ),
+    ])
     return book_request
-
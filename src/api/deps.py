@@ -1,6 +1,40 @@
+from typing import Annotated, Literal
+
+from fastapi import Query
+
+from src.core.config import settings
+from src.schemas.page import PaginationParams
 from src.modules.auth.manager import auth_core
 
 
 # User dependencies
 current_active_user = auth_core.current_user(active=True)
 current_active_superuser = auth_core.current_user(active=True, superuser=True)
+
+
+# Pagination dependencies
+async def pagination_params(
+    cursor: Annotated[str, Query(...)] = None,
+    limit: Annotated[int, Query(ge=1, le=settings.PAGE_SIZE_MAX)] = settings.PAGE_SIZE_DEFAULT,
+) -> PaginationParams:
+    """
+    Keyset pagination query parameters.
+
+    :param cursor: Cursor returned as `next_cursor` by the previous page.
+    :param limit: Page size.
+    :return: Pagination params.
+    """
+    return PaginationParams(cursor=cursor, limit=limit)
+
+
+async def total_count_param(
+    total: Annotated[Literal["exact", "approximate"], Query(...)] = None,
+) -> Literal["exact", "approximate"] | None:
+    """
+    Total count query parameter of list endpoints.
+
+    :param total: Send the number of matching objects in `X-Total-Count`,
+        `approximate` allows estimates and cached counts.
+    :return: Requested total / None.
+    """
+    return total
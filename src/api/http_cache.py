@@ -0,0 +1,149 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Iterable, List, Sequence, Set, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import inspect
+
+from src.core.config import settings
+from src.models.base import PkBase
+
+
+def collect_versions(
+    objs: Iterable[PkBase],
+    seen: Set[Tuple[str, Any]] | None = None
+) -> List[Tuple[str, Any, Any]]:
+    """
+    Collect `(table, id, updated_at)` of objects and their loaded relationships.
+
+    Relationships that were not loaded are skipped, so no query is issued.
+
+    :param objs: Database objects.
+    :param seen: Identities already collected.
+    :return: Versions in traversal order.
+    """
+    seen = set() if seen is None else seen
+    versions = []
+    for obj in objs:
+        identity = (obj.__tablename__, obj.id)
+        if identity in seen:
+            continue
+        seen.add(identity)
+        versions.append((*identity, obj.updated_at))
+
+        state = inspect(obj)
+        for relationship in state.mapper.relationships:
+            if relationship.key in state.unloaded:
+                continue
+            related = getattr(obj, relationship.key)
+            related = related if relationship.uselist else [related]
+            versions.extend(collect_versions([item for item in related if item is not None], seen))
+    return versions
+
+
+class ConditionalGet:
+    """
+    Conditional GET support for read endpoints.
+
+    Weak ETags are computed from the `(id, updated_at)` of the returned
+    objects, so an unchanged response is answered with `304 Not Modified`
+    instead of being serialized and sent again.
+    """
+
+    def __init__(self, request: Request, response: Response) -> None:
+        self.request = request
+        self.response = response
+
+    @staticmethod
+    def etag(versions: List[Tuple[str, Any, Any]], *extra: Any) -> str:
+        """
+        Build a weak ETag.
+
+        :param versions: Object versions.
+        :param extra: Other values the response depends on, e.g. the next cursor.
+        :return: ETag header value.
+        """
+        digest = hashlib.sha1(repr((versions, extra)).encode()).hexdigest()
+        return f'W/"{digest}"'
+
+    def _is_fresh(self, etag: str, last_modified: datetime | None) -> bool:
+        """Check the request validators against the current representation."""
+        if_none_match = self.request.headers.get("if-none-match")
+        if if_none_match is not None:
+            # Weak comparison, as required for GET
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or etag.removeprefix("W/") in tags
+
+        if_modified_since = self.request.headers.get("if-modified-since")
+        if if_modified_since is None or last_modified is None:
+            return False
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+
+    def _check(
+        self,
+        versions: List[Tuple[str, Any, Any]],
+        extra: Tuple[Any, ...],
+        with_last_modified: bool,
+        public: bool
+    ) -> Response | None:
+        """Set the caching headers and answer 304 if the client copy is current."""
+        headers: Dict[str, str] = {
+            "ETag": self.etag(versions, *extra),
+            "Cache-Control": (
+                f"public, max-age={settings.HTTP_CACHE_MAX_AGE}" if public else "private, no-cache"
+            ),
+        }
+
+        last_modified = None
+        timestamps = [updated_at for *_, updated_at in versions if updated_at]
+        if with_last_modified and timestamps:
+            last_modified = max(timestamps).replace(tzinfo=timezone.utc)
+            headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+        if self._is_fresh(headers["ETag"], last_modified):
+            return Response(status_code=304, headers=headers)
+
+        self.response.headers.update(headers)
+        return None
+
+    def check_object(self, obj: PkBase, public: bool = True) -> Response | None:
+        """
+        Set the caching headers of a single object response.
+
+        :param obj: Returned object, with the relationships it is serialized with.
+        :param public: Allow shared caches to store the response.
+        :return: 304 response to return / None to send the full body.
+        """
+        return self._check(collect_versions([obj]), (), True, public)
+
+    def check_page(
+        self,
+        items: Sequence[PkBase],
+        next_cursor: str | None,
+        public: bool = True,
+        total: int | None = None
+    ) -> Response | None:
+        """
+        Set the caching headers of a page response.
+
+        No `Last-Modified` is sent: the newest `updated_at` of a page does not
+        change when an item is removed from it.
+
+        :param items: Returned objects.
+        :param next_cursor: Cursor of the next page.
+        :param public: Allow shared caches to store the response.
+        :param total: Number of matching objects, sent as `X-Total-Count`.
+        :return: 304 response to return / None to send the full body.
+        """
+        if total is None:
+            return self._check(collect_versions(items), (next_cursor,), False, public)
+
+        self.response.headers["X-Total-Count"] = str(total)
+        return self._check(collect_versions(items), (next_cursor, total), False, public)
@@ -0,0 +1,179 @@
+import json
+import time
+import asyncio
+import hashlib
+import secrets
+from typing import Any, Dict, List
+
+from starlette.datastructures import Headers
+from starlette.requests import ClientDisconnect
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import settings
+from src.db.cache import cache
+
+IDEMPOTENT_METHODS = ("POST", "PATCH")
+# Keys are client generated, e.g. UUIDs
+MAX_KEY_LENGTH = 255
+# Seconds between checks of a duplicate waiting for the first request
+POLL_INTERVAL = 0.05
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+async def read_body(receive: Receive, max_bytes: int) -> bytes:
+    """
+    Read a whole request body.
+
+    :param receive: ASGI receive channel.
+    :param max_bytes: Largest accepted body.
+    :return: Body.
+    """
+    chunks: List[bytes] = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ClientDisconnect()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > max_bytes:
+            raise BodyTooLarge()
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+class IdempotencyMiddleware:
+    """
+    Replays the stored response of POST and PATCH requests repeated with the same `Idempotency-Key`.
+
+    The key is scoped to the method, path and credentials of the request,
+    and its first response is stored for `IDEMPOTENCY_TTL` seconds unless
+    it is a server error, so a retry can succeed. Duplicates arriving while
+    the first request runs wait for its response, up to
+    `IDEMPOTENCY_LOCK_TTL` seconds. Reusing a key with another body is
+    rejected with 422. Requests whose lock can not be taken because the
+    cache fails get a 503 instead of running unguarded. Added outside of
+    the database session middleware, so replays do not touch the database.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in IDEMPOTENT_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        key = headers.get("idempotency-key")
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not key or len(key) > MAX_KEY_LENGTH:
+            response = JSONResponse({"detail": "Invalid Idempotency-Key"}, status_code=400)
+            await response(scope, receive, send)
+            return
+        try:
+            body = await read_body(receive, settings.IDEMPOTENCY_MAX_BODY_BYTES)
+        except BodyTooLarge:
+            response = JSONResponse({"detail": "Request body too large for an Idempotency-Key"}, status_code=413)
+            await response(scope, receive, send)
+            return
+        except ClientDisconnect:
+            return
+
+        scope_digest = hashlib.sha256(repr((
+            scope["method"], scope["path"], scope["query_string"], headers.get("authorization"), key
+        )).encode()).hexdigest()
+        record_key = f"idempotency:{scope_digest}"
+        lock_key = f"{record_key}:lock"
+        fingerprint = hashlib.sha256(body).hexdigest()
+        # Released only by its holder, even after the lock expired and was taken by a duplicate
+        lock_token = secrets.token_hex(16)
+
+        deadline = time.monotonic() + settings.IDEMPOTENCY_LOCK_TTL
+        while True:
+            stored = await cache.get(record_key)
+            if stored is not None:
+                await self.replay(json.loads(stored), fingerprint, scope, receive, send)
+                return
+            locked = await cache.add(lock_key, lock_token, settings.IDEMPOTENCY_LOCK_TTL)
+            if locked is None:
+                response = JSONResponse(
+                    {"detail": "Idempotency-Key can not be checked right now"}, status_code=503
+                )
+                await response(scope, receive, send)
+                return
+            if locked:
+                break
+            if time.monotonic() >= deadline:
+                response = JSONResponse(
+                    {"detail": "A request with this Idempotency-Key is in progress"}, status_code=409
+                )
+                await response(scope, receive, send)
+                return
+            await asyncio.sleep(POLL_INTERVAL)
+
+        try:
+            await self.handle(scope, body, receive, send, record_key, fingerprint)
+        finally:
+            await cache.discard(lock_key, lock_token)
+
+    async def handle(
+        self,
+        scope: Scope,
+        body: bytes,
+        receive: Receive,
+        send: Send,
+        record_key: str,
+        fingerprint: str
+    ) -> None:
+        """Run the request with the buffered body and store its response."""
+        body_sent = False
+
+        async def receive_body() -> Message:
+            nonlocal body_sent
+            if body_sent:
+                # The body was read already, so only a disconnect can follow
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        record: Dict[str, Any] = {"fingerprint": fingerprint, "body": ""}
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                record["status"] = message["status"]
+                record["headers"] = [
+                    [name.decode("latin-1"), value.decode("latin-1")] for name, value in message.get("headers", [])
+                ]
+            elif message["type"] == "http.response.body":
+                record["body"] += message.get("body", b"").decode("latin-1")
+            await send(message)
+
+        await self.app(scope, receive_body, send_wrapper)
+        if record.get("status", 500) < 500:
+            await cache.set(record_key, json.dumps(record), settings.IDEMPOTENCY_TTL)
+
+    @staticmethod
+    async def replay(record: Dict[str, Any], fingerprint: str, scope: Scope, receive: Receive, send: Send) -> None:
+        """Send a stored response again, unless the key was used with another body."""
+        if record["fingerprint"] != fingerprint:
+            response = JSONResponse(
+                {"detail": "Idempotency-Key was already used with another request body"}, status_code=422
+            )
+            await response(scope, receive, send)
+            return
+
+        response = Response(record["body"].encode("latin-1"), status_code=record["status"])
+        response.raw_headers = [
+            (name.encode("latin-1"), value.encode("latin-1")) for name, value in record["headers"]
+        ] + [(b"idempotent-replayed", b"true")]
+        await response(scope, receive, send)
@@ -0,0 +1,97 @@
+from typing import Dict, List, Tuple
+
+import jwt
+from fastapi_users.jwt import decode_jwt
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import settings
+from src.db.rate_limit import rate_limiter
+from src.modules.auth.manager import auth_backend, get_jwt_strategy
+
+
+class RateLimitMiddleware:
+    """
+    Limits the requests of each client to the route groups in `RATE_LIMIT_GROUPS`.
+
+    A group is the longest configured path prefix below `API_V1_STR` the
+    path starts with; other paths and CORS preflights are not limited.
+    Clients with a valid JWT are counted per user, others per IP address
+    (run uvicorn with `--proxy-headers` behind a proxy). Responses carry
+    the `RateLimit-*` headers, and requests over the limit get a 429 with
+    `Retry-After` without reaching the app.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.window = settings.RATE_LIMIT_WINDOW
+        # Longest prefixes first, so nested groups win
+        self.groups: List[Tuple[str, int]] = sorted(
+            ((f"{settings.API_V1_STR}{prefix}", limit) for prefix, limit in settings.RATE_LIMIT_GROUPS.items()),
+            key=lambda group: len(group[0]),
+            reverse=True,
+        )
+        # Session tokens of the redis backend are opaque, so their clients are counted by IP
+        self.jwt_strategy = get_jwt_strategy() if auth_backend.name == "jwt" else None
+
+    def match(self, path: str) -> Tuple[str, int] | None:
+        """Find the route group of a path."""
+        for prefix, limit in self.groups:
+            if path.startswith(prefix) and (len(path) == len(prefix) or path[len(prefix)] == "/"):
+                return prefix, limit
+        return None
+
+    def identify(self, scope: Scope) -> str:
+        """Key a client by the user of its JWT, or by its IP address."""
+        if self.jwt_strategy is not None:
+            scheme, _, token = Headers(scope=scope).get("authorization", "").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                try:
+                    data = decode_jwt(
+                        token,
+                        self.jwt_strategy.decode_key,
+                        self.jwt_strategy.token_audience,
+                        algorithms=[self.jwt_strategy.algorithm],
+                    )
+                    if data.get("sub"):
+                        return f"user:{data['sub']}"
+                except jwt.PyJWTError:
+                    pass
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        group = self.match(scope["path"])
+        if group is None:
+            await self.app(scope, receive, send)
+            return
+
+        prefix, limit = group
+        result = await rate_limiter.hit(f"{prefix}:{self.identify(scope)}", limit, self.window)
+        headers: Dict[str, str] = {
+            "RateLimit-Limit": str(limit),
+            "RateLimit-Remaining": str(result.remaining),
+            "RateLimit-Reset": str(result.reset),
+            "RateLimit-Policy": f"{limit};w={self.window}",
+        }
+        if not result.allowed:
+            response = JSONResponse(
+                {"detail": "Too many requests"},
+                status_code=429,
+                headers={**headers, "Retry-After": str(result.reset)},
+            )
+            await response(scope, receive, send)
+            return
+
+        raw_headers = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), *raw_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,14 +1,22 @@
+import asyncio
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from fastapi_async_sqlalchemy import SQLAlchemyMiddleware
 from starlette_csrf import CSRFMiddleware
 
-from src.db.utils import engine_args
+from src.db.session import engine
 from src.api.api_v1.api import api_router
+from src.api.idempotency import IdempotencyMiddleware
+from src.api.rate_limit import RateLimitMiddleware
 from src.core.config import settings
-from src.core.utils import get_sqlalchemy_uri
 from src.core.logger import configure_logger
+from src.core.instrumentation import InstrumentationMiddleware, get_metrics, instrument_engine
+from src.modules.jobs.queue import MemoryJobQueue, job_queue
+from src.modules.jobs.worker import create_worker
+from src.modules.notifications.broker import notification_broker
 from src.utils.dummy_data import create_dummy_data
 
 
@@ -21,36 +29,62 @@ def create_app() -> FastAPI:
         openapi_url=f"{settings.API_V1_STR}/openapi.json",
         docs_url=settings.DOC_URL,
         redoc_url=settings.REDOC_URL,
+        default_response_class=ORJSONResponse if settings.FAST_RESPONSES else JSONResponse,
     )
 
     # Middlewares
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=settings.BACKEND_CORS_ORIGINS,
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
     # app.add_middleware(
     #     CSRFMiddleware,
     #     secret=settings.SECRET,
     # )
     app.add_middleware(
         SQLAlchemyMiddleware,
-        db_url=get_sqlalchemy_uri(),
-        engine_args=engine_args
+        custom_engine=engine
     )
     app.add_middleware(
         SessionMiddleware,
         secret_key=settings.SECRET
     )
+    # Outside of the database session, so replayed responses open none
+    app.add_middleware(IdempotencyMiddleware)
+    if settings.RATE_LIMIT_ENABLED:
+        # Outside of idempotency, so replays count against the limits too
+        app.add_middleware(RateLimitMiddleware)
+    if settings.METRICS_ENABLED:
+        # Wraps the other middlewares as well, so their responses are measured too
+        instrument_engine(engine)
+        app.add_middleware(InstrumentationMiddleware)
+    # Added last, so the responses of the middlewares above carry CORS headers as well
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.BACKEND_CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[
+            "X-Total-Count", "RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset", "RateLimit-Policy"
+        ],
+    )
 
     # Routers
     app.include_router(api_router, prefix=settings.API_V1_STR)
+    if settings.METRICS_ENABLED:
+        app.add_api_route("/metrics", get_metrics, include_in_schema=False)
 
     @app.on_event("startup")
     async def on_startup():
         await create_dummy_data()
+        # Without Redis the jobs are queued in memory, so they are run here
+        if isinstance(job_queue, MemoryJobQueue):
+            app.state.job_worker = create_worker()
+            app.state.job_worker_task = asyncio.create_task(app.state.job_worker.run())
+
+    @app.on_event("shutdown")
+    async def on_shutdown():
+        if getattr(app.state, "job_worker", None):
+            app.state.job_worker.stop()
+            await app.state.job_worker_task
+        await notification_broker.close()
 
     return app
 
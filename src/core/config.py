@@ -1,7 +1,8 @@
 import os
 from pathlib import Path
-from typing import List, Union
+from typing import Dict, List, Literal, Union
 
+from pydantic import PositiveInt, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -33,6 +34,24 @@ class DevSettings(BaseSettings):
     # CORS
     BACKEND_CORS_ORIGINS: List = ["http://localhost:3000"]
 
+    # Responses (orjson encoding, hot read endpoints skip response model validation)
+    FAST_RESPONSES: bool = False
+
+    # Metrics (served on /metrics, with METRICS_TOKEN as bearer token when set)
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: Union[str, None] = None
+
+    # Pagination
+    PAGE_SIZE_DEFAULT: int = 50
+    PAGE_SIZE_MAX: int = 100
+
+    # Pickup locations per book
+    BOOK_LOCATIONS_MAX: int = 20
+
+    # Nearby search radius in meters
+    NEARBY_RADIUS_DEFAULT: int = 5000
+    NEARBY_RADIUS_MAX: int = 100000
+
     # Postgres
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
@@ -40,6 +59,87 @@ class DevSettings(BaseSettings):
     POSTGRES_PORT: str
     POSTGRES_DB: str
 
+    # Database engine
+    DB_ECHO: bool = True
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 30000
+    DB_STATEMENT_CACHE_SIZE: int = 100
+
+    # Bulk import and export
+    BOOK_IMPORT_CHUNK_SIZE: int = 500
+    BOOK_IMPORT_MAX_RECORD_BYTES: int = 64 * 1024
+    BOOK_IMPORT_MAX_ERRORS: int = 100
+    BOOK_EXPORT_CHUNK_SIZE: int = 1000
+
+    # Redis (in-process fallbacks are used when REDIS_HOST is not set)
+    REDIS_HOST: Union[str, None] = None
+    REDIS_PORT: int = 6379
+    REDIS_PASSWORD: Union[str, None] = None
+    REDIS_SESSION_DB: int = 0
+    REDIS_CACHE_DB: int = 1
+    REDIS_JOBS_DB: int = 2
+
+    # Cache
+    CATALOG_CACHE_TTL: int = 300
+    CACHE_MAX_ENTRIES: int = 1024
+    # Approximate totals: planner estimates for tables of at least this many rows,
+    # otherwise exact counts cached for the TTL
+    COUNT_ESTIMATE_MIN_ROWS: int = 10000
+    COUNT_CACHE_TTL: int = 60
+    # Seconds clients may reuse public catalog responses without revalidating
+    HTTP_CACHE_MAX_AGE: int = 60
+    # Top of the most requested books kept in a Redis sorted set, refreshed every TTL seconds
+    POPULAR_BOOKS_CACHE_SIZE: int = 1000
+    POPULAR_BOOKS_CACHE_TTL: int = 60
+
+    # Idempotency-Key replays of POST and PATCH responses
+    IDEMPOTENCY_TTL: int = 24 * 3600
+    # Seconds a duplicate waits for the first request to finish before a 409
+    IDEMPOTENCY_LOCK_TTL: int = 10
+    IDEMPOTENCY_MAX_BODY_BYTES: int = 1024 * 1024
+
+    # Rate limits, a sliding window per user for valid JWTs and per client IP otherwise
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_WINDOW: PositiveInt = 60
+    # Requests per window of each route group, by path prefix below API_V1_STR
+    RATE_LIMIT_GROUPS: Dict[str, PositiveInt] = {
+        "/auth": 20,
+        "/books": 600,
+        "/genres": 600,
+        "/authors": 600,
+        "/users": 300,
+        "/pickup-locations": 300,
+        "/book-requests": 300,
+    }
+    # Clients tracked per process without Redis, least recently seen are dropped first
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+
+    # Background jobs (run by `python -m src.modules.jobs.worker` with Redis, in the app without)
+    JOBS_CONCURRENCY: int = 10
+    JOBS_MAX_ATTEMPTS: int = 5
+    # Seconds before the first retry, doubled on every further attempt
+    JOBS_RETRY_BACKOFF: float = 2.0
+    JOBS_RETRY_BACKOFF_MAX: float = 600.0
+    JOBS_POLL_INTERVAL: float = 1.0
+    JOBS_MAX_DEAD: int = 1000
+
+    # Notification streams (fanned out over Redis pub/sub across processes)
+    NOTIFICATIONS_MAX_CONNECTIONS: int = 10000
+    # Notifications buffered for a slow client before its stream is closed
+    NOTIFICATIONS_MAX_PENDING: int = 100
+    # Seconds between keep-alive comments on idle streams
+    NOTIFICATIONS_KEEPALIVE: float = 15.0
+
+    # Auth ("jwt" for stateless tokens, "redis" for revocable sessions)
+    AUTH_BACKEND: Literal["jwt", "redis"] = "jwt"
+    AUTH_TOKEN_LIFETIME: int = 3600
+    AUTH_USER_CACHE: bool = True
+    AUTH_USER_CACHE_TTL: int = 30
+
     # Environment
     model_config = SettingsConfigDict(
         env_file=os.path.join(BASE_DIR, "envs/.env"),
@@ -67,5 +167,33 @@ class ProdSettings(DevSettings):
     DOC_URL: Union[str, None] = None
     REDOC_URL: Union[str, None] = None
 
+    # Responses
+    FAST_RESPONSES: bool = True
+
+    # Metrics expose routes, traffic and latency, so they are opt-in and need a token
+    METRICS_ENABLED: bool = False
+
+    # Database engine
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    # Connections are recycled well before the server or a proxy drops them,
+    # so the round trip of a ping on every checkout is not needed
+    DB_POOL_PRE_PING: bool = False
+    DB_STATEMENT_TIMEOUT_MS: int = 10000
+    DB_STATEMENT_CACHE_SIZE: int = 500
+
+    @model_validator(mode="after")
+    def check_metrics_token(self) -> "ProdSettings":
+        if self.METRICS_ENABLED and not self.METRICS_TOKEN:
+            raise ValueError("METRICS_TOKEN is required when METRICS_ENABLED is set in production")
+        return self
+
+
+ENVIRONMENTS = {
+    "dev": DevSettings,
+    "test": TestSettings,
+    "prod": ProdSettings,
+}
 
-settings = DevSettings()
+settings = ENVIRONMENTS[os.getenv("ENVIRONMENT", "dev")]()
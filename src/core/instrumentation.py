@@ -0,0 +1,214 @@
+import io
+import time
+import pstats
+import cProfile
+import contextvars
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException, Request, Response
+from fastapi_users.db import SQLAlchemyUserDatabase
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.ext.asyncio.session import AsyncSession
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import settings
+from src.db.session import engine
+from src.models import User
+from src.modules.auth.manager import UserManager, auth_backend
+from src.utils.metrics import Counter, Gauge, Histogram, Registry
+
+# Statements per request
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+# Functions listed in a request profile
+PROFILE_LIMIT = 40
+
+
+@dataclass
+class RequestMetrics:
+    """Work done by the current request, summed up by the SQLAlchemy events and `serialize`."""
+    statements: int = 0
+    db_time: float = 0.0
+    serialization_time: float = 0.0
+
+
+current_request: contextvars.ContextVar[Optional[RequestMetrics]] = contextvars.ContextVar(
+    "current_request", default=None
+)
+
+registry = Registry()
+request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Time to the end of the response.", ("method", "route", "status")
+))
+request_statements = registry.register(Histogram(
+    "http_request_db_statements", "SQL statements per request.", ("method", "route"), STATEMENT_BUCKETS
+))
+request_db_duration = registry.register(Histogram(
+    "http_request_db_duration_seconds", "Time spent executing SQL per request.", ("method", "route")
+))
+request_serialization_duration = registry.register(Histogram(
+    "http_request_serialization_duration_seconds",
+    "Time spent serializing response models per request.",
+    ("method", "route")
+))
+requests_in_progress = registry.register(Gauge(
+    "http_requests_in_progress", "Requests being handled."
+))
+statements_outside_requests = registry.register(Counter(
+    "db_statements_outside_requests", "SQL statements run outside requests, e.g. by background jobs."
+))
+for stat, documentation in (
+    ("size", "Connections the pool keeps open."),
+    ("checked_out", "Connections in use."),
+    ("overflow", "Connections open beyond the pool size."),
+    ("waits", "Checkouts that waited for a connection."),
+    ("timeouts", "Checkouts that timed out."),
+    ("wait_time_total", "Seconds checkouts waited for a connection."),
+):
+    registry.register(Gauge(
+        f"db_pool_{stat}", documentation, callback=lambda stat=stat: engine.pool.stats()[stat]
+    ))
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    metrics = current_request.get()
+    if metrics is None:
+        statements_outside_requests.inc()
+        return
+    metrics.statements += 1
+    metrics.db_time += elapsed
+
+
+def instrument_engine(async_engine: AsyncEngine) -> None:
+    """Count the statements and the SQL time of every request on an engine, once per engine."""
+    if not event.contains(async_engine.sync_engine, "after_cursor_execute", after_cursor_execute):
+        event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(async_engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+
+
+def record_serialization(elapsed: float) -> None:
+    """Add serialization time to the current request."""
+    metrics = current_request.get()
+    if metrics is not None:
+        metrics.serialization_time += elapsed
+
+
+async def is_superuser(scope: Scope) -> bool:
+    """
+    Check if the bearer token of a request belongs to an active superuser.
+
+    :param scope: Request scope.
+    :return: True for active superusers.
+    """
+    authorization = Request(scope).headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    async with AsyncSession(engine) as session:
+        user_manager = UserManager(SQLAlchemyUserDatabase(session, User))
+        user = await auth_backend.get_strategy().read_token(token, user_manager)
+    return user is not None and user.is_active and user.is_superuser
+
+
+def format_profile(profiler: cProfile.Profile, elapsed: float, metrics: RequestMetrics) -> str:
+    """Summarize a request profile, slowest cumulative time first."""
+    stream = io.StringIO()
+    stream.write(
+        f"Request {elapsed * 1000:.1f} ms, {metrics.statements} SQL statements in "
+        f"{metrics.db_time * 1000:.1f} ms, serialization {metrics.serialization_time * 1000:.1f} ms\n"
+    )
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_LIMIT)
+    return stream.getvalue()
+
+
+class InstrumentationMiddleware:
+    """
+    Records latency, SQL statements, SQL time and serialization time per route.
+
+    With `?__profile=1` a superuser gets a cProfile summary of the request
+    instead of its response. The profiler sees the whole event loop, so
+    concurrent requests show up as well; profile on a quiet instance.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if b"__profile" in scope["query_string"] and await self.profile_requested(scope):
+            await self.profile(scope, receive, send)
+            return
+
+        metrics = RequestMetrics()
+        token = current_request.set(metrics)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        requests_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            requests_in_progress.dec()
+            current_request.reset(token)
+            # Templates keep the number of series bounded, unlike raw paths
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            request_duration.observe(time.perf_counter() - started, method, route, str(status))
+            request_statements.observe(metrics.statements, method, route)
+            request_db_duration.observe(metrics.db_time, method, route)
+            request_serialization_duration.observe(metrics.serialization_time, method, route)
+
+    @staticmethod
+    async def profile_requested(scope: Scope) -> bool:
+        query = parse_qs(scope["query_string"].decode())
+        return query.get("__profile") == ["1"] and await is_superuser(scope)
+
+    async def profile(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the request under cProfile and send the profile instead of the response."""
+        metrics = RequestMetrics()
+        token = current_request.set(metrics)
+
+        async def discard(message: Message) -> None:
+            pass
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            profiler.disable()
+            current_request.reset(token)
+
+        response = Response(
+            format_profile(profiler, time.perf_counter() - started, metrics), media_type="text/plain"
+        )
+        await response(scope, receive, send)
+
+
+async def get_metrics(request: Request) -> Response:
+    """
+    Metrics of this process in the Prometheus text format.
+
+    With `METRICS_TOKEN` set, scrapers have to send it as a bearer token.
+    """
+    if settings.METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {settings.METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return Response(registry.render(), media_type="text/plain; version=0.0.4")
@@ -13,6 +13,19 @@ def get_sqlalchemy_uri() -> str:
     return f"postgresql+asyncpg://{user}:{password}@{host}:{port}/{db_name}"
 
 
+def get_redis_uri(db: int) -> str:
+    """
+    Get the URI for a Redis database.
+
+    :param db: Redis database number.
+    :return: The URI for the Redis database.
+    """
+    host, port = settings.REDIS_HOST, settings.REDIS_PORT
+    password = settings.REDIS_PASSWORD
+    auth = f":{password}@" if password else ""
+    return f"redis://{auth}{host}:{port}/{db}"
+
+
 def get_api_url() -> str:
     """
     Get the URL for the API.
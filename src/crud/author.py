@@ -1,10 +1,11 @@
+from src.core.config import settings
 from src.crud.base import CRUDBase
 from src.models.author import Author
 from src.schemas.author import AuthorCreate, AuthorUpdate
 
 
 class CRUDAuthor(CRUDBase[Author, AuthorCreate, AuthorUpdate]):
-    pass
+    cache_ttl = settings.CATALOG_CACHE_TTL
 
 
 author = CRUDAuthor(Author)
@@ -1,14 +1,25 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import json
+import uuid
+import hashlib
+from enum import Enum
+from datetime import datetime
+from typing import Any, Dict, Generic, Iterable, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 
 from fastapi import HTTPException, status
 from pydantic import BaseModel
 from asyncpg.exceptions import ForeignKeyViolationError
 from sqlalchemy import exc, func
-from sqlalchemy import select
+from sqlalchemy import select, insert, text, Select, TypeDecorator
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from fastapi_async_sqlalchemy import db
+from sqlalchemy.orm.interfaces import ORMOption
 from sqlalchemy.ext.asyncio.session import AsyncSession
 
+from src.core.config import settings
+from src.db.cache import cache
 from src.models.base import Base
+from src.crud.utils import encode_cursor, decode_cursor, is_cursor_id
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
@@ -16,6 +27,11 @@ UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # Seconds to keep `get_cached`/`get_page_cached` results, None disables caching
+    cache_ttl: int | None = None
+    # Columns left out of cached values, e.g. secrets, they are loaded on access once attached
+    cache_exclude: Tuple[str, ...] = ()
+
     def __init__(self, model: Type[ModelType]) -> None:
         """
         CRUD object with default methods to Create, Read, Update, Delete (CRUD).
@@ -29,24 +45,161 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """Helper function to get the database session."""
         return self.db
 
-    async def get(self, _id: Any, db_session: AsyncSession | None = None) -> Optional[ModelType]:
+    def _cache_key(self, *parts: Any) -> str:
+        """Build a cache key in the namespace of the model table."""
+        return ":".join(["crud", self.model.__tablename__, *map(str, parts)])
+
+    def _dump(self, obj: ModelType) -> Dict[str, Any]:
+        """Dump the column values of an object into JSON compatible types."""
+        values = {}
+        for column in self.model.__table__.columns:
+            if column.key in self.cache_exclude:
+                continue
+            value = getattr(obj, column.key)
+            if isinstance(value, Enum):
+                value = value.name
+            elif isinstance(value, (datetime, uuid.UUID)):
+                value = str(value)
+            values[column.key] = value
+        return values
+
+    def _load(self, values: Dict[str, Any]) -> ModelType:
+        """Build a detached, read-only object from values created by `_dump`."""
+        for column in self.model.__table__.columns:
+            value = values.get(column.key)
+            if value is None:
+                continue
+            try:
+                python_type = getattr(column.type, "enum_class", None) or column.type.python_type
+            except NotImplementedError:
+                # Type decorators (e.g. GUID) convert stored values themselves
+                if isinstance(column.type, TypeDecorator):
+                    values[column.key] = column.type.process_result_value(value, postgresql.dialect())
+                continue
+            if issubclass(python_type, Enum):
+                values[column.key] = python_type[value]
+            elif python_type is datetime:
+                values[column.key] = datetime.fromisoformat(value)
+            elif python_type is uuid.UUID:
+                values[column.key] = uuid.UUID(value)
+        return self.model(**values)
+
+    def _integrity_error(self, error: exc.IntegrityError) -> HTTPException:
+        """
+        Map an integrity error to an HTTP error.
+
+        A foreign key violation means the referenced object does not exist,
+        so the write itself validates references without extra queries.
+
+        :param error: Integrity error raised on commit
+        :return: 404 for a missing referenced object, 409 otherwise
+        """
+        cause = error.orig.__cause__
+        if isinstance(cause, ForeignKeyViolationError):
+            for constraint in self.model.__table__.foreign_key_constraints:
+                if constraint.name != cause.constraint_name:
+                    continue
+                for mapper in Base.registry.mappers:
+                    if mapper.local_table is constraint.referred_table:
+                        return HTTPException(
+                            status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"{mapper.class_.__name__} not found",
+                        )
+
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Resource already exists",
+        )
+
+    async def invalidate_cache(self, _id: Any = None) -> None:
+        """
+        Drop cached pages and, if given, the cached object.
+
+        :param _id: Object id
+        """
+        if self.cache_ttl is None:
+            return
+        keys = [self._cache_key(_id)] if _id is not None else []
+        await cache.invalidate(*keys, tag=self._cache_key("pages"))
+
+    async def _reload(
+        self,
+        obj: ModelType,
+        options: Sequence[ORMOption] | None,
+        db_session: AsyncSession
+    ) -> ModelType:
+        """
+        Refresh an object after a write, loading the requested relationships.
+
+        :param obj: Database object
+        :param options: Loader options of the response schema
+        :param db_session: Database session
+        :return: Refreshed object
+        """
+        if not options:
+            await db_session.refresh(obj)
+            return obj
+
+        # Expiring first lets the eager loaders fill the object in one pass
+        obj_id = obj.id
+        db_session.expire(obj)
+        query = select(self.model).where(self.model.id == obj_id).options(*options)
+        response = await db_session.execute(query)
+        return response.scalar_one()
+
+    async def get(
+        self,
+        _id: Any,
+        options: Sequence[ORMOption] | None = None,
+        for_update: bool = False,
+        db_session: AsyncSession | None = None
+    ) -> Optional[ModelType]:
         """
         Get a single object from the database.
 
         :param _id: Object id
+        :param options: Loader options for the relationships to load
+        :param for_update: Lock the row until the transaction ends
         :param db_session: Database session
         :return: Single object
         """
         db_session = db_session or self.db.session
-        query = select(self.model).where(self.model.id == _id)
+        query = select(self.model).where(self.model.id == _id).options(*options or ())
+        if for_update:
+            query = query.with_for_update(of=self.model)
         response = await db_session.execute(query)
         return response.scalar_one_or_none()
 
+    async def get_cached(self, _id: Any, db_session: AsyncSession | None = None) -> Optional[ModelType]:
+        """
+        Get a single object, served from the cache when possible.
+
+        The returned object is detached from the session and must not be
+        passed to `update` or `remove`.
+
+        :param _id: Object id
+        :param db_session: Database session used on a cache miss
+        :return: Single object
+        """
+        if self.cache_ttl is None:
+            return await self.get(_id, db_session=db_session)
+
+        key = self._cache_key(_id)
+        cached = await cache.get(key)
+        if cached is not None:
+            return self._load(json.loads(cached))
+
+        obj = await self.get(_id, db_session=db_session)
+        if obj is not None:
+            await cache.set(key, json.dumps(self._dump(obj)), self.cache_ttl)
+        return obj
+
     async def get_multi(
         self,
         *,
         skip: int = 0,
         limit: int = 100,
+        options: Sequence[ORMOption] | None = None,
         db_session: AsyncSession | None = None
     ) -> List[ModelType]:
         """
@@ -54,39 +207,165 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
         :param skip: The number of objects to skip
         :param limit: Object limit
+        :param options: Loader options for the relationships to load
         :param db_session: Database session
         :return: List of objects
         """
         db_session = db_session or self.db.session
-        query = select(self.model).offset(skip).limit(limit).order_by(self.model.id)
+        query = (
+            select(self.model)
+            .offset(skip)
+            .limit(limit)
+            .order_by(self.model.id)
+            .options(*options or ())
+        )
         response = await db_session.execute(query)
         return response.scalars().all()
 
+    async def get_page(
+        self,
+        *,
+        cursor: str | None = None,
+        limit: int = 50,
+        query: Select | None = None,
+        options: Sequence[ORMOption] | None = None,
+        db_session: AsyncSession | None = None
+    ) -> Tuple[List[ModelType], str | None]:
+        """
+        Get a page of objects using keyset pagination on the primary key.
+
+        Unlike `get_multi`, the cost of a page does not grow with its position
+        because rows are located with `id > last_id` instead of an offset.
+
+        :param cursor: Cursor returned with the previous page
+        :param limit: Page size
+        :param query: Base select query with filters applied
+        :param options: Loader options for the relationships to load
+        :param db_session: Database session
+        :return: List of objects and cursor of the next page
+        """
+        db_session = db_session or self.db.session
+        query = query if query is not None else select(self.model)
+        query = query.options(*options or ())
+
+        if cursor:
+            last_id = decode_cursor(cursor).get("id")
+            if not is_cursor_id(last_id):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor",
+                )
+            query = query.where(self.model.id > last_id)
+
+        # Fetch one extra row to know whether a next page exists
+        query = query.order_by(self.model.id).limit(limit + 1)
+        response = await db_session.execute(query)
+        objs = response.scalars().all()
+
+        next_cursor = None
+        if len(objs) > limit:
+            objs = objs[:limit]
+            next_cursor = encode_cursor({"id": objs[-1].id})
+
+        return objs, next_cursor
+
+    async def get_page_cached(
+        self,
+        *,
+        cursor: str | None = None,
+        limit: int = 50
+    ) -> Tuple[List[ModelType], str | None]:
+        """
+        Get a page of objects, the first page of the default size served from the cache.
+
+        Cursors and limits come from clients, so other pages are not cached:
+        each would be another entry any client could add. The returned
+        objects are detached from the session.
+
+        :param cursor: Cursor returned with the previous page
+        :param limit: Page size
+        :return: List of objects and cursor of the next page
+        """
+        if self.cache_ttl is None or cursor or limit != settings.PAGE_SIZE_DEFAULT:
+            return await self.get_page(cursor=cursor, limit=limit)
+
+        key = self._cache_key("pages", "first")
+        cached = await cache.get(key)
+        if cached is not None:
+            page = json.loads(cached)
+            return [self._load(values) for values in page["items"]], page["next_cursor"]
+
+        objs, next_cursor = await self.get_page(cursor=cursor, limit=limit)
+        page = {"items": [self._dump(obj) for obj in objs], "next_cursor": next_cursor}
+        await cache.set(key, json.dumps(page), self.cache_ttl, tag=self._cache_key("pages"))
+        return objs, next_cursor
+
     async def get_count(
-            self, db_session: AsyncSession | None = None
-    ) -> ModelType | None:
+        self,
+        query: Select | None = None,
+        approximate: bool = False,
+        db_session: AsyncSession | None = None
+    ) -> int:
         """
-        Get the total number of objects in the database.
+        Get the number of objects, optionally matching a query.
+
+        The filters and joins of the query are kept and only its columns
+        are replaced, so Postgres counts through the same indexes a page
+        query would use. Approximate totals of a whole table are read from
+        the planner statistics in `pg_class` once the table has at least
+        `COUNT_ESTIMATE_MIN_ROWS` rows; other approximate totals are exact
+        counts cached for `COUNT_CACHE_TTL` seconds.
 
+        :param query: Select query with filters applied, all objects when None
+        :param approximate: Accept an estimated or slightly outdated total
         :param db_session: Database session
-        :return: Total number of objects
+        :return: Number of objects
         """
         db_session = db_session or self.db.session
-        response = await db_session.execute(
-            select(func.count()).select_from(select(self.model).subquery())
-        )
-        return response.scalar_one()
+
+        if approximate and query is None and db_session.bind.dialect.name == "postgresql":
+            # Tables never vacuumed or analyzed have a negative estimate
+            response = await db_session.execute(
+                text("SELECT CAST(reltuples AS bigint) FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+                {"table": self.model.__tablename__},
+            )
+            estimate = response.scalar_one()
+            if estimate >= settings.COUNT_ESTIMATE_MIN_ROWS:
+                return estimate
+
+        if query is None:
+            query = select(func.count()).select_from(self.model)
+        else:
+            query = query.with_only_columns(func.count()).order_by(None)
+
+        key = None
+        if approximate:
+            compiled = query.compile(dialect=db_session.bind.dialect)
+            digest = hashlib.sha1(repr((str(compiled), sorted(compiled.params.items()))).encode()).hexdigest()
+            key = self._cache_key("count", digest)
+            cached = await cache.get(key)
+            if cached is not None:
+                return int(cached)
+
+        response = await db_session.execute(query)
+        count = response.scalar_one()
+        if key is not None:
+            # Dropped with the cached pages when the model invalidates them
+            await cache.set(key, str(count), settings.COUNT_CACHE_TTL, tag=self._cache_key("pages"))
+        return count
 
     async def create(
         self,
         *,
         obj_in: CreateSchemaType,
+        options: Sequence[ORMOption] | None = None,
         db_session: AsyncSession | None = None
     ) -> ModelType:
         """
         Create a new object.
 
         :param obj_in: Object to create
+        :param options: Loader options for the relationships to return
         :param db_session: Database session
         :return: Created object
         """
@@ -96,21 +375,90 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         try:
             db_session.add(db_obj)
             await db_session.commit()
-        except exc.IntegrityError:
+        except exc.IntegrityError as e:
             await db_session.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="Resource already exists",
+            raise self._integrity_error(e)
+        await self.invalidate_cache()
+
+        return await self._reload(db_obj, options, db_session)
+
+    async def create_many(
+        self,
+        *,
+        objs_in: List[CreateSchemaType],
+        db_session: AsyncSession | None = None
+    ) -> List[int]:
+        """
+        Create objects with batched multi-row INSERT ... RETURNING statements.
+
+        Objects are not loaded into the session; the caller commits.
+
+        :param objs_in: Objects to create
+        :param db_session: Database session
+        :return: Ids of the created objects, in input order
+        """
+        db_session = db_session or self.db.session
+        if not objs_in:
+            return []
+
+        response = await db_session.execute(
+            insert(self.model).returning(self.model.id, sort_by_parameter_order=True),
+            [obj_in.model_dump() for obj_in in objs_in],
+        )
+        return list(response.scalars().all())
+
+    async def get_ids_by_field(
+        self,
+        field: str,
+        values: Iterable[Any],
+        create_missing: bool = False,
+        db_session: AsyncSession | None = None
+    ) -> Dict[Any, int]:
+        """
+        Resolve values of a unique field to object ids in a single query.
+
+        :param field: Unique field name
+        :param values: Field values to resolve
+        :param create_missing: Create objects for values that do not exist,
+            the caller commits and invalidates the cache
+        :param db_session: Database session
+        :return: Mapping of found (or created) values to ids
+        """
+        db_session = db_session or self.db.session
+        values = set(values)
+        if not values:
+            return {}
+
+        column = getattr(self.model, field)
+        response = await db_session.execute(
+            select(column, self.model.id).where(column.in_(values))
+        )
+        ids = dict(response.all())
+
+        missing = values - ids.keys()
+        if create_missing and missing:
+            # Rows created concurrently are skipped here and picked up below
+            response = await db_session.execute(
+                pg_insert(self.model)
+                .values([{field: value} for value in missing])
+                .on_conflict_do_nothing()
+                .returning(column, self.model.id)
             )
-        await db_session.refresh(db_obj)
+            ids.update(response.all())
+            if missing - ids.keys():
+                response = await db_session.execute(
+                    select(column, self.model.id).where(column.in_(missing - ids.keys()))
+                )
+                ids.update(response.all())
 
-        return db_obj
+        return ids
 
     async def update(
         self,
         *,
         obj_current: ModelType,
         obj_new: Union[UpdateSchemaType, Dict[str, Any]],
+        options: Sequence[ORMOption] | None = None,
         db_session: AsyncSession | None = None
     ) -> ModelType:
         """
@@ -118,6 +466,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
         :param obj_current: Current database object
         :param obj_new: Updated object
+        :param options: Loader options for the relationships to return
         :param db_session: Database session
         :return: Updated Object
         """
@@ -135,15 +484,12 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         try:
             db_session.add(obj_current)
             await db_session.commit()
-        except exc.IntegrityError:
+        except exc.IntegrityError as e:
             await db_session.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="Resource already exists",
-            )
-        await db_session.refresh(obj_current)
+            raise self._integrity_error(e)
+        await self.invalidate_cache(obj_current.id)
 
-        return obj_current
+        return await self._reload(obj_current, options, db_session)
 
     async def remove(self, *, _id: int, db_session: AsyncSession | None = None) -> ModelType:
         """
@@ -159,5 +505,6 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj = response.scalar_one()
         await db_session.delete(obj)
         await db_session.commit()
+        await self.invalidate_cache(_id)
 
         return obj
@@ -1,44 +1,577 @@
-from typing import List
+from datetime import datetime
+from typing import AsyncIterator, List, Sequence, Tuple
 
-from sqlalchemy import select
+from fastapi import HTTPException, status
+from sqlalchemy import select, union, update, Select, Row, func, or_, and_, tuple_
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.interfaces import ORMOption
 from sqlalchemy.ext.asyncio.session import AsyncSession
 
+from src.core.config import settings
 from src.crud.base import CRUDBase
-from src.models import Book, Author, Genre
+from src.crud.utils import encode_cursor, decode_cursor, is_cursor_id, is_cursor_number
+from src.db.ranking import popular_books
+from src.models import Book, Author, Genre, BookLocation, BookRequest
+from src.models.book import BookRequestStatus
 from src.schemas.book import BookCreate, BookUpdate
+from src.utils.geo import EARTH_RADIUS, KDTree, bounding_box
+from src.utils.search import InvertedIndex
+
+
+# Relationships serialized by BookRead
+book_read_options = (
+    joinedload(Book.author),
+    joinedload(Book.genre),
+    selectinload(Book.locations),
+)
+
+# Weights of the fields in the in-memory search index, mirroring the tsvector weights
+SEARCH_WEIGHTS = {"name": 1.0, "author": 0.8, "description": 0.4}
 
 
 class CRUDBook(CRUDBase[Book, BookCreate, BookUpdate]):
+    def filter_query(self, genre: str, author: str, condition: str) -> Select:
+        """
+        Build a select query for books filtered by params.
+
+        :param genre: Genre name.
+        :param author: Author name.
+        :param condition: Book condition.
+        :return: Select query.
+        """
+        query = select(Book)
+
+        if genre:
+            query = query.join(Genre).where(Genre.name == genre)
+        if author:
+            query = query.join(Author).where(Author.full_name == author)
+        if condition:
+            query = query.where(Book.condition == condition)
+
+        return query
+
     async def filter_by_params(
         self,
         genre: str,
         author: str,
         condition: str,
+        cursor: str | None = None,
+        limit: int = 50,
+        options: Sequence[ORMOption] | None = None,
         db_session: AsyncSession | None = None
-    ) -> List[Book]:
+    ) -> Tuple[List[Book], str | None]:
         """
-        Get all books filtered by params.
+        Get a page of books filtered by params.
 
         :param genre: Genre name.
         :param author: Author name.
         :param condition: Book condition.
+        :param cursor: Cursor of the page.
+        :param limit: Page size.
+        :param options: Loader options for the relationships to load.
         :param db_session: Database session.
-        :return: List of book objects.
+        :return: List of book objects and cursor of the next page.
         """
-        db_session = db_session or self.get_db().session
+        return await self.get_page(
+            cursor=cursor,
+            limit=limit,
+            query=self.filter_query(genre, author, condition),
+            options=options,
+            db_session=db_session,
+        )
 
-        query = select(Book)
+    async def count_by_params(
+        self,
+        genre: str,
+        author: str,
+        condition: str,
+        approximate: bool = False,
+        db_session: AsyncSession | None = None
+    ) -> int:
+        """
+        Get the number of books filtered by params.
+
+        :param genre: Genre name.
+        :param author: Author name.
+        :param condition: Book condition.
+        :param approximate: Accept an estimated or slightly outdated total.
+        :param db_session: Database session.
+        :return: Number of books.
+        """
+        # Unfiltered totals can be read from the table statistics
+        query = self.filter_query(genre, author, condition) if genre or author or condition else None
+        return await self.get_count(query=query, approximate=approximate, db_session=db_session)
+
+    @staticmethod
+    def _search_cursor(
+        cursor: str | None,
+        key: str = "rank",
+        types: Tuple[type, ...] = (int, float)
+    ) -> Tuple[float, int] | None:
+        """
+        Decode a search cursor into the rank and id of the last returned book.
+
+        :param cursor: Cursor of the page.
+        :param key: Name of the rank in the cursor, e.g. `distance`.
+        :param types: Accepted types of the rank, e.g. only `int` for counters.
+        :return: Rank and id / None for the first page.
+        """
+        if not cursor:
+            return None
+
+        values = decode_cursor(cursor)
+        rank, last_id = values.get(key), values.get("id")
+        if not is_cursor_number(rank, types) or not is_cursor_id(last_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            )
+
+        return rank, last_id
+
+    async def _search_in_memory(
+        self,
+        q: str,
+        last: Tuple[float, int] | None,
+        limit: int,
+        options: Sequence[ORMOption] | None,
+        db_session: AsyncSession
+    ) -> Tuple[List[Book], str | None]:
+        """
+        Search books with an in-memory inverted index built on every call.
+
+        Only meant for databases without tsvector and pg_trgm support.
+        """
+        response = await db_session.execute(
+            select(Book.id, Book.name, Book.description, Author.full_name)
+            .outerjoin(Author, Book.author_id == Author.id)
+        )
+        index = InvertedIndex()
+        for book_id, name, description, author in response:
+            index.add(book_id, [
+                (name, SEARCH_WEIGHTS["name"]),
+                (author, SEARCH_WEIGHTS["author"]),
+                (description, SEARCH_WEIGHTS["description"]),
+            ])
+
+        results = index.search(q)
+        if last:
+            results = [
+                (book_id, rank) for book_id, rank in results
+                if rank < last[0] or (rank == last[0] and book_id > last[1])
+            ]
+        results = results[:limit + 1]
+
+        response = await db_session.execute(
+            select(Book).where(Book.id.in_([book_id for book_id, _ in results])).options(*options or ())
+        )
+        books = {obj.id: obj for obj in response.scalars()}
+        rows = [(books[book_id], rank) for book_id, rank in results]
+        return self._search_page(rows, limit)
+
+    @staticmethod
+    def _search_page(
+        rows: List[Tuple[Book, float]],
+        limit: int,
+        key: str = "rank"
+    ) -> Tuple[List[Book], str | None]:
+        """Cut ranked rows fetched with one extra row into a page and its next cursor."""
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            obj, rank = rows[-1]
+            next_cursor = encode_cursor({key: rank, "id": obj.id})
+
+        return [obj for obj, _ in rows], next_cursor
+
+    async def stream_export(
+        self,
+        genre: str,
+        author: str,
+        condition: str,
+        updated_since: datetime | None = None,
+        db_session: AsyncSession | None = None
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Stream flat book rows filtered by params, in chunks.
+
+        Rows are fetched through a server-side cursor, `BOOK_EXPORT_CHUNK_SIZE`
+        at a time, so memory does not grow with the size of the catalog.
+        Rows are ordered by id, or by `(updated_at, id)` when `updated_since`
+        is given, so the last `updated_at` can start the next incremental
+        export.
+
+        :param genre: Genre name.
+        :param author: Author name.
+        :param condition: Book condition.
+        :param updated_since: Only books updated at or after this naive UTC time.
+        :param db_session: Database session.
+        :return: Chunks of rows.
+        """
+        db_session = db_session or self.db.session
 
+        query = (
+            select(
+                Book.id,
+                Book.name,
+                Book.description,
+                Book.condition,
+                Book.page_count,
+                Author.full_name.label("author"),
+                Genre.name.label("genre"),
+                Book.owner_id,
+                Book.updated_at,
+            )
+            .outerjoin(Author, Book.author_id == Author.id)
+            .outerjoin(Genre, Book.genre_id == Genre.id)
+        )
         if genre:
-            query = query.join(Genre).where(Genre.name == genre)
+            query = query.where(Genre.name == genre)
         if author:
-            query = query.join(Author).where(Author.full_name == author)
+            query = query.where(Author.full_name == author)
         if condition:
             query = query.where(Book.condition == condition)
+        if updated_since:
+            query = query.where(Book.updated_at >= updated_since).order_by(Book.updated_at, Book.id)
+        else:
+            query = query.order_by(Book.id)
+
+        response = await db_session.stream(
+            query.execution_options(yield_per=settings.BOOK_EXPORT_CHUNK_SIZE)
+        )
+        async for rows in response.partitions():
+            yield rows
+
+    async def search(
+        self,
+        q: str,
+        cursor: str | None = None,
+        limit: int = 50,
+        options: Sequence[ORMOption] | None = None,
+        db_session: AsyncSession | None = None
+    ) -> Tuple[List[Book], str | None]:
+        """
+        Get a page of books matching a search query, best match first.
+
+        Name and description are matched with full-text search, name and
+        author with trigram word similarity, so prefixes and typos match too.
 
+        :param q: Search query.
+        :param cursor: Cursor of the page.
+        :param limit: Page size.
+        :param options: Loader options for the relationships to load.
+        :param db_session: Database session.
+        :return: List of book objects and cursor of the next page.
+        """
+        db_session = db_session or self.db.session
+        last = self._search_cursor(cursor)
+
+        if db_session.bind.dialect.name != "postgresql":
+            return await self._search_in_memory(q, last, limit, options, db_session)
+
+        ts_query = func.websearch_to_tsquery("english", q)
+        rank = (
+            func.ts_rank(Book.search_vector, ts_query)
+            + func.word_similarity(q, Book.name)
+            + func.coalesce(func.word_similarity(q, Author.full_name), 0)
+        )
+        # One branch per index (full-text, trigram on names, trigram on authors), since an OR
+        # across the author join can use none of them and scans every book
+        matches = union(
+            select(Book.id).where(Book.search_vector.op("@@")(ts_query)),
+            select(Book.id).where(Book.name.op("%>")(q)),
+            select(Book.id).join(Author, Book.author_id == Author.id).where(Author.full_name.op("%>")(q)),
+        ).subquery()
+        # Rank matching books by id first so the full rows are loaded for one page only
+        ranked = (
+            select(Book.id, rank.label("rank"))
+            .join(matches, matches.c.id == Book.id)
+            .outerjoin(Author, Book.author_id == Author.id)
+            .subquery()
+        )
+
+        query = select(Book, ranked.c.rank).join(ranked, ranked.c.id == Book.id)
+        if last:
+            query = query.where(or_(
+                ranked.c.rank < last[0],
+                and_(ranked.c.rank == last[0], Book.id > last[1]),
+            ))
+        query = (
+            query
+            .options(*options or ())
+            .order_by(ranked.c.rank.desc(), Book.id)
+            .limit(limit + 1)
+        )
         response = await db_session.execute(query)
+        return self._search_page(response.all(), limit)
 
-        return response.scalars().all()
+    async def popular(
+        self,
+        cursor: str | None = None,
+        limit: int = 50,
+        options: Sequence[ORMOption] | None = None,
+        db_session: AsyncSession | None = None
+    ) -> Tuple[List[Book], str | None]:
+        """
+        Get a page of books with pending requests, most requested first.
+
+        Pages are ranked on the `(pending_count, id)` index. With Redis the
+        top `POPULAR_BOOKS_CACHE_SIZE` ranks are cached in a sorted set and
+        only the books of the page are loaded by id. New requests update the
+        cached top right after their commit, so its order may briefly lag
+        the counters under concurrent writes, and is refreshed from the
+        index every `POPULAR_BOOKS_CACHE_TTL` seconds.
+
+        :param cursor: Cursor of the page.
+        :param limit: Page size.
+        :param options: Loader options for the relationships to load.
+        :param db_session: Database session.
+        :return: List of book objects and cursor of the next page.
+        """
+        db_session = db_session or self.db.session
+        last = self._search_cursor(cursor, key="pending", types=(int,))
+
+        if popular_books is not None and limit < popular_books.size:
+            entries = await popular_books.page(last, limit + 1)
+            if entries is None and last is None:
+                response = await db_session.execute(
+                    select(Book.id, Book.pending_count)
+                    .where(Book.pending_count > 0)
+                    .order_by(Book.pending_count.desc(), Book.id.desc())
+                    .limit(popular_books.size)
+                )
+                top = [tuple(row) for row in response]
+                await popular_books.fill(top)
+                entries = top[:limit + 1]
+            if entries is not None:
+                books = {obj.id: obj for obj in await db_session.scalars(
+                    select(Book).where(Book.id.in_([_id for _id, _ in entries])).options(*options or ())
+                )}
+                deleted = [_id for _id, _ in entries if _id not in books]
+                if not deleted:
+                    return self._search_page([(books[_id], count) for _id, count in entries], limit, key="pending")
+                # Deleted before their removal from the cached top, so the page is read from the index
+                for _id in deleted:
+                    await popular_books.remove(_id)
+
+        query = select(Book, Book.pending_count).where(Book.pending_count > 0)
+        if last:
+            # A row comparison lets the page start with an index range scan
+            query = query.where(tuple_(Book.pending_count, Book.id) < last)
+        query = (
+            query
+            .options(*options or ())
+            .order_by(Book.pending_count.desc(), Book.id.desc())
+            .limit(limit + 1)
+        )
+        response = await db_session.execute(query)
+        return self._search_page(response.all(), limit, key="pending")
+
+    async def remove(self, *, _id: int, db_session: AsyncSession | None = None) -> Book:
+        book = await super().remove(_id=_id, db_session=db_session)
+        if popular_books is not None:
+            await popular_books.remove(_id)
+        return book
+
+    async def recount_requests(
+        self,
+        first_id: int,
+        last_id: int,
+        db_session: AsyncSession | None = None
+    ) -> int:
+        """
+        Recompute the request counters of a range of books from their requests.
+
+        Only books whose counters are off are written, so their `updated_at`
+        changes and cached responses are revalidated. The caller commits.
+
+        :param first_id: First book id of the range.
+        :param last_id: Last book id of the range.
+        :param db_session: Database session.
+        :return: Number of repaired books.
+        """
+        db_session = db_session or self.db.session
+
+        counts = (
+            select(
+                BookRequest.book_id,
+                func.count().label("requests"),
+                func.count().filter(BookRequest.status == BookRequestStatus.PENDING).label("pending"),
+            )
+            .where(BookRequest.book_id.between(first_id, last_id))
+            .group_by(BookRequest.book_id)
+            .subquery()
+        )
+        requests = func.coalesce(counts.c.requests, 0)
+        pending = func.coalesce(counts.c.pending, 0)
+        stale = (
+            select(Book.id, requests.label("requests"), pending.label("pending"))
+            .outerjoin(counts, counts.c.book_id == Book.id)
+            .where(
+                Book.id.between(first_id, last_id),
+                or_(Book.request_count != requests, Book.pending_count != pending),
+            )
+            .subquery()
+        )
+        response = await db_session.execute(
+            update(Book)
+            .where(Book.id == stale.c.id)
+            .values(request_count=stale.c.requests, pending_count=stale.c.pending)
+            .execution_options(synchronize_session=False)
+        )
+        return response.rowcount
+
+    @staticmethod
+    def _nearby_page(
+        rows: List[Tuple[Book, BookLocation, float]],
+        limit: int
+    ) -> Tuple[List[Tuple[Book, BookLocation, float]], str | None]:
+        """Cut nearby rows fetched with one extra row into a page and its next cursor."""
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            obj, _, distance = rows[-1]
+            next_cursor = encode_cursor({"distance": distance, "id": obj.id})
+
+        return rows, next_cursor
+
+    async def _nearby_in_memory(
+        self,
+        lat: float,
+        lon: float,
+        radius: float,
+        query: Select,
+        last: Tuple[float, int] | None,
+        limit: int,
+        options: Sequence[ORMOption] | None,
+        db_session: AsyncSession
+    ) -> Tuple[List[Tuple[Book, BookLocation, float]], str | None]:
+        """
+        Find nearby books with an in-memory KD-tree built on every call.
+
+        Only meant for databases without the trigonometric functions.
+        """
+        response = await db_session.execute(
+            select(BookLocation.id, BookLocation.book_id, BookLocation.latitude, BookLocation.longitude)
+            .where(BookLocation.latitude.is_not(None), BookLocation.longitude.is_not(None))
+        )
+        book_ids = {}
+        points = []
+        for location_id, book_id, latitude, longitude in response:
+            book_ids[location_id] = book_id
+            points.append((location_id, latitude, longitude))
+
+        # Nearest location of every book
+        nearest = {}
+        for location_id, distance in KDTree(points).within(lat, lon, radius):
+            nearest.setdefault(book_ids[location_id], (location_id, distance))
+
+        matching = set(await db_session.scalars(
+            query.with_only_columns(Book.id).where(Book.id.in_(list(nearest)))
+        ))
+        results = sorted(
+            (distance, book_id, location_id)
+            for book_id, (location_id, distance) in nearest.items() if book_id in matching
+        )
+        if last:
+            results = [result for result in results if result[:2] > last]
+        results = results[:limit + 1]
+
+        books = {obj.id: obj for obj in await db_session.scalars(
+            select(Book).where(Book.id.in_([book_id for _, book_id, _ in results])).options(*options or ())
+        )}
+        locations = {obj.id: obj for obj in await db_session.scalars(
+            select(BookLocation).where(BookLocation.id.in_([location_id for *_, location_id in results]))
+        )}
+        rows = [
+            (books[book_id], locations[location_id], distance)
+            for distance, book_id, location_id in results
+        ]
+        return self._nearby_page(rows, limit)
+
+    async def nearby(
+        self,
+        lat: float,
+        lon: float,
+        radius: float,
+        genre: str,
+        author: str,
+        condition: str,
+        cursor: str | None = None,
+        limit: int = 50,
+        options: Sequence[ORMOption] | None = None,
+        db_session: AsyncSession | None = None
+    ) -> Tuple[List[Tuple[Book, BookLocation, float]], str | None]:
+        """
+        Get a page of books with a pickup location within a radius, nearest first.
+
+        Locations are prefiltered with a bounding box on the coordinate index
+        and their great-circle distance is computed with the haversine formula.
+        Every book is returned once, with its nearest location.
+
+        :param lat: Latitude in degrees.
+        :param lon: Longitude in degrees.
+        :param radius: Radius in meters.
+        :param genre: Genre name.
+        :param author: Author name.
+        :param condition: Book condition.
+        :param cursor: Cursor of the page.
+        :param limit: Page size.
+        :param options: Loader options for the relationships to load.
+        :param db_session: Database session.
+        :return: List of books with their nearest location and its distance in meters,
+            and cursor of the next page.
+        """
+        db_session = db_session or self.db.session
+        last = self._search_cursor(cursor, key="distance")
+        query = self.filter_query(genre, author, condition)
+
+        if db_session.bind.dialect.name != "postgresql":
+            return await self._nearby_in_memory(lat, lon, radius, query, last, limit, options, db_session)
+
+        min_lat, max_lat, lon_ranges = bounding_box(lat, lon, radius)
+        a = (
+            func.power(func.sin(func.radians(BookLocation.latitude - lat) / 2), 2)
+            + func.cos(func.radians(lat)) * func.cos(func.radians(BookLocation.latitude))
+            * func.power(func.sin(func.radians(BookLocation.longitude - lon) / 2), 2)
+        )
+        distance = 2 * EARTH_RADIUS * func.asin(func.sqrt(func.least(a, 1.0)))
+        # Nearest location within the radius of every book
+        nearest = (
+            select(
+                BookLocation.book_id,
+                BookLocation.id.label("location_id"),
+                distance.label("distance"),
+            )
+            .where(
+                BookLocation.latitude.between(min_lat, max_lat),
+                or_(*(BookLocation.longitude.between(*lon_range) for lon_range in lon_ranges)),
+                distance <= radius,
+            )
+            .distinct(BookLocation.book_id)
+            .order_by(BookLocation.book_id, distance)
+            .subquery()
+        )
+
+        query = (
+            query
+            .add_columns(BookLocation, nearest.c.distance)
+            .join(nearest, nearest.c.book_id == Book.id)
+            .join(BookLocation, BookLocation.id == nearest.c.location_id)
+        )
+        if last:
+            query = query.where(or_(
+                nearest.c.distance > last[0],
+                and_(nearest.c.distance == last[0], Book.id > last[1]),
+            ))
+        query = (
+            query
+            .options(*options or ())
+            .order_by(nearest.c.distance, Book.id)
+            .limit(limit + 1)
+        )
+        response = await db_session.execute(query)
+        return self._nearby_page(response.all(), limit)
 
 
 book = CRUDBook(Book)
@@ -1,10 +1,11 @@
+from src.core.config import settings
 from src.crud.base import CRUDBase
 from src.models.genre import Genre
 from src.schemas.genre import GenreCreate, GenreUpdate
 
 
 class CRUDGenre(CRUDBase[Genre, GenreCreate, GenreUpdate]):
-    pass
+    cache_ttl = settings.CATALOG_CACHE_TTL
 
 
 genre = CRUDGenre(Genre)
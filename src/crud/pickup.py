@@ -1,10 +1,116 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Sequence, Tuple
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import joinedload
+from sqlalchemy.ext.asyncio.session import AsyncSession
+
 from src.crud.base import CRUDBase
+from src.crud.book import book_read_options
+from src.models.book import Book
 from src.models.location import BookLocation
-from src.schemas.book import BookLocationCreate, BookLocationUpdate
+from src.schemas.book import BookLocationBase, BookLocationCreate, BookLocationUpdate
+
+
+# Relationships serialized by BookLocationRead
+location_read_options = (
+    joinedload(BookLocation.book).options(*book_read_options),
+)
+
+# Book of a location, for owner checks
+location_book_options = (
+    joinedload(BookLocation.book),
+)
 
 
 class CRUDPickup(CRUDBase[BookLocation, BookLocationCreate, BookLocationUpdate]):
-    pass
+    @staticmethod
+    async def touch_book(book_id: Any, db_session: AsyncSession) -> None:
+        """
+        Move the `updated_at` of a book whose locations were removed.
+
+        The `Last-Modified` of a book is the newest `updated_at` of the book
+        and its locations, which a removed location would not change.
+        The caller commits.
+
+        :param book_id: Book id, or a scalar subquery selecting it.
+        :param db_session: Database session.
+        """
+        await db_session.execute(
+            update(Book).where(Book.id == book_id).values(updated_at=datetime.utcnow())
+        )
+
+    async def count_for_book(self, book_id: int, db_session: AsyncSession | None = None) -> int:
+        """
+        Count the pickup locations of a book, uncached as it enforces `BOOK_LOCATIONS_MAX`.
+
+        :param book_id: Book id.
+        :param db_session: Database session.
+        :return: Number of locations.
+        """
+        db_session = db_session or self.db.session
+        response = await db_session.execute(
+            select(func.count()).select_from(BookLocation).where(BookLocation.book_id == book_id)
+        )
+        return response.scalar_one()
+
+    async def remove(self, *, _id: int, db_session: AsyncSession | None = None) -> BookLocation:
+        db_session = db_session or self.db.session
+        await self.touch_book(
+            select(BookLocation.book_id).where(BookLocation.id == _id).scalar_subquery(), db_session
+        )
+        return await super().remove(_id=_id, db_session=db_session)
+
+    async def replace_for_book(
+        self,
+        *,
+        book_id: int,
+        locations: Sequence[BookLocationBase],
+        db_session: AsyncSession | None = None
+    ) -> Tuple[int, int]:
+        """
+        Replace the pickup locations of a book in one transaction.
+
+        The new set is diffed against the stored one: unchanged locations
+        keep their rows, the rest is removed with one DELETE and added with
+        one batched INSERT. The caller locks the book, so concurrent
+        replacements of the same book do not interleave.
+
+        :param book_id: Book id.
+        :param locations: New pickup locations.
+        :param db_session: Database session.
+        :return: Number of removed and added locations.
+        """
+        db_session = db_session or self.db.session
+
+        response = await db_session.execute(
+            select(BookLocation.id, BookLocation.address, BookLocation.latitude, BookLocation.longitude)
+            .where(BookLocation.book_id == book_id)
+        )
+        # Location values -> ids of the stored rows with these values
+        stored: Dict[Tuple, List[int]] = defaultdict(list)
+        for location_id, *values in response:
+            stored[tuple(values)].append(location_id)
+
+        added = []
+        for location in locations:
+            values = (location.address, location.latitude, location.longitude)
+            if stored.get(values):
+                stored[values].pop()
+            else:
+                added.append({**location.model_dump(), "book_id": book_id})
+        removed = [location_id for location_ids in stored.values() for location_id in location_ids]
+
+        if removed:
+            await db_session.execute(delete(BookLocation).where(BookLocation.id.in_(removed)))
+            await self.touch_book(book_id, db_session)
+        if added:
+            await db_session.execute(insert(BookLocation), added)
+        await db_session.commit()
+        await self.invalidate_cache()
+
+        return len(removed), len(added)
 
 
 pickup = CRUDPickup(BookLocation)
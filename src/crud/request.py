@@ -1,26 +1,108 @@
 import uuid
-from typing import List
+from datetime import datetime
+from typing import List, Sequence, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import exc, select, update, exists, case, literal
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.interfaces import ORMOption
+from sqlalchemy.ext.asyncio.session import AsyncSession
 
 from src.crud.base import CRUDBase
-from src.models.book import BookRequest, BookRequestStatus
+from src.crud.book import book_read_options
+from src.db.ranking import popular_books
+from src.models.book import Book, BookRequest, BookRequestStatus
 from src.schemas.book import BookRequestCreate, BookRequestUpdate
 
 
+# Relationships serialized by BookRequestRead
+request_read_options = (
+    joinedload(BookRequest.book).options(*book_read_options),
+)
+
+
 class CRUDBookRequest(CRUDBase[BookRequest, BookRequestCreate, BookRequestUpdate]):
-    async def get_by_book(self, book_id: int) -> List[BookRequest]:
+    async def create(
+        self,
+        *,
+        obj_in: BookRequestCreate,
+        options: Sequence[ORMOption] | None = None,
+        db_session: AsyncSession | None = None
+    ) -> BookRequest:
+        """
+        Create a book request and count it on the book in the same transaction.
+
+        :param obj_in: Book request to create
+        :param options: Loader options for the relationships to return
+        :param db_session: Database session
+        :return: Created book request
+        """
+        db_session = db_session or self.get_db().session
+        db_obj = BookRequest(**obj_in.model_dump())
+        pending = int(db_obj.status == BookRequestStatus.PENDING)
+
+        try:
+            db_session.add(db_obj)
+            pending_count = await db_session.scalar(
+                update(Book)
+                .where(Book.id == db_obj.book_id)
+                .values(
+                    request_count=Book.request_count + 1,
+                    pending_count=Book.pending_count + pending
+                )
+                .returning(Book.pending_count)
+                .execution_options(synchronize_session=False)
+            )
+            await db_session.commit()
+        except exc.IntegrityError as e:
+            await db_session.rollback()
+            raise self._integrity_error(e)
+        if pending and popular_books is not None:
+            await popular_books.update(db_obj.book_id, pending_count)
+
+        return await self._reload(db_obj, options, db_session)
+
+    async def get_by_book(
+        self,
+        book_id: int,
+        cursor: str | None = None,
+        limit: int = 50,
+        options: Sequence[ORMOption] | None = None,
+        db_session: AsyncSession | None = None
+    ) -> Tuple[List[BookRequest], str | None]:
         """
-        Get book requests by book id.
+        Get a page of book requests by book id.
 
         :param book_id: Book id
-        :return:
+        :param cursor: Cursor of the page
+        :param limit: Page size
+        :param options: Loader options for the relationships to load
+        :param db_session: Database session
+        :return: List of book requests and cursor of the next page
         """
-        db_session = self.get_db().session
+        query = select(BookRequest).where(BookRequest.book_id == book_id)
+        return await self.get_page(
+            cursor=cursor,
+            limit=limit,
+            query=query,
+            options=options,
+            db_session=db_session,
+        )
+
+    async def count_by_book(
+        self,
+        book_id: int,
+        db_session: AsyncSession | None = None
+    ) -> int:
+        """
+        Count the requests of a book.
 
+        :param book_id: Book id
+        :param db_session: Database session
+        :return: Number of book requests
+        """
         query = select(BookRequest).where(BookRequest.book_id == book_id)
-        result = await db_session.execute(query)
-        return result.scalars().all()
+        return await self.get_count(query=query, db_session=db_session)
 
     async def get_by_book_and_requester(
         self,
@@ -43,26 +125,92 @@ class CRUDBookRequest(CRUDBase[BookRequest, BookRequestCreate, BookRequestUpdate
         result = await db_session.execute(query)
         return result.scalar_one_or_none()
 
-    async def reject_all_requests_for_book(self, book_id: int) -> None:
+    async def has_accepted(
+        self,
+        book_id: int,
+        db_session: AsyncSession | None = None
+    ) -> bool:
         """
-        Reject all book requests except the one with the given id.
+        Check if a request was already accepted for the book.
 
         :param book_id: Book id
-        :return: None
+        :param db_session: Database session
+        :return: True if an accepted request exists
         """
-        db_session = self.get_db().session
+        db_session = db_session or self.get_db().session
 
-        query = select(BookRequest).where(
+        query = select(exists().where(
             (BookRequest.book_id == book_id) &
-            (BookRequest.status != BookRequestStatus.ACCEPTED)
-        )
+            (BookRequest.status == BookRequestStatus.ACCEPTED)
+        ))
         result = await db_session.execute(query)
-        requests = result.scalars().all()
+        return result.scalar_one()
 
-        for request in requests:
-            request.status = BookRequestStatus.REJECTED
+    async def accept(
+        self,
+        book_request: BookRequest,
+        book: Book,
+        db_session: AsyncSession | None = None
+    ) -> Tuple[BookRequest, List[Tuple[int, uuid.UUID]]]:
+        """
+        Accept a book request and reject all other requests for the book.
+
+        Both happen in one statement, which also resets the pending counter
+        of the book and returns the requests it rejected, and are committed
+        together. The caller is expected to hold a lock on the book row.
 
+        :param book_request: Book request to accept
+        :param book: Requested book, returned as the request's book
+        :param db_session: Database session
+        :return: Accepted book request, and id and requester id of the requests rejected just now
+        """
+        db_session = db_session or self.get_db().session
+
+        # Anonymous binds, the implicit `updated_at` ones of both tables would clash
+        now = literal(datetime.utcnow())
+        decided = (
+            update(BookRequest)
+            .where(
+                (BookRequest.book_id == book_request.book_id) &
+                (
+                    (BookRequest.id == book_request.id) |
+                    (BookRequest.status != BookRequestStatus.REJECTED)
+                )
+            )
+            .values(status=case(
+                (
+                    BookRequest.id == book_request.id,
+                    literal(BookRequestStatus.ACCEPTED, BookRequest.status.type)
+                ),
+                else_=literal(BookRequestStatus.REJECTED, BookRequest.status.type),
+            ), updated_at=now)
+            .returning(BookRequest.id, BookRequest.requester_id)
+            .cte("decided")
+        )
+        counted = (
+            update(Book)
+            .where(Book.id == book.id)
+            .values(pending_count=0, updated_at=now)
+            .returning(Book.id)
+            .cte("counted")
+        )
+        # Data-modifying CTEs run whether or not the outer statement reads them
+        query = (
+            select(decided.c.id, decided.c.requester_id)
+            .add_cte(counted)
+            .where(decided.c.id != book_request.id)
+        )
+        rejected = [tuple(row) for row in await db_session.execute(query)]
         await db_session.commit()
+        if popular_books is not None:
+            await popular_books.remove(book.id)
+
+        # The new state is known, so the accepted request is not loaded again
+        set_committed_value(book_request, "status", BookRequestStatus.ACCEPTED)
+        set_committed_value(book_request, "book", book)
+        set_committed_value(book, "pending_count", 0)
+
+        return book_request, rejected
 
 
 request = CRUDBookRequest(BookRequest)
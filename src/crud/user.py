@@ -1,8 +1,10 @@
-from typing import Optional, Any
+from typing import Optional, Any, Sequence
 
 from sqlalchemy import select
+from sqlalchemy.orm.interfaces import ORMOption
 from sqlalchemy.ext.asyncio.session import AsyncSession
 
+from src.core.config import settings
 from src.crud.base import CRUDBase
 from src.models.user import User
 from src.schemas.user import UserCreate, UserUpdate
@@ -10,16 +12,26 @@ from src.schemas.user import UserCreate, UserUpdate
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     """CRUD for User model"""
-    async def get(self, _id: Any, db_session: AsyncSession | None = None) -> Optional[User]:
+    # Users resolved from auth tokens, see `UserManager.get`
+    cache_ttl = settings.AUTH_USER_CACHE_TTL if settings.AUTH_USER_CACHE else None
+    cache_exclude = ("hashed_password",)
+
+    async def get(
+        self,
+        _id: Any,
+        options: Sequence[ORMOption] | None = None,
+        db_session: AsyncSession | None = None
+    ) -> Optional[User]:
         """
         Get user by id.
 
         :param _id: User id
+        :param options: Loader options for the relationships to load
         :param db_session: Database session
         :return: User / None
         """
         db_session = db_session or self.get_db().session
-        query = select(self.model).where(self.model.id == _id)
+        query = select(self.model).where(self.model.id == _id).options(*options or ())
         response = await db_session.execute(query)
         return response.unique().scalar_one_or_none()
 
@@ -0,0 +1,63 @@
+import json
+import math
+import base64
+import binascii
+from typing import Any, Dict, Tuple
+
+from fastapi import HTTPException, status
+
+from src.models.base import INT4_MAX
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """
+    Encode keyset values into an opaque pagination cursor.
+
+    :param values: Keyset values of the last returned row.
+    :return: Url-safe cursor string.
+    """
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decode a pagination cursor created by `encode_cursor`.
+
+    :param cursor: Cursor string received from the client.
+    :return: Keyset values.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        values = None
+
+    if not isinstance(values, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+    return values
+
+
+def is_cursor_id(value: Any) -> bool:
+    """
+    Check an id read from a cursor, which is client controlled.
+
+    :param value: Decoded value.
+    :return: Whether it is a valid int4 id; JSON `true` decodes to a bool, which is an int too.
+    """
+    return type(value) is int and 0 <= value <= INT4_MAX
+
+
+def is_cursor_number(value: Any, types: Tuple[type, ...] = (int, float)) -> bool:
+    """
+    Check a rank, count or distance read from a cursor.
+
+    :param value: Decoded value.
+    :param types: Accepted types, e.g. only `int` for counters.
+    :return: Whether it is a finite number within the int4 range.
+    """
+    return type(value) in types and math.isfinite(value) and abs(value) <= INT4_MAX
@@ -0,0 +1,188 @@
+import time
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+import redis.asyncio
+from redis.exceptions import RedisError
+
+from src.core.config import settings
+from src.db.redis import cache_redis
+
+logger = logging.getLogger(__name__)
+
+# Deletes a key only while it holds the given value:
+# KEYS: key
+# ARGV: value
+DISCARD_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class Cache(ABC):
+    """Key-value cache with TTL and tag based invalidation."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Get a cached value.
+
+        :param key: Cache key.
+        :return: Cached value / None
+        """
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: int, tag: str | None = None) -> None:
+        """
+        Cache a value.
+
+        :param key: Cache key.
+        :param value: Value to cache.
+        :param ttl: Time to live in seconds.
+        :param tag: Tag to invalidate the key with.
+        """
+
+    @abstractmethod
+    async def add(self, key: str, value: str, ttl: int) -> Optional[bool]:
+        """
+        Cache a value unless the key is already cached, e.g. to take a lock.
+
+        :param key: Cache key.
+        :param value: Value to cache.
+        :param ttl: Time to live in seconds.
+        :return: True if the value was cached, False if the key is taken /
+            None if the cache failed, so callers can refuse to go ahead.
+        """
+
+    @abstractmethod
+    async def discard(self, key: str, value: str) -> None:
+        """
+        Remove a cached value unless it was replaced, e.g. to release a lock taken with `add`.
+
+        :param key: Cache key.
+        :param value: Value the key must still hold.
+        """
+
+    @abstractmethod
+    async def invalidate(self, *keys: str, tag: str | None = None) -> None:
+        """
+        Remove cached values.
+
+        :param keys: Cache keys to remove.
+        :param tag: Tag whose keys are removed as well.
+        """
+
+
+class MemoryCache(Cache):
+    """In-process LRU cache, used when Redis is not configured."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, Tuple[str, float]] = OrderedDict()
+        self.tags: Dict[str, Set[str]] = {}
+        # Tag of each tagged key, so dropped keys leave their tag as well
+        self.key_tags: Dict[str, str] = {}
+
+    def drop(self, key: str) -> None:
+        """Remove a key and its tag membership."""
+        self.entries.pop(key, None)
+        tag = self.key_tags.pop(key, None)
+        if tag is not None:
+            keys = self.tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tags[tag]
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            self.drop(key)
+            return None
+
+        self.entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: int, tag: str | None = None) -> None:
+        self.drop(key)
+        self.entries[key] = (value, time.monotonic() + ttl)
+        if tag:
+            self.tags.setdefault(tag, set()).add(key)
+            self.key_tags[key] = tag
+
+        while len(self.entries) > self.max_entries:
+            self.drop(next(iter(self.entries)))
+
+    async def add(self, key: str, value: str, ttl: int) -> Optional[bool]:
+        if await self.get(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def discard(self, key: str, value: str) -> None:
+        if await self.get(key) == value:
+            self.drop(key)
+
+    async def invalidate(self, *keys: str, tag: str | None = None) -> None:
+        keys = {*keys, *self.tags.get(tag, ())} if tag else set(keys)
+        for key in keys:
+            self.drop(key)
+
+
+class RedisCache(Cache):
+    """Redis cache. Errors are logged and treated as cache misses."""
+
+    def __init__(self, client: redis.asyncio.Redis) -> None:
+        self.client = client
+        self.discard_script = client.register_script(DISCARD_SCRIPT)
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            return await self.client.get(key)
+        except RedisError:
+            logger.warning(f"Cache read failed for {key}", exc_info=True)
+            return None
+
+    async def set(self, key: str, value: str, ttl: int, tag: str | None = None) -> None:
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.set(key, value, ex=ttl)
+                if tag:
+                    pipe.sadd(tag, key)
+                    pipe.expire(tag, ttl)
+                await pipe.execute()
+        except RedisError:
+            logger.warning(f"Cache write failed for {key}", exc_info=True)
+
+    async def add(self, key: str, value: str, ttl: int) -> Optional[bool]:
+        try:
+            return bool(await self.client.set(key, value, ex=ttl, nx=True))
+        except RedisError:
+            logger.warning(f"Cache write failed for {key}", exc_info=True)
+            return None
+
+    async def discard(self, key: str, value: str) -> None:
+        try:
+            await self.discard_script(keys=[key], args=[value])
+        except RedisError:
+            logger.warning(f"Cache invalidation failed for {key}", exc_info=True)
+
+    async def invalidate(self, *keys: str, tag: str | None = None) -> None:
+        try:
+            if tag:
+                keys = (*keys, *await self.client.smembers(tag), tag)
+            if keys:
+                await self.client.delete(*keys)
+        except RedisError:
+            logger.warning(f"Cache invalidation failed for {keys}", exc_info=True)
+
+
+cache: Cache = RedisCache(cache_redis) if cache_redis else MemoryCache(settings.CACHE_MAX_ENTRIES)
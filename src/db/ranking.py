@@ -0,0 +1,139 @@
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+import redis.asyncio
+from redis.exceptions import RedisError
+
+from src.core.config import settings
+from src.db.redis import cache_redis
+
+logger = logging.getLogger(__name__)
+
+# Ids are int4, so a count and an id packed into one score stay exact in a double
+ID_SPAN = 2 ** 31
+# Member marking that the whole ranking fits into the cached top
+END = "end"
+
+# Raises a member to its new score, and admits an id outside the top when the
+# top holds the whole ranking or the id outranks its last member, which makes
+# room for it once the top is full:
+# KEYS: ranking
+# ARGV: member, packed score, END member, size of the top
+UPDATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local score = tonumber(ARGV[2])
+if redis.call('ZSCORE', KEYS[1], ARGV[1]) or redis.call('ZSCORE', KEYS[1], ARGV[3]) then
+    redis.call('ZADD', KEYS[1], 'GT', score, ARGV[1])
+    return 1
+end
+local last = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+if score <= tonumber(last[2]) then
+    return 0
+end
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[4]) then
+    redis.call('ZREMRANGEBYRANK', KEYS[1], 0, 0)
+end
+redis.call('ZADD', KEYS[1], score, ARGV[1])
+return 1
+"""
+
+
+class Ranking:
+    """
+    Top of a ranking of ids by a positive count, cached in a Redis sorted set.
+
+    Counts and ids are packed into the scores, so members are ordered by
+    `(count desc, id desc)` like the database index the top is loaded
+    from, and a page starts right after the `(count, id)` of the last
+    member of the previous one. Errors are logged and treated as misses.
+    """
+
+    def __init__(self, client: redis.asyncio.Redis, key: str, size: int, ttl: int) -> None:
+        self.client = client
+        self.key = key
+        self.size = size
+        self.ttl = ttl
+        self.script = client.register_script(UPDATE_SCRIPT)
+
+    async def page(self, last: Tuple[int, int] | None, limit: int) -> Optional[List[Tuple[int, int]]]:
+        """
+        Get a page of the cached top.
+
+        :param last: `(count, id)` of the last member of the previous page.
+        :param limit: Page size.
+        :return: `(id, count)` of the members / None when the top is not
+            cached or the page runs past it.
+        """
+        max_score = "+inf" if last is None else f"({last[0] * ID_SPAN + last[1]}"
+        try:
+            members = await self.client.zrevrangebyscore(
+                self.key, max_score, 0, start=0, num=limit, withscores=True
+            )
+        except RedisError:
+            logger.warning(f"Ranking read failed for {self.key}", exc_info=True)
+            return None
+
+        entries = [(int(member), int(score) // ID_SPAN) for member, score in members if member != END]
+        if len(members) < limit and len(entries) == len(members):
+            return None
+        return entries
+
+    async def fill(self, entries: Sequence[Tuple[int, int]]) -> None:
+        """
+        Replace the cached top.
+
+        :param entries: `(id, count)` of the top `size` members, best first.
+        """
+        scores = {str(_id): count * ID_SPAN + _id for _id, count in entries}
+        if len(entries) < self.size:
+            scores[END] = 0
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.delete(self.key)
+                pipe.zadd(self.key, scores)
+                pipe.expire(self.key, self.ttl)
+                await pipe.execute()
+        except RedisError:
+            logger.warning(f"Ranking write failed for {self.key}", exc_info=True)
+
+    async def update(self, _id: int, count: int) -> None:
+        """
+        Raise the count of a member.
+
+        An id outside the top replaces its last member once it outranks
+        it, so the cached top stays the head of the ranking. Counts only
+        go up here; members dropping to zero are removed.
+
+        :param _id: Member id.
+        :param count: New count, as committed to the database.
+        """
+        try:
+            await self.script(keys=[self.key], args=[str(_id), count * ID_SPAN + _id, END, self.size])
+        except RedisError:
+            logger.warning(f"Ranking write failed for {self.key}", exc_info=True)
+
+    async def remove(self, _id: int) -> None:
+        """
+        Drop a member whose count went down to zero.
+
+        :param _id: Member id.
+        """
+        try:
+            await self.client.zrem(self.key, str(_id))
+        except RedisError:
+            logger.warning(f"Ranking write failed for {self.key}", exc_info=True)
+
+    async def invalidate(self) -> None:
+        """Drop the cached top, loaded again on the next first page."""
+        try:
+            await self.client.delete(self.key)
+        except RedisError:
+            logger.warning(f"Ranking invalidation failed for {self.key}", exc_info=True)
+
+
+# Without Redis the feed is served from the database index alone
+popular_books: Ranking | None = Ranking(
+    cache_redis, "books:popular", settings.POPULAR_BOOKS_CACHE_SIZE, settings.POPULAR_BOOKS_CACHE_TTL
+) if cache_redis else None
@@ -0,0 +1,154 @@
+import time
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Tuple
+
+import redis.asyncio
+from redis.exceptions import RedisError
+
+from src.core.config import settings
+from src.db.redis import cache_redis
+
+logger = logging.getLogger(__name__)
+
+# Counters of the previous window weigh into the current one (sliding window):
+# KEYS: current and previous window counters
+# ARGV: limit, window in ms, ms elapsed in the current window
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local used = math.floor(previous * (window - elapsed) / window) + current
+if used >= limit then
+    return {0, previous, current}
+end
+if redis.call('INCR', KEYS[1]) == 1 then
+    redis.call('PEXPIRE', KEYS[1], window * 2)
+end
+return {1, previous, current + 1}
+"""
+
+
+class RateLimit(NamedTuple):
+    """Outcome of a hit."""
+    allowed: bool
+    remaining: int
+    # Seconds until the current window ends / until a hit is allowed again
+    reset: int
+
+
+def split_window(now: float, window: int) -> Tuple[int, int]:
+    """
+    Locate a moment in the fixed windows all limiter instances share.
+
+    :param now: Unix time in seconds.
+    :param window: Window length in seconds.
+    :return: Window index and ms elapsed in it.
+    """
+    return divmod(int(now * 1000), window * 1000)
+
+
+def weigh(previous: int, current: int, limit: int, window: int, elapsed: int, allowed: bool) -> RateLimit:
+    """
+    Describe a hit from the counters of the previous and current window.
+
+    :param previous: Hits of the previous window.
+    :param current: Hits of the current window, including an allowed hit.
+    :param limit: Hits allowed per window.
+    :param window: Window length in seconds.
+    :param elapsed: ms elapsed in the current window.
+    :param allowed: Whether the hit was counted.
+    """
+    window_ms = window * 1000
+    if allowed:
+        used = previous * (window_ms - elapsed) // window_ms + current
+        return RateLimit(True, max(limit - used, 0), -(-(window_ms - elapsed) // 1000))
+
+    if current < limit:
+        # The previous window slides out until the count drops below the limit
+        wait = window_ms - elapsed - (limit - current) * window_ms / previous
+    else:
+        # The current window is used up, so it has to slide out as well
+        wait = 2 * window_ms - elapsed - limit * window_ms / current
+    return RateLimit(False, 0, max(int(-(-wait // 1000)), 1))
+
+
+class RateLimiter(ABC):
+    """
+    Sliding window rate limiter.
+
+    Counts hits per fixed window and weighs the previous window's count by
+    the share of it still inside the sliding window, which approximates a
+    true sliding log with two counters per key.
+    """
+
+    @abstractmethod
+    async def hit(self, key: str, limit: int, window: int) -> RateLimit:
+        """
+        Count a hit unless the key is over its limit.
+
+        :param key: Limited client, e.g. a user or an IP address.
+        :param limit: Hits allowed per window.
+        :param window: Window length in seconds.
+        :return: Whether the hit is allowed, hits left and seconds to wait for more.
+        """
+
+
+class MemoryRateLimiter(RateLimiter):
+    """In-process rate limiter, used when Redis is not configured. Limits apply per process."""
+
+    def __init__(self, max_keys: int, clock: Callable[[], float] = time.time) -> None:
+        self.max_keys = max_keys
+        self.clock = clock
+        # key -> (window index, previous window count, current window count)
+        self.counters: OrderedDict[str, Tuple[int, int, int]] = OrderedDict()
+
+    async def hit(self, key: str, limit: int, window: int) -> RateLimit:
+        index, elapsed = split_window(self.clock(), window)
+        last_index, previous, current = self.counters.get(key, (index, 0, 0))
+        if last_index == index - 1:
+            previous, current = current, 0
+        elif last_index != index:
+            previous, current = 0, 0
+
+        allowed = previous * (window * 1000 - elapsed) // (window * 1000) + current < limit
+        if allowed:
+            current += 1
+        self.counters[key] = (index, previous, current)
+        self.counters.move_to_end(key)
+        while len(self.counters) > self.max_keys:
+            self.counters.popitem(last=False)
+        return weigh(previous, current, limit, window, elapsed, allowed)
+
+
+class RedisRateLimiter(RateLimiter):
+    """
+    Rate limiter shared by all processes, one atomic script call per hit.
+
+    Errors are logged and the hit is allowed, so an outage of Redis does
+    not take the API down with it.
+    """
+
+    def __init__(self, client: redis.asyncio.Redis, clock: Callable[[], float] = time.time) -> None:
+        self.client = client
+        self.clock = clock
+        self.script = client.register_script(SLIDING_WINDOW_SCRIPT)
+
+    async def hit(self, key: str, limit: int, window: int) -> RateLimit:
+        index, elapsed = split_window(self.clock(), window)
+        # The hash tag keeps both counters in one slot of a Redis cluster
+        keys = [f"ratelimit:{{{key}}}:{index}", f"ratelimit:{{{key}}}:{index - 1}"]
+        try:
+            allowed, previous, current = await self.script(keys=keys, args=[limit, window * 1000, elapsed])
+        except RedisError:
+            logger.warning(f"Rate limit check failed for {key}", exc_info=True)
+            return weigh(0, 0, limit, window, elapsed, True)
+        return weigh(previous, current, limit, window, elapsed, bool(allowed))
+
+
+rate_limiter: RateLimiter = (
+    RedisRateLimiter(cache_redis) if cache_redis else MemoryRateLimiter(settings.RATE_LIMIT_MAX_KEYS)
+)
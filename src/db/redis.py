@@ -3,4 +3,19 @@ import redis.asyncio
 from src.core.config import settings
 from src.core.utils import get_redis_uri
 
-auth_redis = redis.asyncio.from_url(get_redis_uri(settings.REDIS_SESSION_DB), decode_responses=True)
+
+def create_redis(db: int) -> redis.asyncio.Redis | None:
+    """
+    Create a Redis client, if Redis is configured.
+
+    :param db: Redis database number.
+    :return: Redis client / None
+    """
+    if not settings.REDIS_HOST:
+        return None
+    return redis.asyncio.from_url(get_redis_uri(db), decode_responses=True)
+
+
+auth_redis = create_redis(settings.REDIS_SESSION_DB)
+cache_redis = create_redis(settings.REDIS_CACHE_DB)
+jobs_redis = create_redis(settings.REDIS_JOBS_DB)
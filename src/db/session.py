@@ -1,19 +1,41 @@
+from typing import AsyncIterator
+
 from sqlalchemy.ext.asyncio import create_async_engine
-from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio.session import AsyncSession
+from fastapi_async_sqlalchemy import db
+from fastapi_async_sqlalchemy.exceptions import MissingSessionError
 
 from src.db.utils import engine_args
 from src.core.utils import get_sqlalchemy_uri
 
 SQLALCHEMY_DATABASE_URI = get_sqlalchemy_uri()
 
+# Shared by the request sessions and the auth sessions
 engine = create_async_engine(
     SQLALCHEMY_DATABASE_URI,
     **engine_args
 )
 
 
-async def get_async_session() -> AsyncSession:
-    async_session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
-    async with async_session() as session:
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    """
+    Get the session of the current request.
+
+    Auth dependencies and the CRUD layer share the session opened by
+    `SQLAlchemyMiddleware`, so a request checks out one connection only.
+    Outside a request (e.g. websockets, startup tasks) a session is opened
+    for the caller and closed afterwards.
+
+    :return: Database session.
+    """
+    try:
+        session = db.session
+    except MissingSessionError:
+        session = None
+
+    if session is not None:
         yield session
+        return
+
+    async with db():
+        yield db.session
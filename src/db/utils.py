@@ -1,8 +1,21 @@
 from src.core.config import settings
+from src.db.pool import MonitoredPool
 
 
-# Sample engine configuration
+# Engine configuration of the current environment
 engine_args = {
-    "echo": True,
-    "pool_pre_ping": True,
+    "echo": settings.DB_ECHO,
+    "poolclass": MonitoredPool,
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    "connect_args": {
+        # Client side LRU of asyncpg prepared statements, per connection
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "server_settings": {
+            "statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS),
+        },
+    },
 }
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String
+from sqlalchemy import Column, String, Index
 from sqlalchemy.orm import relationship
 
 from src.models.base import PkBase
@@ -7,6 +7,13 @@ from src.models.base import PkBase
 class Author(PkBase):
     """Author model."""
     __tablename__ = 'authors'
+    __table_args__ = (
+        Index(
+            'ix_authors_full_name_trgm', 'full_name',
+            postgresql_using='gin',
+            postgresql_ops={'full_name': 'gin_trgm_ops'}
+        ),
+    )
 
     full_name = Column(String(100), unique=True)
     books = relationship('Book', back_populates='author')
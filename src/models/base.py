@@ -1,10 +1,23 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, DateTime
+from sqlalchemy import Column, Integer, DateTime, MetaData
 from sqlalchemy.ext.declarative import as_declarative
 
+# Ids and counters are int4 columns, larger values fail in the driver
+INT4_MAX = 2 ** 31 - 1
 
-@as_declarative()
+# Constraint names match the ones created by the migrations
+naming_convention = {
+   "ix": "ix_%(column_0_label)s",
+   "uq": "uq_%(table_name)s_%(column_0_name)s",
+   "ck": "ck_%(table_name)s_%(constraint_name)s",
+   "fk": "fk_%(table_name)s_%(column_0_name)"
+         "s_%(referred_table_name)s",
+   "pk": "pk_%(table_name)s"
+}
+
+
+@as_declarative(metadata=MetaData(naming_convention=naming_convention))
 class Base:
     pass
 
@@ -1,7 +1,8 @@
 from enum import Enum
 
-from sqlalchemy import Column, Integer, String, Enum as SQLEnum, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, Integer, String, Enum as SQLEnum, ForeignKey, Index
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from fastapi_users_db_sqlalchemy.generics import GUID
 
 from src.models.base import PkBase
@@ -23,26 +24,61 @@ class BookRequestStatus(Enum):
 class Book(PkBase):
     """Book model."""
     __tablename__ = 'books'
+    __table_args__ = (
+        # Filter columns are paired with id so keyset pages stay index-only ordered
+        Index('ix_books_genre_id_id', 'genre_id', 'id'),
+        Index('ix_books_author_id_id', 'author_id', 'id'),
+        Index('ix_books_condition_id', 'condition', 'id'),
+        Index('ix_books_owner_id', 'owner_id'),
+        # Incremental exports
+        Index('ix_books_updated_at_id', 'updated_at', 'id'),
+        # Most requested feed, scanned backwards
+        Index('ix_books_pending_count_id', 'pending_count', 'id'),
+        # Full-text and typo tolerant search
+        Index('ix_books_search_vector', 'search_vector', postgresql_using='gin'),
+        Index(
+            'ix_books_name_trgm', 'name',
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'}
+        ),
+    )
 
     name = Column(String(100))
     description = Column(String(500))
     condition = Column(SQLEnum(BookCondition))
     page_count = Column(Integer)
     owner_id = Column(GUID, ForeignKey('user.id'))
-    owner = relationship('User', lazy='selectin')
+    owner = relationship('User', lazy='raise')
     author_id = Column(Integer, ForeignKey('authors.id'))
-    author = relationship('Author', back_populates='books', lazy='selectin')
+    author = relationship('Author', back_populates='books', lazy='raise')
     genre_id = Column(Integer, ForeignKey('genres.id'))
-    genre = relationship('Genre', back_populates='books', lazy='selectin')
-    locations = relationship('BookLocation', back_populates='book', lazy='selectin')
+    genre = relationship('Genre', back_populates='books', lazy='raise')
+    locations = relationship('BookLocation', back_populates='book', lazy='raise')
+    # Maintained with the request writes, recomputed by `python -m src.utils.request_counters`
+    request_count = Column(Integer, nullable=False, default=0, server_default='0')
+    pending_count = Column(Integer, nullable=False, default=0, server_default='0')
+    # Only used in search queries, never loaded
+    search_vector = deferred(
+        Column(TSVECTOR, Computed(
+            "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True
+        )),
+        raiseload=True
+    )
 
 
 class BookRequest(PkBase):
     """Book request model."""
     __tablename__ = 'book_requests'
+    __table_args__ = (
+        # Also serves lookups by book_id alone (leftmost column)
+        Index('ix_book_requests_book_id_requester_id', 'book_id', 'requester_id', unique=True),
+        Index('ix_book_requests_book_id_status', 'book_id', 'status'),
+    )
 
     book_id = Column(Integer, ForeignKey('books.id'))
-    book = relationship('Book', lazy='selectin')
+    book = relationship('Book', lazy='raise')
     requester_id = Column(GUID, ForeignKey('user.id'))
-    requester = relationship('User', lazy='selectin')
+    requester = relationship('User', lazy='raise')
     status = Column(SQLEnum(BookRequestStatus))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from src.models.base import PkBase
@@ -7,7 +7,14 @@ from src.models.base import PkBase
 class BookLocation(PkBase):
     """Book location model."""
     __tablename__ = 'book_locations'
+    __table_args__ = (
+        Index('ix_book_locations_book_id', 'book_id'),
+        # Bounding box prefilter of nearby searches
+        Index('ix_book_locations_latitude_longitude', 'latitude', 'longitude'),
+    )
 
     address = Column(String(70))
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
     book_id = Column(Integer, ForeignKey('books.id'))
-    book = relationship('Book', back_populates='locations', lazy='selectin')
+    book = relationship('Book', back_populates='locations', lazy='raise')
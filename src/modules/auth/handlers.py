@@ -1,6 +1,9 @@
 import logging
 from enum import Enum
 
+from src.modules.jobs.queue import enqueue
+from src.modules.jobs.tasks import JobName
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,35 +24,46 @@ async def handle_register(user) -> None:
     logger.info(f"User {user.id} has registered.")
 
 
-async def handle_forgot_password(user, token) -> None:
+async def handle_forgot_password(user) -> None:
     """
     Forgot password event handler function.
 
+    The reset e-mail is sent by a background job, which generates the token.
+
     :param user: User that requested the password reset.
-    :param token: Generated token for the password reset.
     :return: None
     """
-    logger.info(f"User {user.id} has forgot their password. Reset token: {token}")
-    print(f"User {user.id} has forgot their password. Reset token: {token}")
-    logger.info(f"Send reset email to {user.id}.")
+    logger.info(f"User {user.id} has forgot their password.")
+    await enqueue(JobName.SEND_RESET_PASSWORD_EMAIL, user_id=str(user.id))
 
 
-async def handle_request_verify(user, token) -> None:
+async def handle_request_verify(user) -> None:
     """
     Email verification event handler function.
 
+    The verification e-mail is sent by a background job, which generates the token.
+
     :param user: User that requested the email verification.
-    :param token: Generated token for the email verification.
     :return: None
     """
-    logger.info(f"Verification requested for user {user.id}. Verification token: {token}")
-    print(f"Verification requested for user {user.id}. Verification token: {token}")
-    logger.info(f"Send verification email to {user.id}.")
+    logger.info(f"Verification requested for user {user.id}.")
+    await enqueue(JobName.SEND_VERIFY_EMAIL, user_id=str(user.id))
+
+
+async def handle_user_updated(user, update_dict) -> None:
+    """
+    User update event handler function.
+
+    :param user: Updated user.
+    :param update_dict: Updated fields.
+    :return: None
+    """
+    logger.info(f"User {user.id} has updated {', '.join(update_dict)}.")
 
 
 event_handlers = {
     AuthEvent.REGISTERED: handle_register,
     AuthEvent.FORGOT_PASSWORD: handle_forgot_password,
     AuthEvent.REQUESTED_VERIFY: handle_request_verify,
-    AuthEvent.USER_UPDATED: handle_request_verify,
+    AuthEvent.USER_UPDATED: handle_user_updated,
 }
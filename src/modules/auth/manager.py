@@ -2,41 +2,155 @@ import uuid
 from typing import Optional, Union, Dict, Any
 
 from fastapi import Depends, Request
-from fastapi_users import BaseUserManager, FastAPIUsers, UUIDIDMixin, InvalidPasswordException
+from fastapi_users import BaseUserManager, FastAPIUsers, UUIDIDMixin, InvalidPasswordException, exceptions
 from fastapi_users.authentication import AuthenticationBackend, JWTStrategy, BearerTransport
 from fastapi_users.db import SQLAlchemyUserDatabase
+from fastapi_users.jwt import generate_jwt
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
 
-
+from src import crud
 from src.core.config import settings
+from src.db.redis import auth_redis
 from src.models.user import User, get_user_db
 from src.schemas.user import UserCreate
 from src.modules.auth.handlers import event_handlers, AuthEvent
+from src.modules.auth.strategy import SessionRedisStrategy
 
 
 class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
     reset_password_token_secret = settings.SECRET
     verification_token_secret = settings.SECRET
+    # Cached users leave out the password hash, so flows checking it read users from the database
+    use_user_cache = True
+
+    async def get(self, id: uuid.UUID) -> User:
+        """
+        Get a user by id, served from the user cache when it is enabled.
+
+        Every authenticated request resolves its user here.
+
+        :param id: User id.
+        :raises UserNotExists: The user does not exist.
+        :return: User attached to the request session.
+        """
+        if self.use_user_cache:
+            user = await crud.user.get_cached(_id=id, db_session=self.user_db.session)
+        else:
+            user = await crud.user.get(id, db_session=self.user_db.session)
+        if user is None:
+            raise exceptions.UserNotExists()
+
+        if inspect(user).transient:
+            user = await self.attach(user)
+        return user
+
+    async def attach(self, user: User) -> User:
+        """
+        Attach a user restored from a cache to the session without a query,
+        so it can still be updated.
+
+        :param user: Transient user built from cached values.
+        :return: User attached to the request session.
+        """
+        make_transient_to_detached(user)
+        return await self.user_db.session.merge(user, load=False)
+
+    async def invalidate_user(self, user: User) -> None:
+        """
+        Drop the cached user after it changed.
+
+        :param user: Changed user.
+        """
+        await crud.user.invalidate_cache(user.id)
+
+    async def reset_password(self, token: str, password: str, request: Optional[Request] = None) -> User:
+        # The token holds a fingerprint of the password hash
+        self.use_user_cache = False
+        try:
+            return await super().reset_password(token, password, request)
+        finally:
+            self.use_user_cache = True
 
     async def on_after_register(
             self, user: User, request: Optional[Request] = None
     ) -> None:
         await event_handlers[AuthEvent.REGISTERED](user)
 
-    async def on_after_forgot_password(
-        self, user: User, token: str, request: Optional[Request] = None
-    ) -> None:
-        await event_handlers[AuthEvent.FORGOT_PASSWORD](user, token)
-
-    async def on_after_request_verify(
-        self, user: User, token: str, request: Optional[Request] = None
-    ) -> None:
-        await event_handlers[AuthEvent.REQUESTED_VERIFY](user, token)
+    async def forgot_password(self, user: User, request: Optional[Request] = None) -> None:
+        """
+        Start a password reset.
+
+        Unlike fastapi-users, no token is generated here: the e-mail job
+        generates it with `reset_password_token`, so tokens never sit in
+        the job queue.
+
+        :param user: User that forgot their password.
+        :raises UserInactive: The user is inactive.
+        """
+        if not user.is_active:
+            raise exceptions.UserInactive()
+        await event_handlers[AuthEvent.FORGOT_PASSWORD](user)
+
+    async def request_verify(self, user: User, request: Optional[Request] = None) -> None:
+        """
+        Start an e-mail verification, the token is generated by the e-mail job as well.
+
+        :param user: User to verify.
+        :raises UserInactive: The user is inactive.
+        :raises UserAlreadyVerified: The user is already verified.
+        """
+        if not user.is_active:
+            raise exceptions.UserInactive()
+        if user.is_verified:
+            raise exceptions.UserAlreadyVerified()
+        await event_handlers[AuthEvent.REQUESTED_VERIFY](user)
+
+    def reset_password_token(self, user: User) -> str:
+        """
+        Generate a password reset token, as `forgot_password` of fastapi-users does.
+
+        :param user: User that forgot their password.
+        :return: Token accepted by `reset_password`.
+        """
+        token_data = {
+            "sub": str(user.id),
+            "password_fgpt": self.password_helper.hash(user.hashed_password),
+            "aud": self.reset_password_token_audience,
+        }
+        return generate_jwt(token_data, self.reset_password_token_secret, self.reset_password_token_lifetime_seconds)
+
+    def verification_token(self, user: User) -> str:
+        """
+        Generate an e-mail verification token, as `request_verify` of fastapi-users does.
+
+        :param user: User to verify.
+        :return: Token accepted by `verify`.
+        """
+        token_data = {"sub": str(user.id), "email": user.email, "aud": self.verification_token_audience}
+        return generate_jwt(token_data, self.verification_token_secret, self.verification_token_lifetime_seconds)
 
     async def on_after_update(
         self, user: User, update_dict: Dict[str, Any], request: Optional[Request] = None
     ) -> None:
+        await self.invalidate_user(user)
+        # Sessions of deactivated users end right away
+        if redis_strategy and update_dict.get("is_active") is False:
+            await redis_strategy.revoke_all(user.id)
         await event_handlers[AuthEvent.USER_UPDATED](user, update_dict)
 
+    async def on_after_verify(
+        self, user: User, request: Optional[Request] = None
+    ) -> None:
+        await self.invalidate_user(user)
+
+    async def on_after_reset_password(
+        self, user: User, request: Optional[Request] = None
+    ) -> None:
+        await self.invalidate_user(user)
+        if redis_strategy:
+            await redis_strategy.revoke_all(user.id)
+
     async def validate_password(
             self,
             password: str,
@@ -52,17 +166,30 @@ async def get_user_manager(user_db: SQLAlchemyUserDatabase = Depends(get_user_db
     yield UserManager(user_db)
 
 
-bearer_transport = BearerTransport(tokenUrl=settings.API_V1_STR + "/auth/jwt/login")
+bearer_transport = BearerTransport(tokenUrl=f"{settings.API_V1_STR}/auth/{settings.AUTH_BACKEND}/login")
 
 
 def get_jwt_strategy() -> JWTStrategy:
-    return JWTStrategy(secret=settings.SECRET, lifetime_seconds=3600)
+    return JWTStrategy(secret=settings.SECRET, lifetime_seconds=settings.AUTH_TOKEN_LIFETIME)
+
+
+redis_strategy = SessionRedisStrategy(
+    auth_redis,
+    lifetime_seconds=settings.AUTH_TOKEN_LIFETIME,
+) if auth_redis else None
+
+
+def get_redis_strategy() -> SessionRedisStrategy:
+    return redis_strategy
+
 
+if settings.AUTH_BACKEND == "redis" and redis_strategy is None:
+    raise RuntimeError("AUTH_BACKEND=redis requires REDIS_HOST")
 
 auth_backend = AuthenticationBackend(
-    name="jwt",
+    name=settings.AUTH_BACKEND,
     transport=bearer_transport,
-    get_strategy=get_jwt_strategy,
+    get_strategy=get_redis_strategy if settings.AUTH_BACKEND == "redis" else get_jwt_strategy,
 )
 
 auth_core = FastAPIUsers[User, uuid.UUID](get_user_manager, [auth_backend])
@@ -1,5 +1,7 @@
+from fastapi import APIRouter, Depends, Response
 
-from src.modules.auth.manager import auth_core
+from src.models import User
+from src.modules.auth.manager import auth_core, redis_strategy
 from src.schemas.user import UserRead, UserUpdate
 
 excluded_routes = ["users:user", "users:patch_user", "users:delete_user"]
@@ -7,3 +9,20 @@ excluded_routes = ["users:user", "users:patch_user", "users:delete_user"]
 
 users_router = auth_core.get_users_router(UserRead, UserUpdate, requires_verification=True)
 users_router.routes = [route for route in users_router.routes if route.name not in excluded_routes]
+
+
+sessions_router = APIRouter()
+
+
+@sessions_router.post("/logout-all", status_code=204)
+async def logout_all(user: User = Depends(auth_core.current_user(active=True))) -> Response:
+    """
+    Revoke every session of the current user, on all devices.
+
+    Only available with the redis auth backend.
+
+    :param user: Active user object.
+    :return: 204 response.
+    """
+    await redis_strategy.revoke_all(user.id)
+    return Response(status_code=204)
@@ -0,0 +1,71 @@
+import uuid
+import secrets
+from typing import Optional
+
+import redis.asyncio
+from fastapi_users import exceptions
+from fastapi_users.authentication import RedisStrategy
+
+from src.models.user import User
+
+
+class SessionRedisStrategy(RedisStrategy[User, uuid.UUID]):
+    """
+    Opaque tokens stored in Redis, which makes logout and revocation possible.
+
+    Tokens are prefixed with the user id, which must match the stored one.
+    Users are resolved by the user manager, so they come from the one user
+    cache. The tokens of every user are tracked in a set, so all of their
+    sessions can be revoked at once.
+    """
+
+    def __init__(self, redis: redis.asyncio.Redis, lifetime_seconds: int, key_prefix: str = "auth:"):
+        super().__init__(redis, lifetime_seconds, key_prefix=f"{key_prefix}token:")
+        self.sessions_prefix = f"{key_prefix}sessions:"
+
+    async def read_token(self, token: Optional[str], user_manager) -> Optional[User]:
+        if token is None:
+            return None
+
+        user_id, _, _ = token.partition(".")
+        token_user_id = await self.redis.get(f"{self.key_prefix}{token}")
+        if token_user_id is None or token_user_id != user_id:
+            return None
+
+        try:
+            return await user_manager.get(user_manager.parse_id(user_id))
+        except (exceptions.UserNotExists, exceptions.InvalidID):
+            return None
+
+    async def write_token(self, user: User) -> str:
+        token = f"{user.id}.{secrets.token_urlsafe()}"
+        sessions_key = f"{self.sessions_prefix}{user.id}"
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(f"{self.key_prefix}{token}", str(user.id), ex=self.lifetime_seconds)
+            pipe.sadd(sessions_key, token)
+            # The set lives as long as the newest token
+            pipe.expire(sessions_key, self.lifetime_seconds)
+            await pipe.execute()
+        return token
+
+    async def destroy_token(self, token: str, user: User) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(f"{self.key_prefix}{token}")
+            pipe.srem(f"{self.sessions_prefix}{user.id}", token)
+            await pipe.execute()
+
+    async def revoke_all(self, user_id: uuid.UUID) -> int:
+        """
+        Revoke every session of a user.
+
+        :param user_id: User id.
+        :return: Number of revoked sessions.
+        """
+        sessions_key = f"{self.sessions_prefix}{user_id}"
+        tokens = await self.redis.smembers(sessions_key)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(sessions_key)
+            if tokens:
+                pipe.delete(*(f"{self.key_prefix}{token}" for token in tokens))
+            result = await pipe.execute()
+        return result[1] if tokens else 0
@@ -0,0 +1,370 @@
+import time
+import uuid
+import heapq
+import asyncio
+import logging
+from enum import Enum
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import redis.asyncio
+from pydantic import BaseModel, Field
+from redis.exceptions import RedisError
+
+from src.core.config import settings
+from src.db.redis import jobs_redis
+
+logger = logging.getLogger(__name__)
+
+# Jobs per LPUSH of a batch
+ENQUEUE_BATCH_SIZE = 500
+# Due delayed jobs moved per promotion
+PROMOTE_BATCH_SIZE = 100
+
+# Moves due jobs from the delayed set to the ready list in one step, so no job
+# is lost between the two and concurrent promotions never push a job twice:
+# KEYS: delayed set, ready list
+# ARGV: current time, maximum number of jobs to move
+PROMOTE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, raw in ipairs(due) do
+    redis.call('ZREM', KEYS[1], raw)
+    redis.call('LPUSH', KEYS[2], raw)
+end
+return #due
+"""
+
+
+class Job(BaseModel):
+    """A queued call of a job handler."""
+    name: str
+    payload: Dict[str, Any]
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    attempts: int = 0
+    enqueued_at: float = Field(default_factory=time.time)
+    # Time the job became (or becomes) ready to run
+    run_at: float = Field(default_factory=time.time)
+    # Serialized form the job was dequeued as, used to acknowledge it
+    raw: Optional[str] = Field(None, exclude=True)
+
+    def dump(self) -> str:
+        """Serialize the job, without `raw`."""
+        return self.model_dump_json()
+
+    @classmethod
+    def load(cls, raw: str) -> "Job":
+        """Deserialize a job, keeping `raw` to acknowledge it."""
+        job = cls.model_validate_json(raw)
+        job.raw = raw
+        return job
+
+
+class JobQueue(ABC):
+    """Queue of background jobs with delayed retries, a dead letter list and counters."""
+
+    @abstractmethod
+    async def enqueue(self, job: Job, delay: float = 0) -> None:
+        """
+        Add a job.
+
+        :param job: Job to run.
+        :param delay: Seconds to wait before the job is ready.
+        """
+
+    async def enqueue_many(self, jobs: Sequence[Job]) -> None:
+        """
+        Add ready jobs.
+
+        :param jobs: Jobs to run.
+        """
+        for job in jobs:
+            await self.enqueue(job)
+
+    @abstractmethod
+    async def dequeue(self, timeout: float) -> Optional[Job]:
+        """
+        Take the next ready job, which has to be acknowledged with `ack`, `retry` or `fail`.
+
+        :param timeout: Seconds to wait for a job.
+        :return: Job / None if no job got ready in time.
+        """
+
+    @abstractmethod
+    async def ack(self, job: Job) -> None:
+        """
+        Mark a dequeued job as done.
+
+        :param job: Dequeued job.
+        """
+
+    @abstractmethod
+    async def retry(self, job: Job, delay: float) -> None:
+        """
+        Put a failed job back, to be run again after a delay.
+
+        :param job: Dequeued job, with its attempts already counted.
+        :param delay: Seconds to wait before the next attempt.
+        """
+
+    @abstractmethod
+    async def fail(self, job: Job) -> None:
+        """
+        Move a job that will not be retried to the dead letter list.
+
+        :param job: Dequeued job.
+        """
+
+    @abstractmethod
+    async def promote_due(self) -> int:
+        """
+        Make delayed jobs whose time has come ready.
+
+        :return: Number of promoted jobs.
+        """
+
+    @abstractmethod
+    async def record(self, outcome: str, wait: float, duration: float) -> None:
+        """
+        Count a run of a job.
+
+        :param outcome: `processed` / `retried` / `failed`.
+        :param wait: Seconds between the job getting ready and starting.
+        :param duration: Seconds the run took.
+        """
+
+    @abstractmethod
+    async def stats(self) -> Dict[str, Any]:
+        """
+        Get queue depths and counters.
+
+        :return: Statistics, see `JobQueueStats`.
+        """
+
+
+def summarize(depths: Dict[str, int], counters: Dict[str, float]) -> Dict[str, Any]:
+    """Combine queue depths and run counters into statistics."""
+    runs = sum(int(counters.get(outcome, 0)) for outcome in ("processed", "retried", "failed"))
+    return {
+        **depths,
+        "processed": int(counters.get("processed", 0)),
+        "retried": int(counters.get("retried", 0)),
+        "failed": int(counters.get("failed", 0)),
+        "wait_time_avg": counters.get("wait_time", 0.0) / runs if runs else 0.0,
+        "run_time_avg": counters.get("run_time", 0.0) / runs if runs else 0.0,
+    }
+
+
+class MemoryJobQueue(JobQueue):
+    """In-process queue, used when Redis is not configured. Jobs are lost on restart."""
+
+    def __init__(self, max_dead: int) -> None:
+        self.max_dead = max_dead
+        self.ready: asyncio.Queue[Job] = asyncio.Queue()
+        # (run at, sequence, job)
+        self.delayed: List[Tuple[float, int, Job]] = []
+        self.processing: Dict[str, Job] = {}
+        self.dead: List[Job] = []
+        self.counters: Dict[str, float] = {}
+        self.sequence = 0
+
+    async def enqueue(self, job: Job, delay: float = 0) -> None:
+        if delay > 0:
+            job.run_at = time.time() + delay
+            self.sequence += 1
+            heapq.heappush(self.delayed, (job.run_at, self.sequence, job))
+        else:
+            self.ready.put_nowait(job)
+
+    async def dequeue(self, timeout: float) -> Optional[Job]:
+        try:
+            job = await asyncio.wait_for(self.ready.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self.processing[job.id] = job
+        return job
+
+    async def ack(self, job: Job) -> None:
+        self.processing.pop(job.id, None)
+
+    async def retry(self, job: Job, delay: float) -> None:
+        self.processing.pop(job.id, None)
+        await self.enqueue(job, delay)
+
+    async def fail(self, job: Job) -> None:
+        self.processing.pop(job.id, None)
+        self.dead.append(job)
+        del self.dead[:-self.max_dead]
+
+    async def promote_due(self) -> int:
+        now, promoted = time.time(), 0
+        while self.delayed and self.delayed[0][0] <= now:
+            _, _, job = heapq.heappop(self.delayed)
+            self.ready.put_nowait(job)
+            promoted += 1
+        return promoted
+
+    async def record(self, outcome: str, wait: float, duration: float) -> None:
+        self.counters[outcome] = self.counters.get(outcome, 0) + 1
+        self.counters["wait_time"] = self.counters.get("wait_time", 0.0) + wait
+        self.counters["run_time"] = self.counters.get("run_time", 0.0) + duration
+
+    async def stats(self) -> Dict[str, Any]:
+        depths = {
+            "ready": self.ready.qsize(),
+            "delayed": len(self.delayed),
+            "processing": len(self.processing),
+            "dead": len(self.dead),
+        }
+        return summarize(depths, self.counters)
+
+
+class RedisJobQueue(JobQueue):
+    """
+    Redis list based queue, shared by the API and the workers.
+
+    Dequeued jobs are moved atomically to a processing list of the worker,
+    so the jobs of a worker that died are put back by `recover` instead of
+    being lost. Delayed jobs wait in a sorted set scored by their run time.
+    """
+
+    def __init__(self, client: redis.asyncio.Redis, max_dead: int, key_prefix: str = "jobs:") -> None:
+        self.client = client
+        self.max_dead = max_dead
+        self.ready_key = f"{key_prefix}ready"
+        self.delayed_key = f"{key_prefix}delayed"
+        self.dead_key = f"{key_prefix}dead"
+        self.stats_key = f"{key_prefix}stats"
+        self.processing_prefix = f"{key_prefix}processing:"
+        self.worker_prefix = f"{key_prefix}worker:"
+        self.worker_id = uuid.uuid4().hex
+        self.promote_script = client.register_script(PROMOTE_SCRIPT)
+
+    @property
+    def processing_key(self) -> str:
+        return f"{self.processing_prefix}{self.worker_id}"
+
+    async def enqueue(self, job: Job, delay: float = 0) -> None:
+        if delay > 0:
+            job.run_at = time.time() + delay
+            await self.client.zadd(self.delayed_key, {job.dump(): job.run_at})
+        else:
+            await self.client.lpush(self.ready_key, job.dump())
+
+    async def enqueue_many(self, jobs: Sequence[Job]) -> None:
+        # One round trip, the batches only bound the size of the commands
+        async with self.client.pipeline(transaction=False) as pipe:
+            for start in range(0, len(jobs), ENQUEUE_BATCH_SIZE):
+                pipe.lpush(self.ready_key, *(job.dump() for job in jobs[start:start + ENQUEUE_BATCH_SIZE]))
+            await pipe.execute()
+
+    async def dequeue(self, timeout: float) -> Optional[Job]:
+        raw = await self.client.blmove(self.ready_key, self.processing_key, timeout, "RIGHT", "LEFT")
+        return Job.load(raw) if raw is not None else None
+
+    async def ack(self, job: Job) -> None:
+        await self.client.lrem(self.processing_key, 1, job.raw)
+
+    async def retry(self, job: Job, delay: float) -> None:
+        job.run_at = time.time() + delay
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.lrem(self.processing_key, 1, job.raw)
+            pipe.zadd(self.delayed_key, {job.dump(): job.run_at})
+            await pipe.execute()
+
+    async def fail(self, job: Job) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.lrem(self.processing_key, 1, job.raw)
+            pipe.lpush(self.dead_key, job.dump())
+            pipe.ltrim(self.dead_key, 0, self.max_dead - 1)
+            await pipe.execute()
+
+    async def promote_due(self) -> int:
+        return await self.promote_script(
+            keys=[self.delayed_key, self.ready_key], args=[time.time(), PROMOTE_BATCH_SIZE]
+        )
+
+    async def heartbeat(self, ttl: int) -> None:
+        """
+        Mark this worker as alive.
+
+        :param ttl: Seconds after which the worker counts as dead.
+        """
+        await self.client.set(f"{self.worker_prefix}{self.worker_id}", 1, ex=ttl)
+
+    async def recover(self) -> int:
+        """
+        Put the jobs of dead workers back in the ready list.
+
+        :return: Number of recovered jobs.
+        """
+        recovered = 0
+        async for key in self.client.scan_iter(match=f"{self.processing_prefix}*"):
+            worker_id = key.removeprefix(self.processing_prefix)
+            if await self.client.exists(f"{self.worker_prefix}{worker_id}"):
+                continue
+            while await self.client.lmove(key, self.ready_key, "RIGHT", "LEFT"):
+                recovered += 1
+        return recovered
+
+    async def record(self, outcome: str, wait: float, duration: float) -> None:
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.hincrby(self.stats_key, outcome, 1)
+                pipe.hincrbyfloat(self.stats_key, "wait_time", wait)
+                pipe.hincrbyfloat(self.stats_key, "run_time", duration)
+                await pipe.execute()
+        except RedisError:
+            logger.warning("Job metrics update failed", exc_info=True)
+
+    async def stats(self) -> Dict[str, Any]:
+        processing = 0
+        async for key in self.client.scan_iter(match=f"{self.processing_prefix}*"):
+            processing += await self.client.llen(key)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.llen(self.ready_key)
+            pipe.zcard(self.delayed_key)
+            pipe.llen(self.dead_key)
+            pipe.hgetall(self.stats_key)
+            ready, delayed, dead, counters = await pipe.execute()
+        depths = {"ready": ready, "delayed": delayed, "processing": processing, "dead": dead}
+        return summarize(depths, {key: float(value) for key, value in counters.items()})
+
+
+job_queue: JobQueue = (
+    RedisJobQueue(jobs_redis, settings.JOBS_MAX_DEAD) if jobs_redis else MemoryJobQueue(settings.JOBS_MAX_DEAD)
+)
+
+
+async def enqueue(name: str, delay: float = 0, **payload: Any) -> None:
+    """
+    Queue a job, without waiting for it to run.
+
+    Queue errors are logged, so the request that dispatches the job is not failed by them.
+
+    :param name: Job name, see `JobName`.
+    :param delay: Seconds to wait before the job is ready.
+    :param payload: JSON serializable keyword arguments of the job handler.
+    """
+    try:
+        name = name.value if isinstance(name, Enum) else name
+        await job_queue.enqueue(Job(name=name, payload=payload), delay)
+    except RedisError:
+        logger.error(f"Could not queue job {name}", exc_info=True)
+
+
+async def enqueue_many(name: str, payloads: Iterable[Dict[str, Any]]) -> None:
+    """
+    Queue one job per payload, e.g. one per recipient so a retry repeats one delivery only.
+
+    Queue errors are logged, see `enqueue`.
+
+    :param name: Job name, see `JobName`.
+    :param payloads: JSON serializable keyword arguments of the job handler, per job.
+    """
+    name = name.value if isinstance(name, Enum) else name
+    jobs = [Job(name=name, payload=payload) for payload in payloads]
+    try:
+        if jobs:
+            await job_queue.enqueue_many(jobs)
+    except RedisError:
+        logger.error(f"Could not queue {len(jobs)} jobs {name}", exc_info=True)
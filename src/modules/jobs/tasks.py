@@ -0,0 +1,139 @@
+import uuid
+import logging
+from enum import Enum
+
+from fastapi_users.db import SQLAlchemyUserDatabase
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from sqlalchemy.ext.asyncio.session import AsyncSession
+
+from src.db.session import engine
+from src.models.book import Book, BookRequest, BookRequestStatus
+from src.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class JobName(str, Enum):
+    SEND_RESET_PASSWORD_EMAIL = "send_reset_password_email"
+    SEND_VERIFY_EMAIL = "send_verify_email"
+    NOTIFY_BOOK_REQUEST_CREATED = "notify_book_request_created"
+    NOTIFY_BOOK_REQUEST_DECIDED = "notify_book_request_decided"
+
+
+async def send_email(to: str, subject: str, body: str) -> None:
+    """
+    Deliver an e-mail.
+
+    No mail server is configured yet, so delivery is logged. Raising here
+    makes the job retry with backoff.
+
+    :param to: Recipient address.
+    :param subject: Subject.
+    :param body: Plain text body.
+    """
+    logger.info(f"Send email to {to}: {subject}\n{body}")
+
+
+async def send_reset_password_email(user_id: str) -> None:
+    """
+    Send a password reset token.
+
+    The token is generated here rather than queued, so failed jobs kept in
+    the dead letter list hold no usable tokens.
+
+    :param user_id: User id.
+    """
+    # The auth module queues this job, so it is imported on use
+    from src.modules.auth.manager import UserManager
+
+    async with AsyncSession(engine) as session:
+        user = await session.get(User, uuid.UUID(user_id))
+        if user is None or not user.is_active:
+            return
+        token = UserManager(SQLAlchemyUserDatabase(session, User)).reset_password_token(user)
+    await send_email(user.email, "Reset your password", f"Your password reset token: {token}")
+
+
+async def send_verify_email(user_id: str) -> None:
+    """
+    Send an e-mail verification token, generated here like the password reset one.
+
+    :param user_id: User id.
+    """
+    from src.modules.auth.manager import UserManager
+
+    async with AsyncSession(engine) as session:
+        user = await session.get(User, uuid.UUID(user_id))
+        if user is None or not user.is_active or user.is_verified:
+            return
+        token = UserManager(SQLAlchemyUserDatabase(session, User)).verification_token(user)
+    await send_email(user.email, "Verify your e-mail", f"Your verification token: {token}")
+
+
+async def notify_book_request_created(request_id: int) -> None:
+    """
+    Tell the owner of a book that it was requested.
+
+    :param request_id: Book request id.
+    """
+    async with AsyncSession(engine) as session:
+        book_request = await session.scalar(
+            select(BookRequest)
+            .where(BookRequest.id == request_id)
+            .options(
+                joinedload(BookRequest.book).joinedload(Book.owner),
+                joinedload(BookRequest.requester),
+            )
+        )
+    # Requests of deleted books are not notified
+    if book_request is None or book_request.book.owner is None:
+        return
+
+    await send_email(
+        book_request.book.owner.email,
+        f"New request for {book_request.book.name}",
+        f"{book_request.requester.email} requested your book {book_request.book.name}.",
+    )
+
+
+async def notify_book_request_decided(request_id: int, event: str) -> None:
+    """
+    Tell a requester whether their request was accepted.
+
+    Accepting a request queues one job per requester of the book, so a
+    failed delivery is retried without repeating the others.
+
+    :param request_id: Book request id.
+    :param event: `accepted` or `rejected`.
+    """
+    async with AsyncSession(engine) as session:
+        book_request = await session.scalar(
+            select(BookRequest)
+            .where(BookRequest.id == request_id)
+            .options(joinedload(BookRequest.book), joinedload(BookRequest.requester))
+        )
+    if book_request is None:
+        return
+
+    book_name = book_request.book.name
+    if event == BookRequestStatus.ACCEPTED.value:
+        await send_email(
+            book_request.requester.email,
+            f"Your request for {book_name} was accepted",
+            f"The owner accepted your request for {book_name}.",
+        )
+    else:
+        await send_email(
+            book_request.requester.email,
+            f"Your request for {book_name} was rejected",
+            f"The owner gave {book_name} to someone else.",
+        )
+
+
+job_handlers = {
+    JobName.SEND_RESET_PASSWORD_EMAIL: send_reset_password_email,
+    JobName.SEND_VERIFY_EMAIL: send_verify_email,
+    JobName.NOTIFY_BOOK_REQUEST_CREATED: notify_book_request_created,
+    JobName.NOTIFY_BOOK_REQUEST_DECIDED: notify_book_request_decided,
+}
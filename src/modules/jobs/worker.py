@@ -0,0 +1,147 @@
+"""
+Background job worker.
+
+Runs the jobs queued in Redis:
+
+    python -m src.modules.jobs.worker
+
+Without Redis the jobs are queued in memory and run by a worker inside
+the app, started with it.
+"""
+import time
+import random
+import asyncio
+import logging
+import signal
+from typing import Awaitable, Callable, Dict
+
+from redis.exceptions import RedisError
+
+from src.core.config import settings
+from src.core.logger import configure_logger
+from src.modules.jobs.queue import Job, JobQueue, RedisJobQueue, job_queue
+from src.modules.jobs.tasks import job_handlers
+
+logger = logging.getLogger(__name__)
+
+
+def retry_delay(attempts: int) -> float:
+    """
+    Exponential backoff with jitter.
+
+    :param attempts: Attempts made so far.
+    :return: Seconds to wait before the next attempt.
+    """
+    delay = min(settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1), settings.JOBS_RETRY_BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)
+
+
+class Worker:
+    """Runs queued jobs with a fixed number of concurrent consumers."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: Dict[str, Callable[..., Awaitable[None]]],
+        concurrency: int,
+        poll_interval: float
+    ) -> None:
+        self.queue = queue
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.stopping = asyncio.Event()
+
+    async def process(self, job: Job) -> None:
+        """
+        Run a job, then acknowledge it, retry it with backoff or move it to the dead letters.
+
+        :param job: Dequeued job.
+        """
+        started = time.time()
+        wait = max(started - job.run_at, 0.0)
+        handler = self.handlers.get(job.name)
+        job.attempts += 1
+        try:
+            if handler is None:
+                raise LookupError(f"Unknown job {job.name}")
+            await handler(**job.payload)
+        except Exception:
+            duration = time.time() - started
+            if handler is None or job.attempts >= settings.JOBS_MAX_ATTEMPTS:
+                logger.exception(f"Job {job.name} {job.id} failed after {job.attempts} attempts")
+                await self.queue.fail(job)
+                await self.queue.record("failed", wait, duration)
+            else:
+                delay = retry_delay(job.attempts)
+                logger.warning(f"Job {job.name} {job.id} failed, retrying in {delay:.1f}s", exc_info=True)
+                await self.queue.retry(job, delay)
+                await self.queue.record("retried", wait, duration)
+            return
+
+        await self.queue.ack(job)
+        await self.queue.record("processed", wait, time.time() - started)
+
+    async def consume(self) -> None:
+        """Run jobs one after the other until the worker stops."""
+        while not self.stopping.is_set():
+            try:
+                job = await self.queue.dequeue(self.poll_interval)
+                if job is not None:
+                    await self.process(job)
+            except RedisError:
+                logger.exception("Job queue unavailable")
+                await asyncio.sleep(self.poll_interval)
+
+    async def maintain(self) -> None:
+        """Promote due retries and, with Redis, keep this worker alive and recover dead ones."""
+        while not self.stopping.is_set():
+            try:
+                if isinstance(self.queue, RedisJobQueue):
+                    await self.queue.heartbeat(ttl=int(self.poll_interval * 10) + 1)
+                    recovered = await self.queue.recover()
+                    if recovered:
+                        logger.warning(f"Recovered {recovered} jobs of stopped workers")
+                await self.queue.promote_due()
+            except RedisError:
+                logger.exception("Job queue unavailable")
+            try:
+                await asyncio.wait_for(self.stopping.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self) -> None:
+        """Run the worker until `stop` is called; jobs in progress are finished first."""
+        await asyncio.gather(self.maintain(), *(self.consume() for _ in range(self.concurrency)))
+
+    def stop(self) -> None:
+        self.stopping.set()
+
+
+def create_worker(queue: JobQueue = job_queue) -> Worker:
+    """Create a worker with the registered job handlers and the configured concurrency."""
+    return Worker(
+        queue,
+        {name.value: handler for name, handler in job_handlers.items()},
+        concurrency=settings.JOBS_CONCURRENCY,
+        poll_interval=settings.JOBS_POLL_INTERVAL,
+    )
+
+
+async def main() -> None:
+    if not isinstance(job_queue, RedisJobQueue):
+        raise RuntimeError("REDIS_HOST is not set, jobs are run by the app itself")
+
+    worker = create_worker()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, worker.stop)
+
+    logger.info(f"Job worker {job_queue.worker_id} started")
+    await worker.run()
+    logger.info(f"Job worker {job_queue.worker_id} stopped")
+
+
+if __name__ == "__main__":
+    configure_logger()
+    asyncio.run(main())
@@ -0,0 +1,266 @@
+import json
+import uuid
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Sequence, Set, Tuple
+
+import redis.asyncio
+from pydantic import BaseModel
+from redis.exceptions import RedisError
+
+from src.core.config import settings
+from src.db.redis import jobs_redis
+
+logger = logging.getLogger(__name__)
+
+
+# Put in idle subscriptions to make their streams send a keep-alive comment
+KEEPALIVE = ""
+# Messages per pipeline round trip of a batch
+PUBLISH_BATCH_SIZE = 500
+
+
+class TooManyConnections(Exception):
+    """The process already streams the configured maximum of connections."""
+
+
+class Subscription:
+    """
+    Notifications of one user for one stream.
+
+    At most `max_pending` notifications are buffered. A client that falls
+    further behind is dropped: its buffer is replaced by `None`, which ends
+    the stream, and the client is expected to reconnect and reload.
+    """
+
+    def __init__(self, user_id: str, max_pending: int) -> None:
+        self.user_id = user_id
+        self.queue: asyncio.Queue[Optional[str]] = asyncio.Queue(max_pending + 1)
+        self.max_pending = max_pending
+        self.overflowed = False
+
+    def put(self, message: str) -> None:
+        if self.overflowed:
+            return
+        if self.queue.qsize() < self.max_pending:
+            self.queue.put_nowait(message)
+            return
+
+        self.overflowed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def get(self) -> Optional[str]:
+        """
+        Wait for the next notification.
+
+        :return: Notification / `KEEPALIVE` / None if the subscription overflowed.
+        """
+        return await self.queue.get()
+
+
+class NotificationBroker(ABC):
+    """
+    Publishes user notifications and fans them out to the streams of this process.
+
+    Idle streams are woken every `keepalive` seconds by one task for all of
+    them, rather than a timer per stream.
+    """
+
+    def __init__(self, max_connections: int, max_pending: int, keepalive: float) -> None:
+        self.max_connections = max_connections
+        self.max_pending = max_pending
+        self.keepalive = keepalive
+        self.subscriptions: Dict[str, Set[Subscription]] = {}
+        self.connections = 0
+        self.pinger: Optional[asyncio.Task] = None
+
+    @abstractmethod
+    async def publish(self, user_id: uuid.UUID, message: str) -> None:
+        """
+        Send a notification to all streams of a user.
+
+        :param user_id: Notified user id.
+        :param message: Serialized notification.
+        """
+
+    async def publish_many(self, messages: Sequence[Tuple[uuid.UUID, str]]) -> None:
+        """
+        Send notifications to many users.
+
+        :param messages: Notified user ids and serialized notifications.
+        """
+        for user_id, message in messages:
+            await self.publish(user_id, message)
+
+    async def subscribe(self, user_id: uuid.UUID) -> Subscription:
+        """
+        Start receiving the notifications of a user.
+
+        :param user_id: User id.
+        :raises TooManyConnections: The connection limit of the process is reached.
+        :return: Subscription, to be passed to `unsubscribe` when the stream ends.
+        """
+        if self.connections >= self.max_connections:
+            raise TooManyConnections()
+        subscription = Subscription(str(user_id), self.max_pending)
+        self.subscriptions.setdefault(subscription.user_id, set()).add(subscription)
+        self.connections += 1
+        if self.pinger is None or self.pinger.done():
+            self.pinger = asyncio.create_task(self.ping())
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self.subscriptions.get(subscription.user_id, set())
+        if subscription in subscriptions:
+            subscriptions.discard(subscription)
+            self.connections -= 1
+        if not subscriptions:
+            self.subscriptions.pop(subscription.user_id, None)
+
+    def deliver(self, user_id: str, message: str) -> None:
+        """Hand a notification to the streams of a user in this process."""
+        for subscription in self.subscriptions.get(user_id, ()):
+            subscription.put(message)
+
+    async def ping(self) -> None:
+        """Wake the idle streams every `keepalive` seconds."""
+        while True:
+            await asyncio.sleep(self.keepalive)
+            for subscriptions in list(self.subscriptions.values()):
+                for subscription in subscriptions:
+                    if subscription.queue.empty():
+                        subscription.queue.put_nowait(KEEPALIVE)
+
+    async def close(self) -> None:
+        """Stop the background tasks of the broker."""
+        await cancel(self.pinger)
+        self.pinger = None
+
+
+class MemoryNotificationBroker(NotificationBroker):
+    """In-process broker, used when Redis is not configured. Reaches one process only."""
+
+    async def publish(self, user_id: uuid.UUID, message: str) -> None:
+        self.deliver(str(user_id), message)
+
+
+class RedisNotificationBroker(NotificationBroker):
+    """
+    Redis pub/sub broker, shared by all processes.
+
+    Every process holds one subscription to a single channel, whatever
+    the number of streams it serves, and delivers the notifications of
+    the users it has streams for.
+    """
+
+    def __init__(
+        self,
+        client: redis.asyncio.Redis,
+        max_connections: int,
+        max_pending: int,
+        keepalive: float,
+        channel: str = "notifications",
+        subscribe_timeout: float = 5.0
+    ) -> None:
+        super().__init__(max_connections, max_pending, keepalive)
+        self.client = client
+        self.channel = channel
+        self.subscribe_timeout = subscribe_timeout
+        self.listener: Optional[asyncio.Task] = None
+        self.listening = asyncio.Event()
+
+    async def publish(self, user_id: uuid.UUID, message: str) -> None:
+        await self.client.publish(self.channel, json.dumps({"user_id": str(user_id), "message": message}))
+
+    async def publish_many(self, messages: Sequence[Tuple[uuid.UUID, str]]) -> None:
+        # One round trip per batch instead of one per message
+        for start in range(0, len(messages), PUBLISH_BATCH_SIZE):
+            async with self.client.pipeline(transaction=False) as pipe:
+                for user_id, message in messages[start:start + PUBLISH_BATCH_SIZE]:
+                    pipe.publish(self.channel, json.dumps({"user_id": str(user_id), "message": message}))
+                await pipe.execute()
+
+    async def subscribe(self, user_id: uuid.UUID) -> Subscription:
+        subscription = await super().subscribe(user_id)
+        if self.listener is None or self.listener.done():
+            self.listening.clear()
+            self.listener = asyncio.create_task(self.listen())
+        # Notifications published before the channel subscription would be missed
+        try:
+            await asyncio.wait_for(self.listening.wait(), self.subscribe_timeout)
+        except asyncio.TimeoutError:
+            await self.unsubscribe(subscription)
+            raise RedisError("Notification channel unavailable")
+        return subscription
+
+    async def listen(self) -> None:
+        """Deliver the messages of the channel, resubscribing after Redis errors."""
+        while True:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                self.listening.set()
+                async for item in pubsub.listen():
+                    data = json.loads(item["data"])
+                    self.deliver(data["user_id"], data["message"])
+            except RedisError:
+                logger.warning("Notification channel unavailable, resubscribing", exc_info=True)
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.reset()
+
+    async def close(self) -> None:
+        await super().close()
+        await cancel(self.listener)
+        self.listener = None
+
+
+async def cancel(task: Optional[asyncio.Task]) -> None:
+    """Cancel a background task and wait for it to end."""
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+# Pub/sub channels are not scoped by database, so the jobs client is shared
+broker_args = (settings.NOTIFICATIONS_MAX_CONNECTIONS, settings.NOTIFICATIONS_MAX_PENDING, settings.NOTIFICATIONS_KEEPALIVE)
+notification_broker: NotificationBroker = (
+    RedisNotificationBroker(jobs_redis, *broker_args) if jobs_redis else MemoryNotificationBroker(*broker_args)
+)
+
+
+async def notify(user_id: uuid.UUID, notification: BaseModel) -> None:
+    """
+    Send a notification to the open streams of a user.
+
+    Notifications are not stored; users without an open stream miss them.
+    Broker errors are logged, so the request that notifies is not failed by them.
+
+    :param user_id: Notified user id.
+    :param notification: Notification.
+    """
+    try:
+        await notification_broker.publish(user_id, notification.model_dump_json())
+    except RedisError:
+        logger.error(f"Could not notify user {user_id}", exc_info=True)
+
+
+async def notify_many(notifications: Sequence[Tuple[uuid.UUID, BaseModel]]) -> None:
+    """
+    Send notifications to the open streams of many users, see `notify`.
+
+    :param notifications: Notified user ids and notifications.
+    """
+    try:
+        await notification_broker.publish_many([
+            (user_id, notification.model_dump_json()) for user_id, notification in notifications
+        ])
+    except RedisError:
+        logger.error(f"Could not notify {len(notifications)} users", exc_info=True)
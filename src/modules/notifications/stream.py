@@ -0,0 +1,38 @@
+from typing import AsyncIterator
+
+from src.modules.notifications.broker import KEEPALIVE, NotificationBroker, Subscription
+
+
+def format_event(data: str, event: str | None = None) -> str:
+    """
+    Format a server-sent event.
+
+    :param data: Event data, on one line.
+    :param event: Event type / None for the default `message` type.
+    :return: Event, terminated by an empty line.
+    """
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {data}\n\n"
+
+
+async def event_stream(broker: NotificationBroker, subscription: Subscription) -> AsyncIterator[str]:
+    """
+    Stream the notifications of a subscription as server-sent events.
+
+    Idle streams get keep-alive comments, so proxies keep them open and
+    closed connections are noticed. The stream ends with an `overflow`
+    event when the client fell too far behind; the subscription is
+    released when the stream ends or the client disconnects.
+
+    :param broker: Broker of the subscription.
+    :param subscription: Subscription to stream.
+    """
+    try:
+        while True:
+            message = await subscription.get()
+            if message is None:
+                yield format_event("{}", event="overflow")
+                return
+            yield format_event(message) if message != KEEPALIVE else ": keep-alive\n\n"
+    finally:
+        await broker.unsubscribe(subscription)
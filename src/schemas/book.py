@@ -1,8 +1,9 @@
 import uuid
 from typing import List
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
+from src.models.base import INT4_MAX
 from src.models.book import BookCondition, BookRequestStatus
 from src.schemas.author import AuthorRead
 from src.schemas.genre import GenreRead
@@ -17,9 +18,17 @@ class BookBase(BaseModel):
 
 class BookLocationBase(BaseModel):
     address: str
+    latitude: float | None = Field(None, ge=-90, le=90)
+    longitude: float | None = Field(None, ge=-180, le=180)
 
     model_config = ConfigDict(from_attributes=True)
 
+    @model_validator(mode="after")
+    def check_coordinates(self) -> "BookLocationBase":
+        if (self.latitude is None) != (self.longitude is None):
+            raise ValueError("latitude and longitude must be set together")
+        return self
+
 
 class BookRequestBase(BaseModel):
 
@@ -47,16 +56,58 @@ class BookUpdate(BookBase):
     genre_id: int = 1
 
 
+class BookImportRow(BaseModel):
+    # Limits of the columns, so rows the database would reject fail with their line
+    name: str = Field(max_length=100)
+    description: str = Field("", max_length=500)
+    condition: BookCondition
+    page_count: int = Field(ge=0, le=INT4_MAX)
+    author_id: int | None = Field(None, ge=1, le=INT4_MAX)
+    author: str | None = Field(None, max_length=100)
+    genre_id: int | None = Field(None, ge=1, le=INT4_MAX)
+    genre: str | None = Field(None, max_length=100)
+
+    @model_validator(mode="after")
+    def check_references(self) -> "BookImportRow":
+        if self.author_id is None and not self.author:
+            raise ValueError("author or author_id is required")
+        if self.genre_id is None and not self.genre:
+            raise ValueError("genre or genre_id is required")
+        return self
+
+
+class BookImportError(BaseModel):
+    line: int
+    detail: str
+
+
+class BookImportResult(BaseModel):
+    created: int = 0
+    failed: int = 0
+    errors: List[BookImportError] = []
+
+
 class BookLocationRead(BookLocationBase):
     book: BookRead
 
 
+class BookPopularRead(BookRead):
+    request_count: int
+    pending_count: int
+
+
+class BookNearbyRead(BaseModel):
+    book: BookRead
+    location: BookLocationBase
+    distance: float
+
+
 class BookLocationCreate(BookLocationBase):
     book_id: int
 
 
 class BookLocationUpdate(BookLocationBase):
-    book_id: int
+    pass
 
 
 class BookRequestRead(BookRequestBase):
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+
+
+class PoolStats(BaseModel):
+    size: int
+    max_overflow: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    waits: int
+    timeouts: int
+    wait_time_total: float
+    wait_time_max: float
+
+
+class JobQueueStats(BaseModel):
+    ready: int
+    delayed: int
+    processing: int
+    dead: int
+    processed: int
+    retried: int
+    failed: int
+    wait_time_avg: float
+    run_time_avg: float
@@ -0,0 +1,12 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+from src.models.book import BookRequestStatus
+
+
+class BookRequestNotification(BaseModel):
+    event: Literal["book_request_created", "book_request_accepted", "book_request_rejected"]
+    request_id: int
+    book_id: int
+    status: BookRequestStatus
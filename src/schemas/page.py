@@ -0,0 +1,15 @@
+from typing import Generic, List, TypeVar
+
+from pydantic import BaseModel
+
+ItemType = TypeVar("ItemType")
+
+
+class PaginationParams(BaseModel):
+    cursor: str | None = None
+    limit: int
+
+
+class Page(BaseModel, Generic[ItemType]):
+    items: List[ItemType]
+    next_cursor: str | None = None
@@ -0,0 +1,90 @@
+import io
+import csv
+import json
+import uuid
+from enum import Enum
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Sequence
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio.session import AsyncSession
+
+from src import crud
+from src.db.session import engine
+
+# Columns of an exported book, the import columns come first
+EXPORT_COLUMNS = [
+    "name", "description", "condition", "page_count", "author", "genre", "id", "owner_id", "updated_at"
+]
+
+
+def export_value(value: Any) -> Any:
+    """Convert a column value into a JSON and CSV friendly value."""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def export_record(row: Row) -> Dict[str, Any]:
+    """Convert an exported row into a record with the export columns."""
+    values = row._mapping
+    return {column: export_value(values[column]) for column in EXPORT_COLUMNS}
+
+
+def format_ndjson(rows: Sequence[Row]) -> bytes:
+    """
+    Format rows as NDJSON lines.
+
+    :param rows: Exported rows.
+    :return: Encoded lines.
+    """
+    return "".join(json.dumps(export_record(row)) + "\n" for row in rows).encode()
+
+
+def format_csv(rows: Sequence[Row], header: bool = False) -> bytes:
+    """
+    Format rows as CSV records, in the format accepted by the CSV import.
+
+    :param rows: Exported rows.
+    :param header: Start with the header row.
+    :return: Encoded records.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, lineterminator="\n")
+    if header:
+        writer.writeheader()
+    writer.writerows(export_record(row) for row in rows)
+    return buffer.getvalue().encode()
+
+
+async def export_books(
+    export_format: str,
+    genre: str | None = None,
+    author: str | None = None,
+    condition: str | None = None,
+    updated_since: datetime | None = None
+) -> AsyncIterator[bytes]:
+    """
+    Export books as a stream of NDJSON or CSV chunks.
+
+    The export outlives the request session, as the response body is sent
+    after the endpoint returns, so it runs in a session of its own.
+
+    :param export_format: `ndjson` / `csv`.
+    :param genre: Genre name.
+    :param author: Author name.
+    :param condition: Book condition.
+    :param updated_since: Only books updated at or after this naive UTC time.
+    :return: Encoded chunks.
+    """
+    if export_format == "csv":
+        yield format_csv([], header=True)
+
+    async with AsyncSession(engine) as session:
+        chunks = crud.book.stream_export(genre, author, condition, updated_since, db_session=session)
+        async for rows in chunks:
+            yield format_csv(rows) if export_format == "csv" else format_ndjson(rows)
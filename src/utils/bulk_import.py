@@ -0,0 +1,227 @@
+import io
+import csv
+import json
+import codecs
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import exc
+from fastapi_async_sqlalchemy import db
+
+from src import crud
+from src.core.config import settings
+from src.schemas.book import BookCreate, BookImportRow, BookImportError, BookImportResult
+
+# Line number and either the parsed row or a parse error message
+ParsedRow = Tuple[int, Dict[str, Any] | str]
+
+
+async def iter_records(
+    stream: AsyncIterator[bytes],
+    csv_quoting: bool = False
+) -> AsyncIterator[Tuple[int, str | None]]:
+    """
+    Split a byte stream into text records without buffering the whole body.
+
+    Records longer than `BOOK_IMPORT_MAX_RECORD_BYTES` are dropped and
+    yielded as None, so memory stays bounded by the record size limit.
+
+    :param stream: Request body stream.
+    :param csv_quoting: Keep newlines inside quoted CSV fields in one record.
+    :return: Line number where the record starts and the record text / None.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    max_size = settings.BOOK_IMPORT_MAX_RECORD_BYTES
+    buffer, record = "", ""
+    line_no, record_line, oversized = 0, 1, False
+
+    async def lines() -> AsyncIterator[str | None]:
+        nonlocal buffer
+        async for chunk in stream:
+            buffer += decoder.decode(chunk)
+            *complete, buffer = buffer.split("\n")
+            for line in complete:
+                yield line
+            if len(buffer) > max_size:
+                # None marks a dropped piece of an oversized line
+                buffer = ""
+                yield None
+        buffer += decoder.decode(b"", final=True)
+        if buffer:
+            yield buffer
+
+    async for line in lines():
+        if line is None:
+            oversized = True
+            continue
+
+        line_no += 1
+        record = f"{record}\n{line}" if record else line
+        if oversized or len(record) > max_size:
+            yield record_line, None
+            record, record_line, oversized = "", line_no + 1, False
+            continue
+        # An odd number of quotes means a quoted field continues on the next line
+        if csv_quoting and record.count('"') % 2:
+            continue
+
+        yield record_line, record.rstrip("\r")
+        record, record_line = "", line_no + 1
+
+    if oversized or record:
+        yield record_line, None if oversized else record
+
+
+async def iter_ndjson_rows(stream: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+    """
+    Parse an NDJSON stream into rows.
+
+    :param stream: Request body stream.
+    :return: Line number and row / error message.
+    """
+    async for line_no, record in iter_records(stream):
+        if record is None:
+            yield line_no, "Record too long"
+            continue
+        if not record.strip():
+            continue
+        try:
+            row = json.loads(record)
+        except ValueError:
+            yield line_no, "Invalid JSON"
+            continue
+        yield line_no, row if isinstance(row, dict) else "Row must be a JSON object"
+
+
+async def iter_csv_rows(stream: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+    """
+    Parse a CSV stream with a header row into rows. Empty cells are omitted.
+
+    :param stream: Request body stream.
+    :return: Line number and row / error message.
+    """
+    header = None
+    async for line_no, record in iter_records(stream, csv_quoting=True):
+        if record is None:
+            yield line_no, "Record too long"
+            continue
+        if not record.strip():
+            continue
+        try:
+            values = next(csv.reader(io.StringIO(record)))
+        except (csv.Error, StopIteration):
+            yield line_no, "Invalid CSV record"
+            continue
+
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield line_no, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield line_no, {key: value for key, value in zip(header, values) if value != ""}
+
+
+async def import_chunk(
+    chunk: List[ParsedRow],
+    owner_id: uuid.UUID,
+    create_missing: bool,
+    result: BookImportResult
+) -> None:
+    """
+    Validate, resolve references and insert one chunk of rows.
+
+    :param chunk: Parsed rows.
+    :param owner_id: Owner of the imported books.
+    :param create_missing: Create authors and genres that do not exist.
+    :param result: Import result to update.
+    """
+    def fail(line: int, detail: str) -> None:
+        result.failed += 1
+        if len(result.errors) < settings.BOOK_IMPORT_MAX_ERRORS:
+            result.errors.append(BookImportError(line=line, detail=detail))
+
+    rows = []
+    for line, row in chunk:
+        if isinstance(row, str):
+            fail(line, row)
+            continue
+        try:
+            rows.append((line, BookImportRow.model_validate(row)))
+        except ValidationError as e:
+            fail(line, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+
+    # One lookup per referenced table for the whole chunk
+    author_names = await crud.author.get_ids_by_field(
+        "full_name", {row.author for _, row in rows if row.author_id is None}, create_missing
+    )
+    genre_names = await crud.genre.get_ids_by_field(
+        "name", {row.genre for _, row in rows if row.genre_id is None}, create_missing
+    )
+    author_ids = await crud.author.get_ids_by_field("id", {row.author_id for _, row in rows} - {None})
+    genre_ids = await crud.genre.get_ids_by_field("id", {row.genre_id for _, row in rows} - {None})
+
+    lines, books_new = [], []
+    for line, row in rows:
+        author_id = row.author_id if row.author_id in author_ids else author_names.get(row.author)
+        genre_id = row.genre_id if row.genre_id in genre_ids else genre_names.get(row.genre)
+        if author_id is None:
+            fail(line, "Author not found")
+        elif genre_id is None:
+            fail(line, "Genre not found")
+        else:
+            lines.append(line)
+            books_new.append(BookCreate(
+                **row.model_dump(include={"name", "description", "condition", "page_count"}),
+                author_id=author_id,
+                genre_id=genre_id,
+                owner_id=owner_id,
+            ))
+
+    async def insert(start: int, end: int) -> int:
+        # Savepoints keep the authors and genres created above when a batch is rejected,
+        # which is split until only its bad rows are left
+        try:
+            async with db.session.begin_nested():
+                await crud.book.create_many(objs_in=books_new[start:end])
+        except exc.DBAPIError:
+            if end - start == 1:
+                fail(lines[start], "Book could not be saved")
+                return 0
+            middle = (start + end) // 2
+            return await insert(start, middle) + await insert(middle, end)
+        return end - start
+
+    if books_new:
+        result.created += await insert(0, len(books_new))
+    await db.session.commit()
+    if create_missing:
+        await crud.author.invalidate_cache()
+        await crud.genre.invalidate_cache()
+
+
+async def import_books(
+    rows: AsyncIterator[ParsedRow],
+    owner_id: uuid.UUID,
+    create_missing: bool = False
+) -> BookImportResult:
+    """
+    Import books chunk by chunk, one transaction per chunk.
+
+    :param rows: Parsed rows.
+    :param owner_id: Owner of the imported books.
+    :param create_missing: Create authors and genres that do not exist.
+    :return: Import result.
+    """
+    result = BookImportResult()
+    chunk = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= settings.BOOK_IMPORT_CHUNK_SIZE:
+            await import_chunk(chunk, owner_id, create_missing, result)
+            chunk = []
+    if chunk:
+        await import_chunk(chunk, owner_id, create_missing, result)
+
+    return result
@@ -2,21 +2,20 @@ import contextlib
 from sqlalchemy import delete
 from fastapi_async_sqlalchemy import db
 
+from src import crud
 from src.schemas.user import UserCreate
 from src.modules.auth.manager import get_user_manager
 from src.models.user import get_user_db
-from src.db.session import get_async_session
 from src.models import User, BookLocation, Author, Genre, Book, BookRequest
 
 
-get_async_session_context = contextlib.asynccontextmanager(get_async_session)
 get_user_db_context = contextlib.asynccontextmanager(get_user_db)
 get_user_manager_context = contextlib.asynccontextmanager(get_user_manager)
 
 
 async def create_user(email: str, password: str, is_superuser: bool = False, is_verified: bool = True):
-    async with get_async_session_context() as session:
-        async with get_user_db_context(session) as user_db:
+    async with db():
+        async with get_user_db_context(db.session) as user_db:
             async with get_user_manager_context(user_db) as user_manager:
                 user = await user_manager.create(
                     UserCreate(
@@ -34,9 +33,9 @@ async def create_dummy_data():
     async with db():
         # Clear up database
         await db.session.execute(delete(BookRequest))
+        await db.session.execute(delete(BookLocation))
         await db.session.execute(delete(Book))
         await db.session.execute(delete(User))
-        await db.session.execute(delete(BookLocation))
         await db.session.execute(delete(Author))
         await db.session.execute(delete(Genre))
 
@@ -44,6 +43,9 @@ async def create_dummy_data():
 
         await db.session.commit()
 
+    await crud.author.invalidate_cache()
+    await crud.genre.invalidate_cache()
+
     # Create dummy users
     await create_user(
         "admin@gmail.com",
@@ -0,0 +1,154 @@
+import math
+from typing import Any, Iterable, List, Tuple
+
+# Mean earth radius in meters
+EARTH_RADIUS = 6_371_008.8
+
+
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Great-circle distance between two points.
+
+    :param lat1: Latitude of the first point in degrees.
+    :param lon1: Longitude of the first point in degrees.
+    :param lat2: Latitude of the second point in degrees.
+    :param lon2: Longitude of the second point in degrees.
+    :return: Distance in meters.
+    """
+    d_lat = math.radians(lat2 - lat1)
+    d_lon = math.radians(lon2 - lon1)
+    a = (
+        math.sin(d_lat / 2) ** 2
+        + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(d_lon / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def bounding_box(lat: float, lon: float, radius: float) -> Tuple[float, float, List[Tuple[float, float]]]:
+    """
+    Latitude and longitude ranges that contain every point within a radius.
+
+    The longitude range is split in two when it crosses the antimeridian and
+    covers every longitude when the circle contains a pole.
+
+    :param lat: Latitude of the center in degrees.
+    :param lon: Longitude of the center in degrees.
+    :param radius: Radius in meters.
+    :return: Min latitude, max latitude and longitude ranges.
+    """
+    d_lat = math.degrees(radius / EARTH_RADIUS)
+    min_lat, max_lat = lat - d_lat, lat + d_lat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), min(max_lat, 90.0), [(-180.0, 180.0)]
+
+    d_lon = math.degrees(math.asin(min(math.sin(radius / EARTH_RADIUS) / math.cos(math.radians(lat)), 1.0)))
+    min_lon, max_lon = lon - d_lon, lon + d_lon
+    if min_lon < -180:
+        return min_lat, max_lat, [(min_lon + 360, 180.0), (-180.0, max_lon)]
+    if max_lon > 180:
+        return min_lat, max_lat, [(min_lon, 180.0), (-180.0, max_lon - 360)]
+    return min_lat, max_lat, [(min_lon, max_lon)]
+
+
+def to_unit_vector(lat: float, lon: float) -> Tuple[float, float, float]:
+    """Point on the unit sphere, where straight-line distance grows with great-circle distance."""
+    lat, lon = math.radians(lat), math.radians(lon)
+    cos_lat = math.cos(lat)
+    return cos_lat * math.cos(lon), cos_lat * math.sin(lon), math.sin(lat)
+
+
+class KDTree:
+    """
+    In-memory KD-tree over points on the earth, for radius queries.
+
+    Points are indexed as 3D unit vectors, so there is no distortion near the
+    poles or the antimeridian. Stands in for the coordinate index on databases
+    other than PostgreSQL, mainly for tests.
+    """
+
+    def __init__(self, points: Iterable[Tuple[Any, float, float]], leaf_size: int = 32) -> None:
+        """
+        Build the tree.
+
+        :param points: Point ids with their latitude and longitude in degrees.
+        :param leaf_size: Max points in a leaf.
+        """
+        self.ids, self.lats, self.lons = [], [], []
+        for point_id, lat, lon in points:
+            self.ids.append(point_id)
+            self.lats.append(lat)
+            self.lons.append(lon)
+        self.coords = [[], [], []]
+        for lat, lon in zip(self.lats, self.lons):
+            for axis, value in enumerate(to_unit_vector(lat, lon)):
+                self.coords[axis].append(value)
+
+        self.leaf_size = leaf_size
+        self.order = list(range(len(self.ids)))
+        # Leaves are (-1, start, end, None), inner nodes are (axis, split, left, right)
+        self.nodes: List[Tuple[int, Any, Any, Any]] = []
+        self.root = self._build(0, len(self.order)) if self.order else None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _build(self, start: int, end: int) -> int:
+        """Build the subtree of `order[start:end]` and return its node index."""
+        if end - start <= self.leaf_size:
+            self.nodes.append((-1, start, end, None))
+            return len(self.nodes) - 1
+
+        # Split on the axis with the widest spread, estimated on a sample
+        sample = self.order[start:end:max(1, (end - start) // 256)]
+        spreads = []
+        for values in self.coords:
+            part = [values[i] for i in sample]
+            spreads.append(max(part) - min(part))
+        axis = spreads.index(max(spreads))
+        values = self.coords[axis]
+
+        self.order[start:end] = sorted(self.order[start:end], key=values.__getitem__)
+        middle = (start + end) // 2
+        split = values[self.order[middle]]
+        left = self._build(start, middle)
+        right = self._build(middle, end)
+        self.nodes.append((axis, split, left, right))
+        return len(self.nodes) - 1
+
+    def within(self, lat: float, lon: float, radius: float) -> List[Tuple[Any, float]]:
+        """
+        Find the points within a radius, nearest first.
+
+        :param lat: Latitude of the center in degrees.
+        :param lon: Longitude of the center in degrees.
+        :param radius: Radius in meters.
+        :return: Point ids with their distance in meters.
+        """
+        if self.root is None:
+            return []
+
+        center = to_unit_vector(lat, lon)
+        chord = 2 * math.sin(min(radius / EARTH_RADIUS, math.pi) / 2)
+        max_squared = chord * chord
+        xs, ys, zs = self.coords
+        x, y, z = center
+
+        hits = []
+        stack = [self.root]
+        while stack:
+            axis, a, b, c = self.nodes[stack.pop()]
+            if axis == -1:
+                for i in self.order[a:b]:
+                    squared = (xs[i] - x) ** 2 + (ys[i] - y) ** 2 + (zs[i] - z) ** 2
+                    if squared <= max_squared:
+                        hits.append(i)
+                continue
+            # Points equal to the split can be on either side
+            if center[axis] - chord <= a:
+                stack.append(b)
+            if center[axis] + chord >= a:
+                stack.append(c)
+
+        results = [(self.ids[i], haversine(lat, lon, self.lats[i], self.lons[i])) for i in hits]
+        results.sort(key=lambda result: (result[1], result[0]))
+        return results
@@ -0,0 +1,59 @@
+"""
+Repair the request counters of the books.
+
+Recomputes `request_count` and `pending_count` from the book requests,
+one transaction per chunk of book ids so locks stay short on large
+catalogs, and drops the cached most requested ranking afterwards. Only
+needed after requests were written around the CRUD layer, e.g. by hand
+or by a data migration.
+
+    python -m src.utils.request_counters --chunk-size 10000
+"""
+import asyncio
+import argparse
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio.session import AsyncSession
+
+from src import crud
+from src.db.ranking import popular_books
+from src.db.session import engine
+from src.models import Book
+
+
+async def repair_request_counters(chunk_size: int = 10_000) -> int:
+    """
+    Recompute the request counters of all books.
+
+    :param chunk_size: Book ids per transaction.
+    :return: Number of repaired books.
+    """
+    async with AsyncSession(engine) as session:
+        first_id, last_id = (await session.execute(select(func.min(Book.id), func.max(Book.id)))).one()
+
+    repaired = 0
+    if first_id is not None:
+        for start in range(first_id, last_id + 1, chunk_size):
+            async with AsyncSession(engine) as session:
+                repaired += await crud.book.recount_requests(start, start + chunk_size - 1, db_session=session)
+                await session.commit()
+
+    if popular_books is not None:
+        await popular_books.invalidate()
+    return repaired
+
+
+async def main(chunk_size: int) -> None:
+    engine.echo = False
+    try:
+        repaired = await repair_request_counters(chunk_size)
+    finally:
+        await engine.dispose()
+    print(f"Repaired the request counters of {repaired} books")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="Book ids per transaction")
+    args = parser.parse_args()
+    asyncio.run(main(args.chunk_size))
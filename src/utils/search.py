@@ -0,0 +1,89 @@
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str | None) -> List[str]:
+    """
+    Split text into lowercase word tokens.
+
+    :param text: Text to split.
+    :return: List of tokens.
+    """
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+def trigrams(term: str) -> Set[str]:
+    """
+    Get the trigrams of a term, padded the way pg_trgm pads words.
+
+    :param term: Lowercase term.
+    :return: Set of trigrams.
+    """
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class InvertedIndex:
+    """
+    In-memory full-text index with prefix and trigram fuzzy matching.
+
+    Stands in for the tsvector and pg_trgm indexes on databases other than
+    PostgreSQL, mainly for tests.
+    """
+
+    def __init__(self, similarity_threshold: float = 0.3) -> None:
+        self.similarity_threshold = similarity_threshold
+        # term -> document id -> weight
+        self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        # trigram -> terms
+        self.trigram_terms: Dict[str, Set[str]] = defaultdict(set)
+
+    def add(self, doc_id: int, fields: Iterable[Tuple[str | None, float]]) -> None:
+        """
+        Index a document.
+
+        :param doc_id: Document id.
+        :param fields: Field texts with their weights.
+        """
+        for text, weight in fields:
+            for term in tokenize(text):
+                postings = self.postings[term]
+                postings[doc_id] = max(postings.get(doc_id, 0.0), weight)
+                for trigram in trigrams(term):
+                    self.trigram_terms[trigram].add(term)
+
+    def _matching_terms(self, token: str) -> Dict[str, float]:
+        """Get indexed terms matching a query token with their similarity."""
+        if token in self.postings:
+            return {token: 1.0}
+
+        token_trigrams = trigrams(token)
+        candidates = set().union(*(self.trigram_terms.get(t, set()) for t in token_trigrams))
+        matches = {}
+        for term in candidates:
+            if term.startswith(token):
+                matches[term] = len(token) / len(term)
+                continue
+            term_trigrams = trigrams(term)
+            similarity = len(token_trigrams & term_trigrams) / len(token_trigrams | term_trigrams)
+            if similarity >= self.similarity_threshold:
+                matches[term] = similarity
+        return matches
+
+    def search(self, query: str) -> List[Tuple[int, float]]:
+        """
+        Find documents matching any query token.
+
+        :param query: Search query.
+        :return: Document ids and scores, best match first.
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        for token in set(tokenize(query)):
+            for term, similarity in self._matching_terms(token).items():
+                for doc_id, weight in self.postings[term].items():
+                    scores[doc_id] += weight * similarity
+
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
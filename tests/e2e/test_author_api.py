@@ -2,6 +2,7 @@ import pytest
 import requests
 
 from src.core import utils
+from src.crud.utils import encode_cursor
 from tests.utils.auth import authenticate
 from tests.utils.random_data import random_author
 
@@ -26,7 +27,38 @@ def test_get_all_authors():
     url = utils.get_api_url()
     r = requests.get(f"{url}/authors")
     assert r.status_code == 200
-    assert len(r.json()) > 0
+    assert len(r.json()["items"]) > 0
+
+
+@pytest.mark.usefixtures("restart_api")
+def test_get_authors_paginated():
+    url = utils.get_api_url()
+    first_r = requests.get(f"{url}/authors", params={"limit": 1})
+    assert first_r.status_code == 200
+    assert len(first_r.json()["items"]) == 1
+    assert first_r.json()["next_cursor"]
+
+    next_r = requests.get(
+        f"{url}/authors",
+        params={"limit": 1, "cursor": first_r.json()["next_cursor"]}
+    )
+    assert next_r.status_code == 200
+    assert next_r.json()["items"][0]["id"] > first_r.json()["items"][0]["id"]
+
+
+@pytest.mark.usefixtures("restart_api")
+def test_get_authors_invalid_cursor():
+    url = utils.get_api_url()
+    r = requests.get(f"{url}/authors", params={"cursor": "not-a-cursor"})
+    assert r.status_code == 400
+
+
+@pytest.mark.usefixtures("restart_api")
+@pytest.mark.parametrize("last_id", [True, 2 ** 70, -1])
+def test_get_authors_crafted_cursor(last_id):
+    url = utils.get_api_url()
+    r = requests.get(f"{url}/authors", params={"cursor": encode_cursor({"id": last_id})})
+    assert r.status_code == 400
 
 
 @pytest.mark.usefixtures("restart_api")
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+import requests
+
+from src.core import utils
+from tests.utils.auth import authenticate
+from tests.utils.random_data import random_suffix
+
+
+@pytest.mark.usefixtures("restart_api")
+def test_import_reports_rows_the_database_rejects():
+    auth_token = authenticate()
+    url = utils.get_api_url()
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    author_id = requests.get(f"{url}/authors/").json()["items"][0]["id"]
+    genre_id = requests.get(f"{url}/genres/").json()["items"][0]["id"]
+    name = f"Imported-{random_suffix()}"
+
+    def row(**fields):
+        return {"name": name, "condition": "new", "page_count": 100, "author_id": author_id, "genre_id": genre_id,
+                **fields}
+
+    rows = [
+        row(),
+        row(name="x" * 101),
+        row(page_count=2 ** 40),
+        row(author_id=2 ** 40),
+        # Passes validation and fails in the database
+        row(name=f"{name}\x00"),
+        row(),
+    ]
+    r = requests.post(
+        f"{url}/books/bulk",
+        data="\n".join(json.dumps(item) for item in rows),
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert r.status_code == 200
+    result = r.json()
+    assert (result["created"], result["failed"]) == (2, 4)
+    assert [error["line"] for error in result["errors"]] == [2, 3, 4, 5]
+    assert result["errors"][3]["detail"] == "Book could not be saved"
+
+    books = requests.get(f"{url}/books/", params={"limit": 100}).json()["items"]
+    for book in books:
+        if book["name"] == name:
+            requests.delete(f"{url}/books/{book['id']}", headers=headers)
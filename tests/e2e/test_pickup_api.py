@@ -0,0 +1,39 @@
+import pytest
+import requests
+
+from src.core import utils
+from src.core.config import settings
+from tests.utils.auth import authenticate
+from tests.utils.random_data import random_suffix
+
+
+def create_book(auth_token):
+    url = utils.get_api_url()
+    author_id = requests.get(f"{url}/authors/").json()["items"][0]["id"]
+    genre_id = requests.get(f"{url}/genres/").json()["items"][0]["id"]
+    r = requests.post(
+        f"{url}/books/",
+        json={"name": f"Book-{random_suffix()}", "author_id": author_id, "genre_id": genre_id,
+              "owner_id": "00000000-0000-0000-0000-000000000000"},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert r.status_code == 201
+    return r.json()["id"]
+
+
+@pytest.mark.usefixtures("restart_api")
+def test_add_pickup_location_enforces_the_limit():
+    auth_token = authenticate()
+    book_id = create_book(auth_token)
+    url = utils.get_api_url()
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    statuses = [
+        requests.post(
+            f"{url}/pickup-locations/", json={"book_id": book_id, "address": f"Street {i}"}, headers=headers
+        ).status_code
+        for i in range(settings.BOOK_LOCATIONS_MAX + 1)
+    ]
+    assert statuses == [201] * settings.BOOK_LOCATIONS_MAX + [422]
+
+    requests.delete(f"{url}/books/{book_id}", headers=headers)
@@ -0,0 +1,62 @@
+import asyncio
+from datetime import datetime
+
+from src import crud
+from src.core.config import settings
+from src.models import Book
+from src.models.book import BookCondition
+from src.utils.bulk_export import format_csv, format_ndjson
+from tests.utils.db import rollback_session
+from tests.integration.test_book_references import create_references
+
+
+def test_export_streams_filtered_rows_in_chunks(monkeypatch):
+    monkeypatch.setattr(settings, "BOOK_EXPORT_CHUNK_SIZE", 2)
+
+    async def run():
+        async with rollback_session() as session:
+            owner_id, author_id, genre_id = await create_references(session)
+            author = (await crud.author.get(_id=author_id, db_session=session)).full_name
+            session.add_all([
+                Book(
+                    name=f"Book {i}",
+                    description="",
+                    condition=BookCondition.USED if i % 2 else BookCondition.NEW,
+                    page_count=100,
+                    owner_id=owner_id,
+                    author_id=author_id,
+                    genre_id=genre_id,
+                    updated_at=datetime(2024, 1, 10 - i),
+                )
+                for i in range(5)
+            ])
+            await session.flush()
+
+            chunks = [
+                rows async for rows in crud.book.stream_export(None, author, None, db_session=session)
+            ]
+            used = [
+                row async for rows in crud.book.stream_export(
+                    None, author, BookCondition.USED, db_session=session
+                )
+                for row in rows
+            ]
+            recent = [
+                row async for rows in crud.book.stream_export(
+                    None, author, None, updated_since=datetime(2024, 1, 8), db_session=session
+                )
+                for row in rows
+            ]
+            return chunks, used, recent
+
+    chunks, used, recent = asyncio.run(run())
+    assert [len(rows) for rows in chunks] == [2, 2, 1]
+    assert [row.name for rows in chunks for row in rows] == [f"Book {i}" for i in range(5)]
+    assert [row.name for row in used] == ["Book 1", "Book 3"]
+    # Oldest update first
+    assert [row.name for row in recent] == ["Book 2", "Book 1", "Book 0"]
+
+    csv_lines = format_csv(chunks[0], header=True).decode().splitlines()
+    assert csv_lines[0] == "name,description,condition,page_count,author,genre,id,owner_id,updated_at"
+    assert csv_lines[1].startswith("Book 0,,new,100,")
+    assert format_ndjson(chunks[0]).decode().count("\n") == 2
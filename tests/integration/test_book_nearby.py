@@ -0,0 +1,66 @@
+import asyncio
+
+from src import crud
+from src.crud.book import book_read_options
+from src.models import Book, BookLocation
+from src.models.book import BookCondition
+from tests.utils.db import rollback_session
+from tests.integration.test_book_references import create_references
+
+# (latitude, longitude) of the pickup locations of every book
+BOOK_LOCATIONS = [
+    [(52.5219, 13.4132)],  # Alexanderplatz
+    [(52.5096, 13.3760), (52.5163, 13.3777)],  # Potsdamer Platz, Brandenburger Tor
+    [(52.3906, 13.0645)],  # Potsdam
+    [(48.8566, 2.3522)],  # Paris
+]
+
+
+def test_nearby_in_sql_and_in_memory():
+    async def run():
+        async with rollback_session() as session:
+            owner_id, author_id, genre_id = await create_references(session)
+            author = (await crud.author.get(_id=author_id, db_session=session)).full_name
+            for i, locations in enumerate(BOOK_LOCATIONS):
+                session.add(Book(
+                    name=f"Book {i}",
+                    condition=BookCondition.NEW if i == 2 else BookCondition.USED,
+                    owner_id=owner_id,
+                    author_id=author_id,
+                    genre_id=genre_id,
+                    locations=[
+                        BookLocation(address=f"{i}", latitude=latitude, longitude=longitude)
+                        for latitude, longitude in locations
+                    ],
+                ))
+            await session.flush()
+
+            async def nearby(condition=None, cursor=None, limit=10, in_memory=False):
+                if in_memory:
+                    query = crud.book.filter_query(None, author, condition)
+                    last = crud.book._search_cursor(cursor, key="distance")
+                    rows, next_cursor = await crud.book._nearby_in_memory(
+                        52.52, 13.405, 40_000, query, last, limit, book_read_options, session
+                    )
+                else:
+                    rows, next_cursor = await crud.book.nearby(
+                        52.52, 13.405, 40_000, None, author, condition,
+                        cursor=cursor, limit=limit, options=book_read_options, db_session=session
+                    )
+                return [(book.name, location.address, round(distance)) for book, location, distance in rows], next_cursor
+
+            results = {}
+            for in_memory in (False, True):
+                first, next_cursor = await nearby(limit=2, in_memory=in_memory)
+                second, _ = await nearby(cursor=next_cursor, limit=2, in_memory=in_memory)
+                used, _ = await nearby(condition=BookCondition.USED, in_memory=in_memory)
+                results[in_memory] = first, second, used
+            return results
+
+    results = asyncio.run(run())
+    assert results[False] == results[True]
+    first, second, used = results[False]
+    # One row per book, with its nearest location, nearest first; Paris is out of range
+    assert first == [("Book 0", "0", 594), ("Book 1", "1", 1892)]
+    assert second == [("Book 2", "2", 27191)]
+    assert [name for name, _, _ in used] == ["Book 0", "Book 1"]
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from src import crud
+from src.crud.book import book_read_options
+from src.models import User, Author, Genre
+from src.schemas.book import BookCreate
+from tests.utils.db import rollback_session, count_statements
+from tests.utils.random_data import random_suffix
+
+
+async def create_references(session):
+    owner = User(email=f"user-{random_suffix()}@example.com", hashed_password="")
+    author = Author(full_name=f"Author-{random_suffix()}")
+    genre = Genre(name=f"Genre-{random_suffix()}")
+    session.add_all([owner, author, genre])
+    await session.flush()
+    return owner.id, author.id, genre.id
+
+
+def test_create_book_missing_author_is_not_found():
+    async def run():
+        async with rollback_session() as session:
+            owner_id, _, genre_id = await create_references(session)
+            book_new = BookCreate(owner_id=owner_id, author_id=-1, genre_id=genre_id)
+            with pytest.raises(HTTPException) as e:
+                await crud.book.create(obj_in=book_new, db_session=session)
+            return e.value
+
+    error = asyncio.run(run())
+    assert error.status_code == 404
+    assert error.detail == "Author not found"
+
+
+def test_create_book_statements():
+    async def run():
+        async with rollback_session() as session:
+            owner_id, author_id, genre_id = await create_references(session)
+            book_new = BookCreate(owner_id=owner_id, author_id=author_id, genre_id=genre_id)
+            with count_statements(session.bind.engine) as statements:
+                book = await crud.book.create(obj_in=book_new, options=book_read_options, db_session=session)
+            assert book.author.id == author_id
+            return statements
+
+    # Insert, then the book with author and genre, then its locations
+    assert len(asyncio.run(run())) == 3
@@ -0,0 +1,67 @@
+import asyncio
+
+from sqlalchemy import text
+
+from src import crud
+from src.core.config import settings
+from src.models import User, Author, Genre, Book
+from tests.utils.db import rollback_session, count_statements, disconnect_redis
+from tests.utils.random_data import random_suffix
+
+
+def random_user():
+    return User(email=f"user-{random_suffix()}@example.com", hashed_password="")
+
+
+def test_count_by_params_keeps_filters():
+    async def run():
+        async with rollback_session() as session:
+            genre = Genre(name=f"Genre-{random_suffix()}")
+            author = Author(full_name=f"Author-{random_suffix()}")
+            session.add_all([
+                Book(owner=random_user(), author=author, genre=genre),
+                Book(owner=random_user(), author=author, genre=genre),
+                Book(owner=random_user(), author=Author(full_name=f"Author-{random_suffix()}"), genre=genre),
+            ])
+            await session.flush()
+
+            with count_statements(session.bind.engine) as statements:
+                by_genre = await crud.book.count_by_params(genre.name, None, None, db_session=session)
+                by_both = await crud.book.count_by_params(
+                    genre.name, author.full_name, None, db_session=session
+                )
+            return by_genre, by_both, statements
+
+    by_genre, by_both, statements = asyncio.run(run())
+    assert (by_genre, by_both) == (3, 2)
+    assert len(statements) == 2
+    assert all("count(*)" in statement for statement in statements)
+
+
+def test_approximate_count(monkeypatch):
+    async def run():
+        async with rollback_session() as session:
+            # Tables never analyzed have no estimate
+            await session.execute(text("ANALYZE books"))
+            monkeypatch.setattr(settings, "COUNT_ESTIMATE_MIN_ROWS", 0)
+            with count_statements(session.bind.engine) as estimated:
+                await crud.book.get_count(approximate=True, db_session=session)
+
+            # Filtered totals are counted exactly, then served from the cache
+            genre = Genre(name=f"Genre-{random_suffix()}")
+            session.add(Book(owner=random_user(), genre=genre))
+            await session.flush()
+            counted = await crud.book.count_by_params(genre.name, None, None, approximate=True, db_session=session)
+            session.add(Book(owner=random_user(), genre=genre))
+            await session.flush()
+            with count_statements(session.bind.engine) as cached_statements:
+                cached = await crud.book.count_by_params(
+                    genre.name, None, None, approximate=True, db_session=session
+                )
+        await disconnect_redis()
+        return estimated, counted, cached, cached_statements
+
+    estimated, counted, cached, cached_statements = asyncio.run(run())
+    assert len(estimated) == 1 and "pg_class" in estimated[0]
+    assert counted == cached == 1
+    assert not cached_statements
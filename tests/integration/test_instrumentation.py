@@ -0,0 +1,28 @@
+import asyncio
+
+from sqlalchemy import text
+
+from src.core.instrumentation import RequestMetrics, current_request, instrument_engine
+from tests.utils.db import rollback_session
+
+
+def test_statements_are_counted_per_request():
+    async def run():
+        async with rollback_session() as session:
+            instrument_engine(session.bind.engine)
+            instrument_engine(session.bind.engine)
+
+            metrics = RequestMetrics()
+            token = current_request.set(metrics)
+            try:
+                await session.execute(text("SELECT 1"))
+                await session.execute(text("SELECT 2"))
+            finally:
+                current_request.reset(token)
+            # Outside a request nothing is added
+            await session.execute(text("SELECT 3"))
+
+        assert metrics.statements == 2
+        assert metrics.db_time > 0
+
+    asyncio.run(run())
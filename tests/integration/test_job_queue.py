@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from src.db.redis import jobs_redis
+from src.modules.jobs.queue import Job, RedisJobQueue
+from tests.utils.db import disconnect_redis
+from tests.utils.random_data import random_suffix
+
+pytestmark = pytest.mark.skipif(jobs_redis is None, reason="Redis is not configured")
+
+
+def run_with_queue(check):
+    async def run():
+        prefix = f"test-jobs-{random_suffix()}:"
+        try:
+            await check(RedisJobQueue(jobs_redis, max_dead=10, key_prefix=prefix))
+        finally:
+            async for key in jobs_redis.scan_iter(match=f"{prefix}*"):
+                await jobs_redis.delete(key)
+            await disconnect_redis()
+
+    asyncio.run(run())
+
+
+def test_redis_queue_acknowledges_jobs():
+    async def check(queue):
+        await queue.enqueue(Job(name="job", payload={"value": 1}))
+        job = await queue.dequeue(1)
+        assert (job.name, job.payload) == ("job", {"value": 1})
+        assert (await queue.stats())["processing"] == 1
+
+        await queue.ack(job)
+        await queue.record("processed", 0.5, 0.25)
+        stats = await queue.stats()
+        assert stats["processing"] == stats["ready"] == 0
+        assert stats["processed"] == 1
+        assert stats["wait_time_avg"] == 0.5
+
+    run_with_queue(check)
+
+
+def test_redis_queue_enqueues_batches():
+    async def check(queue):
+        await queue.enqueue_many([Job(name="job", payload={"value": value}) for value in range(3)])
+        jobs = [await queue.dequeue(1) for _ in range(3)]
+        assert [job.payload["value"] for job in jobs] == [0, 1, 2]
+
+    run_with_queue(check)
+
+
+def test_redis_queue_retries_and_fails_jobs():
+    async def check(queue):
+        await queue.enqueue(Job(name="job", payload={}))
+        job = await queue.dequeue(1)
+        job.attempts += 1
+        await queue.retry(job, 0.01)
+        await asyncio.sleep(0.02)
+        assert await queue.promote_due() == 1
+
+        job = await queue.dequeue(1)
+        assert job.attempts == 1
+        await queue.fail(job)
+        stats = await queue.stats()
+        assert (stats["delayed"], stats["processing"], stats["dead"]) == (0, 0, 1)
+
+    run_with_queue(check)
+
+
+def test_redis_queue_promotes_each_due_job_once():
+    async def check(queue):
+        for _ in range(3):
+            await queue.enqueue(Job(name="job", payload={}), delay=0.01)
+        await queue.enqueue(Job(name="later", payload={}), delay=60)
+        await asyncio.sleep(0.02)
+
+        promoted = await asyncio.gather(queue.promote_due(), queue.promote_due())
+        assert sum(promoted) == 3
+        stats = await queue.stats()
+        assert (stats["ready"], stats["delayed"]) == (3, 1)
+
+    run_with_queue(check)
+
+
+def test_redis_queue_recovers_jobs_of_dead_workers():
+    async def check(queue):
+        await queue.enqueue(Job(name="job", payload={}))
+        assert await queue.dequeue(1) is not None
+
+        other = RedisJobQueue(queue.client, max_dead=10, key_prefix=queue.ready_key.removesuffix("ready"))
+        await other.heartbeat(ttl=10)
+        assert await other.recover() == 1
+        assert (await other.dequeue(1)).name == "job"
+        # The other worker is alive, so its job is left alone
+        assert await queue.recover() == 0
+
+    run_with_queue(check)
@@ -0,0 +1,50 @@
+import uuid
+import asyncio
+
+import pytest
+
+from src.db.redis import jobs_redis
+from src.modules.notifications.broker import RedisNotificationBroker
+from tests.utils.db import disconnect_redis
+from tests.utils.random_data import random_suffix
+
+pytestmark = pytest.mark.skipif(jobs_redis is None, reason="Redis is not configured")
+
+
+def test_redis_broker_fans_out_across_brokers():
+    async def run():
+        channel = f"test-notifications-{random_suffix()}"
+        # Two brokers stand for two app processes
+        publisher = RedisNotificationBroker(jobs_redis, 10, 10, 60, channel=channel)
+        subscriber = RedisNotificationBroker(jobs_redis, 10, 10, 60, channel=channel)
+        user_id = uuid.uuid4()
+        try:
+            subscription = await subscriber.subscribe(user_id)
+            await publisher.publish(uuid.uuid4(), '{"n": 0}')
+            await publisher.publish(user_id, '{"n": 1}')
+            assert await asyncio.wait_for(subscription.get(), 1) == '{"n": 1}'
+            assert subscription.queue.empty()
+        finally:
+            await subscriber.close()
+            await disconnect_redis()
+
+    asyncio.run(run())
+
+
+def test_redis_broker_publishes_batches():
+    async def run():
+        channel = f"test-notifications-{random_suffix()}"
+        publisher = RedisNotificationBroker(jobs_redis, 10, 10, 60, channel=channel)
+        subscriber = RedisNotificationBroker(jobs_redis, 10, 10, 60, channel=channel)
+        user_ids = [uuid.uuid4(), uuid.uuid4()]
+        try:
+            subscriptions = [await subscriber.subscribe(user_id) for user_id in user_ids]
+            await publisher.publish_many([(user_ids[0], '{"n": 1}'), (uuid.uuid4(), '{"n": 2}'),
+                                          (user_ids[1], '{"n": 3}')])
+            received = [await asyncio.wait_for(subscription.get(), 1) for subscription in subscriptions]
+            assert received == ['{"n": 1}', '{"n": 3}']
+        finally:
+            await subscriber.close()
+            await disconnect_redis()
+
+    asyncio.run(run())
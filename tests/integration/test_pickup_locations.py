@@ -0,0 +1,77 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from src import crud
+from src.models import Book, BookLocation
+from src.schemas.book import BookLocationBase
+from tests.utils.db import rollback_session, count_statements
+from tests.integration.test_book_references import create_references
+
+
+def test_replace_locations_applies_a_diff():
+    async def run():
+        async with rollback_session() as session:
+            owner_id, author_id, genre_id = await create_references(session)
+            book = Book(name="Book", owner_id=owner_id, author_id=author_id, genre_id=genre_id)
+            session.add(book)
+            await session.flush()
+
+            async def replace(*addresses):
+                locations = [BookLocationBase(address=address) for address in addresses]
+                with count_statements(session.bind.engine) as statements:
+                    result = await crud.pickup.replace_for_book(
+                        book_id=book.id, locations=locations, db_session=session
+                    )
+                rows = (await session.execute(
+                    select(BookLocation.id, BookLocation.address)
+                    .where(BookLocation.book_id == book.id)
+                    .order_by(BookLocation.id)
+                )).all()
+                return result, len(statements), rows
+
+            first = await replace("a", "b", "b")
+            second = await replace("b", "c")
+            unchanged = await replace("c", "b")
+            return first, second, unchanged
+
+    first, second, unchanged = asyncio.run(run())
+    assert first[:2] == ((0, 3), 2)
+    # One select, one delete, one update of the book and one insert
+    assert second[:2] == ((2, 1), 4)
+    assert [address for _, address in second[2]] == ["b", "c"]
+    # The kept row is one of the original ones
+    assert second[2][0] in first[2]
+    assert unchanged[:2] == ((0, 0), 1)
+    assert unchanged[2] == second[2]
+
+
+def test_removed_locations_move_the_book_updated_at():
+    async def run():
+        async with rollback_session() as session:
+            owner_id, author_id, genre_id = await create_references(session)
+            book = Book(name="Book", owner_id=owner_id, author_id=author_id, genre_id=genre_id,
+                        updated_at=datetime(2000, 1, 1))
+            location = BookLocation(address="a", book=book, updated_at=datetime(2000, 1, 1))
+            session.add_all([book, location])
+            await session.flush()
+
+            async def book_updated_at():
+                return (await session.execute(
+                    select(Book.updated_at).where(Book.id == book.id).execution_options(populate_existing=True)
+                )).scalar_one()
+
+            await crud.pickup.remove(_id=location.id, db_session=session)
+            removed = await book_updated_at()
+            await crud.pickup.replace_for_book(
+                book_id=book.id, locations=[BookLocationBase(address="b")], db_session=session
+            )
+            await session.execute(update(Book).where(Book.id == book.id).values(updated_at=datetime(2000, 1, 1)))
+            await crud.pickup.replace_for_book(book_id=book.id, locations=[], db_session=session)
+            replaced = await book_updated_at()
+            return removed, replaced
+
+    removed, replaced = asyncio.run(run())
+    assert removed > datetime(2000, 1, 1)
+    assert replaced > datetime(2000, 1, 1)
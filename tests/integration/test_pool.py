@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.core.utils import get_sqlalchemy_uri
+from src.db.pool import MonitoredPool
+
+
+def run_with_engine(check, **pool_args):
+    async def run():
+        engine = create_async_engine(get_sqlalchemy_uri(), poolclass=MonitoredPool, **pool_args)
+        try:
+            await check(engine)
+            # Disposing replaces the pool, so read the stats first
+            return engine.pool.stats()
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(run())
+
+
+def test_pool_stats_without_contention():
+    async def check(engine):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            assert engine.pool.stats()["checked_out"] == 1
+
+    stats = run_with_engine(check, pool_size=2, max_overflow=0)
+    assert stats["waits"] == 0
+    assert stats["checked_out"] == 0
+
+
+def test_idle_connections_at_the_limit_are_no_waits():
+    async def check(engine):
+        for _ in range(3):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+    stats = run_with_engine(check, pool_size=1, max_overflow=0)
+    assert stats["waits"] == 0
+
+
+def test_pool_records_checkout_waits():
+    async def check(engine):
+        async def hold():
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT pg_sleep(0.2)"))
+
+        await asyncio.gather(hold(), hold())
+
+    stats = run_with_engine(check, pool_size=1, max_overflow=0)
+    assert stats["waits"] == 1
+    assert stats["wait_time_max"] >= 0.1
+    assert stats["timeouts"] == 0
+
+
+def test_pool_records_timeouts():
+    async def check(engine):
+        async with engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                async with engine.connect():
+                    pass
+
+    stats = run_with_engine(check, pool_size=1, max_overflow=0, pool_timeout=0.1)
+    assert stats["timeouts"] == 1
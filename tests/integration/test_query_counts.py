@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+
+from src import crud
+from src.crud.book import book_read_options
+from src.crud.pickup import location_read_options
+from src.crud.request import request_read_options
+from src.models import User, Author, Genre, Book, BookLocation, BookRequest
+from src.models.book import BookCondition, BookRequestStatus
+from src.schemas.book import BookRead, BookRequestRead, BookLocationRead
+from tests.utils.db import rollback_session, count_statements
+from tests.utils.random_data import random_suffix
+
+
+def random_user():
+    return User(email=f"user-{random_suffix()}@example.com", hashed_password="")
+
+
+async def create_catalog(session):
+    author = Author(full_name=f"Author-{random_suffix()}")
+    genre = Genre(name=f"Genre-{random_suffix()}")
+    book = Book(name="Book", description="", condition=BookCondition.NEW, page_count=1,
+                owner=random_user(), author=author, genre=genre)
+    session.add_all([
+        book,
+        BookLocation(address="Address 1", book=book),
+        BookLocation(address="Address 2", book=book),
+        BookRequest(book=book, requester=random_user(), status=BookRequestStatus.PENDING),
+        BookRequest(book=book, requester=random_user(), status=BookRequestStatus.PENDING),
+    ])
+    await session.flush()
+    book_id = book.id
+
+    # Start every measurement from an empty identity map
+    session.expunge_all()
+    return book_id
+
+
+def run_counted(check):
+    async def run():
+        async with rollback_session() as session:
+            book_id = await create_catalog(session)
+            with count_statements(session.bind.engine) as statements:
+                await check(session, book_id)
+            return statements
+
+    return asyncio.run(run())
+
+
+def test_get_books_page_queries():
+    async def check(session, book_id):
+        query = select(Book).where(Book.id == book_id)
+        books, _ = await crud.book.get_page(query=query, options=book_read_options, db_session=session)
+        BookRead.model_validate(books[0])
+
+    # Books joined with author and genre, then locations
+    assert len(run_counted(check)) == 2
+
+
+def test_get_book_by_id_queries():
+    async def check(session, book_id):
+        book = await crud.book.get(_id=book_id, options=book_read_options, db_session=session)
+        assert len(BookRead.model_validate(book).locations) == 2
+
+    assert len(run_counted(check)) == 2
+
+
+def test_get_book_requests_queries():
+    async def check(session, book_id):
+        book_requests, _ = await crud.request.get_by_book(
+            book_id=book_id,
+            options=request_read_options,
+            db_session=session
+        )
+        assert len([BookRequestRead.model_validate(r) for r in book_requests]) == 2
+
+    # Requests joined with book, author and genre, then locations
+    assert len(run_counted(check)) == 2
+
+
+def test_get_pickup_location_queries():
+    async def check(session, book_id):
+        location = (await session.execute(
+            select(BookLocation.id).where(BookLocation.book_id == book_id).limit(1)
+        )).scalar_one()
+        location = await crud.pickup.get(_id=location, options=location_read_options, db_session=session)
+        BookLocationRead.model_validate(location)
+
+    assert len(run_counted(check)) == 3
+
+
+def test_ownership_check_loads_no_relationships():
+    async def check(session, book_id):
+        book = await crud.book.get(_id=book_id, db_session=session)
+        assert book.owner_id
+        with pytest.raises(InvalidRequestError):
+            book.author
+
+    assert len(run_counted(check)) == 1
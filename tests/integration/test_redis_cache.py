@@ -0,0 +1,28 @@
+import asyncio
+
+import pytest
+
+from src.db.cache import RedisCache
+from src.db.redis import cache_redis
+from tests.utils.db import disconnect_redis
+from tests.utils.random_data import random_suffix
+
+pytestmark = pytest.mark.skipif(cache_redis is None, reason="Redis is not configured")
+
+
+def test_lock_is_released_by_its_holder_only():
+    async def run():
+        cache = RedisCache(cache_redis)
+        key = f"test:lock:{random_suffix()}"
+        try:
+            taken = await cache.add(key, "token-1", ttl=60)
+            again = await cache.add(key, "token-2", ttl=60)
+            await cache.discard(key, "token-2")
+            kept = await cache.get(key)
+            await cache.discard(key, "token-1")
+            return taken, again, kept, await cache.get(key)
+        finally:
+            await cache.invalidate(key)
+            await disconnect_redis()
+
+    assert asyncio.run(run()) == (True, False, "token-1", None)
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from src.db.rate_limit import MemoryRateLimiter, RedisRateLimiter
+from src.db.redis import cache_redis
+from tests.utils.db import disconnect_redis
+from tests.utils.random_data import random_suffix
+
+
+class Clock:
+    def __init__(self, now: float = 6000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.skipif(cache_redis is None, reason="Redis is not configured")
+def test_redis_limiter_matches_memory_limiter():
+    async def hits(limiter, clock, key):
+        results = [await limiter.hit(key, 10, 60) for _ in range(11)]
+        clock.now += 93
+        results += [await limiter.hit(key, 10, 60) for _ in range(7)]
+        clock.now += 120
+        results.append(await limiter.hit(key, 10, 60))
+        return results
+
+    async def run():
+        key = f"test:{random_suffix()}"
+        memory_clock, redis_clock = Clock(), Clock()
+        try:
+            expected = await hits(MemoryRateLimiter(max_keys=10, clock=memory_clock), memory_clock, key)
+            actual = await hits(RedisRateLimiter(cache_redis, clock=redis_clock), redis_clock, key)
+            ttl = await cache_redis.pttl(f"ratelimit:{{{key}}}:{int(redis_clock.now) // 60}")
+        finally:
+            await disconnect_redis()
+        return expected, actual, ttl
+
+    expected, actual, ttl = asyncio.run(run())
+    assert actual == expected
+    assert 0 < ttl <= 120_000
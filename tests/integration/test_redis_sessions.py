@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+from fastapi_users.db import SQLAlchemyUserDatabase
+
+from src import crud
+from src.models import User
+from src.modules.auth.manager import UserManager, redis_strategy
+from tests.utils.db import rollback_session, count_statements, disconnect_redis
+from tests.utils.random_data import random_suffix
+
+pytestmark = pytest.mark.skipif(redis_strategy is None, reason="Redis is not configured")
+
+
+def run_with_user(check):
+    async def run():
+        async with rollback_session() as session:
+            user = User(email=f"user-{random_suffix()}@example.com", hashed_password="")
+            session.add(user)
+            await session.flush()
+            try:
+                await check(session, UserManager(SQLAlchemyUserDatabase(session, User)), user)
+            finally:
+                await redis_strategy.revoke_all(user.id)
+                await crud.user.invalidate_cache(user.id)
+                await disconnect_redis()
+
+    asyncio.run(run())
+
+
+def test_read_token_uses_cached_user():
+    async def check(session, manager, user):
+        token = await redis_strategy.write_token(user)
+        assert (await redis_strategy.read_token(token, manager)).id == user.id
+        session.expunge_all()
+
+        with count_statements(session.bind.engine) as statements:
+            cached = await redis_strategy.read_token(token, manager)
+        assert cached.id == user.id
+        assert statements == []
+
+    run_with_user(check)
+
+
+def test_destroy_and_revoke_tokens():
+    async def check(session, manager, user):
+        tokens = [await redis_strategy.write_token(user) for _ in range(3)]
+        await redis_strategy.destroy_token(tokens[0], user)
+        assert await redis_strategy.read_token(tokens[0], manager) is None
+        assert await redis_strategy.read_token(tokens[1], manager) is not None
+
+        assert await redis_strategy.revoke_all(user.id) == 2
+        for token in tokens:
+            assert await redis_strategy.read_token(token, manager) is None
+
+    run_with_user(check)
+
+
+def test_forged_token_is_rejected():
+    async def check(session, manager, user):
+        token = await redis_strategy.write_token(user)
+        _, _, secret = token.partition(".")
+        assert await redis_strategy.read_token(f"{user.id}.forged", manager) is None
+        assert await redis_strategy.read_token(secret, manager) is None
+
+    run_with_user(check)
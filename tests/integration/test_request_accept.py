@@ -0,0 +1,52 @@
+import asyncio
+
+from sqlalchemy import select
+
+from src import crud
+from src.models import User, Author, Genre, Book, BookRequest
+from src.models.book import BookRequestStatus
+from tests.utils.db import rollback_session, count_statements, disconnect_redis
+from tests.utils.random_data import random_suffix
+
+
+def random_user():
+    return User(email=f"user-{random_suffix()}@example.com", hashed_password="")
+
+
+def test_accept_rejects_other_requests_in_one_statement():
+    async def run():
+        async with rollback_session() as session:
+            book = Book(owner=random_user(), author=Author(full_name=f"Author-{random_suffix()}"),
+                        genre=Genre(name=f"Genre-{random_suffix()}"))
+            requests = [
+                BookRequest(book=book, requester=random_user(), status=status)
+                for status in (BookRequestStatus.PENDING, BookRequestStatus.PENDING, BookRequestStatus.REJECTED)
+            ]
+            session.add_all(requests)
+            await session.flush()
+
+            assert not await crud.request.has_accepted(book.id, db_session=session)
+            with count_statements(session.bind.engine) as statements:
+                accepted, rejected = await crud.request.accept(requests[0], book, db_session=session)
+            # Only the request rejected just now, not the one rejected before
+            assert rejected == [(requests[1].id, requests[1].requester_id)]
+            assert accepted.status == BookRequestStatus.ACCEPTED
+            assert accepted.book is book
+            assert await crud.request.has_accepted(book.id, db_session=session)
+
+            response = await session.execute(
+                select(BookRequest.id, BookRequest.status)
+                .where(BookRequest.book_id == book.id)
+                .execution_options(populate_existing=True)
+            )
+            result = len(statements), dict(response.all()), [r.id for r in requests]
+        await disconnect_redis()
+        return result
+
+    statement_count, statuses, ids = asyncio.run(run())
+    assert statement_count == 1
+    assert statuses == {
+        ids[0]: BookRequestStatus.ACCEPTED,
+        ids[1]: BookRequestStatus.REJECTED,
+        ids[2]: BookRequestStatus.REJECTED,
+    }
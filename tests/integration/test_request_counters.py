@@ -0,0 +1,183 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select, update
+
+from src import crud
+from src.db.ranking import Ranking, popular_books
+from src.db.redis import cache_redis
+from src.models import User, Author, Genre, Book, BookRequest
+from src.models.book import BookRequestStatus
+from src.schemas.book import BookRequestCreate
+from tests.utils.db import rollback_session, disconnect_redis
+from tests.utils.random_data import random_suffix
+
+
+def random_user():
+    return User(email=f"user-{random_suffix()}@example.com", hashed_password="")
+
+
+def random_book():
+    return Book(owner=random_user(), author=Author(full_name=f"Author-{random_suffix()}"),
+                genre=Genre(name=f"Genre-{random_suffix()}"))
+
+
+async def counters(session, book_id):
+    response = await session.execute(
+        select(Book.request_count, Book.pending_count)
+        .where(Book.id == book_id)
+        .execution_options(populate_existing=True)
+    )
+    return tuple(response.one())
+
+
+def test_create_and_accept_maintain_counters():
+    async def run():
+        async with rollback_session() as session:
+            book = random_book()
+            requesters = [random_user(), random_user()]
+            session.add_all([book, *requesters])
+            await session.flush()
+
+            requests = [
+                await crud.request.create(
+                    obj_in=BookRequestCreate(book_id=book.id, requester_id=requester.id),
+                    db_session=session
+                )
+                for requester in requesters
+            ]
+            created = await counters(session, book.id)
+
+            await crud.request.accept(requests[0], book, db_session=session)
+            accepted = await counters(session, book.id)
+        await disconnect_redis()
+        return created, accepted
+
+    created, accepted = asyncio.run(run())
+    assert created == (2, 2)
+    assert accepted == (2, 0)
+
+
+def test_recount_requests_repairs_counters():
+    async def run():
+        async with rollback_session() as session:
+            books = [random_book(), random_book()]
+            session.add_all([
+                *books,
+                BookRequest(book=books[0], requester=random_user(), status=BookRequestStatus.PENDING),
+                BookRequest(book=books[0], requester=random_user(), status=BookRequestStatus.REJECTED),
+            ])
+            await session.flush()
+            await session.execute(
+                update(Book).where(Book.id == books[1].id).values(request_count=3, pending_count=1)
+            )
+
+            ids = sorted(book.id for book in books)
+            repaired = await crud.book.recount_requests(ids[0], ids[1], db_session=session)
+            again = await crud.book.recount_requests(ids[0], ids[1], db_session=session)
+            return repaired, again, [await counters(session, book.id) for book in books]
+
+    repaired, again, results = asyncio.run(run())
+    assert (repaired, again) == (2, 0)
+    assert results == [(2, 1), (0, 0)]
+
+
+def test_popular_pages_by_pending_count():
+    async def run():
+        # The cached top must not outlive the rolled back books
+        if popular_books is not None:
+            await popular_books.invalidate()
+        async with rollback_session() as session:
+            books = [random_book() for _ in range(3)]
+            session.add_all(books)
+            await session.flush()
+            # Above any other book in the database
+            top = 10 ** 6
+            for book, pending in zip(books, (top, top + 1, top)):
+                book.pending_count = pending
+            await session.flush()
+
+            first, cursor = await crud.book.popular(limit=2, db_session=session)
+            second, _ = await crud.book.popular(cursor=cursor, limit=1, db_session=session)
+            result = [book.id for book in first + second]
+        if popular_books is not None:
+            await popular_books.invalidate()
+        await disconnect_redis()
+        return result, [book.id for book in books]
+
+    result, ids = asyncio.run(run())
+    assert result == [ids[1], ids[2], ids[0]]
+
+
+@pytest.mark.skipif(cache_redis is None, reason="Redis is not configured")
+def test_popular_skips_deleted_books_without_short_pages():
+    async def run():
+        await popular_books.invalidate()
+        async with rollback_session() as session:
+            books = [random_book() for _ in range(4)]
+            session.add_all(books)
+            await session.flush()
+            top = 10 ** 6
+            for book, pending in zip(books, (top + 3, top + 2, top + 1, top)):
+                book.pending_count = pending
+            await session.flush()
+            ids = [book.id for book in books]
+
+            # Caches the top, then one book is deleted before the cache hears of it
+            await crud.book.popular(limit=1, db_session=session)
+            await session.delete(books[1])
+            await session.flush()
+            raced, cursor = await crud.book.popular(limit=2, db_session=session)
+            cached = await popular_books.page(None, popular_books.size)
+
+            await crud.book.remove(_id=ids[2], db_session=session)
+            removed = await popular_books.page(None, popular_books.size)
+        await popular_books.invalidate()
+        await disconnect_redis()
+        return ids, [book.id for book in raced], cursor, cached, removed
+
+    ids, raced, cursor, cached, removed = asyncio.run(run())
+    assert raced == [ids[0], ids[2]]
+    assert cursor is not None
+    assert ids[1] not in [_id for _id, _ in cached]
+    assert ids[2] not in [_id for _id, _ in removed]
+
+
+@pytest.mark.skipif(cache_redis is None, reason="Redis is not configured")
+def test_ranking_pages_and_updates():
+    async def run():
+        ranking = Ranking(cache_redis, f"test:ranking:{random_suffix()}", size=3, ttl=60)
+        try:
+            missing = await ranking.page(None, 2)
+            await ranking.fill([(7, 5), (9, 2), (3, 2)])
+            first = await ranking.page(None, 2)
+            second = await ranking.page((2, 9), 2)
+            beyond = await ranking.page((2, 3), 2)
+
+            await ranking.update(3, 3)
+            await ranking.update(11, 1)
+            full = await ranking.page(None, 3)
+            await ranking.update(12, 4)
+            await ranking.remove(7)
+            updated = await ranking.page(None, 2)
+
+            await ranking.fill([(1, 1)])
+            await ranking.update(5, 1)
+            complete = await ranking.page(None, 3)
+        finally:
+            await ranking.invalidate()
+            await disconnect_redis()
+        return missing, first, second, beyond, full, updated, complete
+
+    missing, first, second, beyond, full, updated, complete = asyncio.run(run())
+    assert missing is None
+    assert first == [(7, 5), (9, 2)]
+    # The top holds `size` members, so a page running past it is a miss
+    assert second is None
+    assert beyond is None
+    # Ids below the last member of a full top stay outside of it
+    assert full == [(7, 5), (3, 3), (9, 2)]
+    # Ids outranking it take the place of the last member
+    assert updated == [(12, 4), (3, 3)]
+    # A top holding the whole ranking admits every id
+    assert complete == [(5, 1), (1, 1)]
@@ -0,0 +1,73 @@
+import json
+import asyncio
+
+from fastapi_users.db import SQLAlchemyUserDatabase
+
+from src import crud
+from src.db.cache import cache
+from src.models import User
+from src.schemas.user import UserUpdate
+from src.modules.auth.manager import UserManager
+from tests.utils.db import rollback_session, count_statements, disconnect_redis
+from tests.utils.random_data import random_suffix
+
+
+def run_with_manager(check):
+    async def run():
+        async with rollback_session() as session:
+            user = User(email=f"user-{random_suffix()}@example.com", hashed_password="")
+            session.add(user)
+            await session.flush()
+            user_id = user.id
+            session.expunge_all()
+            try:
+                await check(session, UserManager(SQLAlchemyUserDatabase(session, User)), user_id)
+            finally:
+                await crud.user.invalidate_cache(user_id)
+                await disconnect_redis()
+
+    asyncio.run(run())
+
+
+def test_cached_user_needs_no_query():
+    async def check(session, manager, user_id):
+        await manager.get(user_id)
+        session.expunge_all()
+
+        with count_statements(session.bind.engine) as statements:
+            user = await manager.get(user_id)
+        assert statements == []
+        assert user.id == user_id
+        # The cached copy is attached to the session, so it can be updated
+        assert user in session
+
+    run_with_manager(check)
+
+
+def test_user_update_invalidates_cache():
+    async def check(session, manager, user_id):
+        user = await manager.get(user_id)
+        await manager.update(UserUpdate(is_active=False), user, safe=False)
+        session.expunge_all()
+
+        with count_statements(session.bind.engine) as statements:
+            user = await manager.get(user_id)
+        assert len(statements) == 1
+        assert user.is_active is False
+
+    run_with_manager(check)
+
+
+def test_cached_user_leaves_out_the_password_hash():
+    async def check(session, manager, user_id):
+        user = await manager.get(user_id)
+        token = manager.reset_password_token(user)
+        session.expunge_all()
+
+        cached = await cache.get(crud.user._cache_key(user_id))
+        assert "hashed_password" not in json.loads(cached)
+        # Checking the reset token needs the hash, which is read from the database then
+        user = await manager.reset_password(token, "new password")
+        assert manager.password_helper.verify_and_update("new password", user.hashed_password)[0]
+
+    run_with_manager(check)
@@ -0,0 +1,42 @@
+import uuid
+import asyncio
+
+from fastapi_users.jwt import decode_jwt
+
+from src.models import User
+from src.modules.auth import handlers
+from src.modules.auth.manager import UserManager
+from src.modules.jobs.tasks import JobName
+
+
+def test_auth_jobs_are_queued_without_tokens(monkeypatch):
+    queued = []
+
+    async def enqueue(name, **payload):
+        queued.append((name, payload))
+
+    monkeypatch.setattr(handlers, "enqueue", enqueue)
+    user = User(id=uuid.uuid4(), email="user@example.com", hashed_password="hash", is_active=True, is_verified=False)
+    manager = UserManager(None)
+
+    asyncio.run(manager.forgot_password(user))
+    asyncio.run(manager.request_verify(user))
+    assert queued == [
+        (JobName.SEND_RESET_PASSWORD_EMAIL, {"user_id": str(user.id)}),
+        (JobName.SEND_VERIFY_EMAIL, {"user_id": str(user.id)}),
+    ]
+
+
+def test_job_tokens_match_fastapi_users():
+    user = User(id=uuid.uuid4(), email="user@example.com", hashed_password="hash")
+    manager = UserManager(None)
+
+    reset = decode_jwt(
+        manager.reset_password_token(user), manager.reset_password_token_secret, [manager.reset_password_token_audience]
+    )
+    verify = decode_jwt(
+        manager.verification_token(user), manager.verification_token_secret, [manager.verification_token_audience]
+    )
+    assert reset["sub"] == verify["sub"] == str(user.id)
+    assert manager.password_helper.verify_and_update("hash", reset["password_fgpt"])[0]
+    assert verify["email"] == "user@example.com"
@@ -0,0 +1,41 @@
+import asyncio
+
+from src.core.config import settings
+from src.utils.bulk_import import iter_csv_rows, iter_ndjson_rows
+
+
+async def stream(data: bytes, chunk_size: int = 7):
+    for i in range(0, len(data), chunk_size):
+        yield data[i:i + chunk_size]
+
+
+async def collect(rows):
+    return [row async for row in rows]
+
+
+def test_ndjson_rows_across_chunks():
+    data = b'{"name": "A"}\n\nnot json\n[1]\n{"name": "\xc3\xa9"}'
+    rows = asyncio.run(collect(iter_ndjson_rows(stream(data))))
+    assert rows == [
+        (1, {"name": "A"}),
+        (3, "Invalid JSON"),
+        (4, "Row must be a JSON object"),
+        (5, {"name": "é"}),
+    ]
+
+
+def test_csv_rows_with_quoted_newlines():
+    data = b'name,description,page_count\r\n"A","line 1\nline ""2""",10\r\nB,,\r\nC,x\r\n'
+    rows = asyncio.run(collect(iter_csv_rows(stream(data))))
+    assert rows == [
+        (2, {"name": "A", "description": 'line 1\nline "2"', "page_count": "10"}),
+        (4, {"name": "B"}),
+        (5, "Expected 3 columns, got 2"),
+    ]
+
+
+def test_oversized_record_is_skipped(monkeypatch):
+    monkeypatch.setattr(settings, "BOOK_IMPORT_MAX_RECORD_BYTES", 16)
+    data = b'{"name": "A"}\n{"name": "' + b"x" * 100 + b'"}\n{"name": "B"}\n'
+    rows = asyncio.run(collect(iter_ndjson_rows(stream(data))))
+    assert rows == [(1, {"name": "A"}), (2, "Record too long"), (3, {"name": "B"})]
@@ -0,0 +1,123 @@
+import time
+import asyncio
+
+import redis.asyncio
+
+from src import crud
+from src.core.config import settings
+from src.crud import base
+from src.db.cache import MemoryCache, RedisCache
+
+
+def test_memory_cache_get_set():
+    async def run():
+        cache = MemoryCache(max_entries=10)
+        await cache.set("key", "value", ttl=60)
+        assert await cache.get("key") == "value"
+        assert await cache.get("missing") is None
+
+    asyncio.run(run())
+
+
+def test_memory_cache_expires(monkeypatch):
+    async def run():
+        cache = MemoryCache(max_entries=10)
+        await cache.set("key", "value", ttl=60)
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+        assert await cache.get("key") is None
+
+    asyncio.run(run())
+
+
+def test_memory_cache_evicts_least_recently_used():
+    async def run():
+        cache = MemoryCache(max_entries=2)
+        await cache.set("a", "1", ttl=60)
+        await cache.set("b", "2", ttl=60)
+        await cache.get("a")
+        await cache.set("c", "3", ttl=60)
+        assert await cache.get("a") == "1"
+        assert await cache.get("b") is None
+        assert await cache.get("c") == "3"
+
+    asyncio.run(run())
+
+
+def test_memory_cache_evicted_keys_leave_their_tag():
+    async def run():
+        cache = MemoryCache(max_entries=2)
+        for i in range(5):
+            await cache.set(f"page:{i}", str(i), ttl=60, tag="pages")
+        return cache.tags, cache.key_tags
+
+    tags, key_tags = asyncio.run(run())
+    assert tags == {"pages": {"page:3", "page:4"}}
+    assert set(key_tags) == {"page:3", "page:4"}
+
+
+def test_only_the_first_page_is_cached(monkeypatch):
+    cache = MemoryCache(max_entries=10)
+    monkeypatch.setattr(base, "cache", cache)
+
+    async def get_page(*, cursor=None, limit=50):
+        return [], None
+
+    monkeypatch.setattr(crud.author, "get_page", get_page)
+
+    async def run():
+        await crud.author.get_page_cached(cursor="eyJpZCI6IDF9", limit=settings.PAGE_SIZE_DEFAULT)
+        await crud.author.get_page_cached(limit=settings.PAGE_SIZE_DEFAULT - 1)
+        await crud.author.get_page_cached(limit=settings.PAGE_SIZE_DEFAULT)
+
+    asyncio.run(run())
+    assert list(cache.entries) == ["crud:authors:pages:first"]
+
+
+def test_memory_cache_invalidates_tag():
+    async def run():
+        cache = MemoryCache(max_entries=10)
+        await cache.set("page:1", "1", ttl=60, tag="pages")
+        await cache.set("page:2", "2", ttl=60, tag="pages")
+        await cache.set("item", "3", ttl=60)
+        await cache.invalidate("item", tag="pages")
+        assert await cache.get("page:1") is None
+        assert await cache.get("page:2") is None
+        assert await cache.get("item") is None
+
+    asyncio.run(run())
+
+
+def test_memory_cache_add_keeps_existing_value():
+    async def run():
+        cache = MemoryCache(max_entries=10)
+        assert await cache.add("lock", "1", ttl=60)
+        assert not await cache.add("lock", "2", ttl=60)
+        assert await cache.get("lock") == "1"
+        await cache.invalidate("lock")
+        assert await cache.add("lock", "3", ttl=60)
+
+    asyncio.run(run())
+
+
+def test_memory_cache_discards_only_matching_value():
+    async def run():
+        cache = MemoryCache(max_entries=10)
+        await cache.add("lock", "token-1", ttl=60)
+        await cache.discard("lock", "token-2")
+        kept = await cache.get("lock")
+        await cache.discard("lock", "token-1")
+        return kept, await cache.get("lock")
+
+    assert asyncio.run(run()) == ("token-1", None)
+
+
+def test_redis_cache_add_reports_failures():
+    async def run():
+        cache = RedisCache(redis.asyncio.Redis(host="localhost", port=1))
+        try:
+            return await cache.add("lock", "token", ttl=60)
+        finally:
+            await cache.client.connection_pool.disconnect()
+
+    assert asyncio.run(run()) is None
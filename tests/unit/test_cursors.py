@@ -0,0 +1,41 @@
+import pytest
+from fastapi import HTTPException
+
+from src import crud
+from src.crud.utils import encode_cursor, decode_cursor, is_cursor_id, is_cursor_number
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor({"rank": 0.5, "id": 7})) == {"rank": 0.5, "id": 7}
+
+
+@pytest.mark.parametrize("value", [True, False, -1, 2 ** 31, 2 ** 70, 1.0, "1", None])
+def test_cursor_id_rejects(value):
+    assert not is_cursor_id(value)
+
+
+def test_cursor_number_checks_type_and_range():
+    assert is_cursor_number(0.25) and is_cursor_number(-3)
+    assert not is_cursor_number(True)
+    assert not is_cursor_number(float("nan")) and not is_cursor_number(float("inf"))
+    assert not is_cursor_number(2 ** 40)
+    assert not is_cursor_number(1.5, types=(int,))
+
+
+@pytest.mark.parametrize("values", [
+    {"rank": 0.5, "id": True},
+    {"rank": 0.5, "id": 2 ** 70},
+    {"rank": True, "id": 1},
+    {"pending": 1.5, "id": 1},
+])
+def test_search_cursor_rejects_crafted_values(values):
+    key = "pending" if "pending" in values else "rank"
+    types = (int,) if key == "pending" else (int, float)
+    with pytest.raises(HTTPException) as error:
+        crud.book._search_cursor(encode_cursor(values), key=key, types=types)
+    assert error.value.status_code == 400
+
+
+def test_search_cursor_accepts_valid_values():
+    assert crud.book._search_cursor(encode_cursor({"pending": 3, "id": 9}), key="pending", types=(int,)) == (3, 9)
+    assert crud.book._search_cursor(None) is None
@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from src.utils.geo import KDTree, bounding_box, haversine
+
+
+def test_haversine():
+    # Berlin to Paris
+    assert haversine(52.5200, 13.4050, 48.8566, 2.3522) == pytest.approx(877_500, rel=1e-3)
+    assert haversine(10.0, 20.0, 10.0, 20.0) == 0
+
+
+def test_bounding_box_crosses_antimeridian_and_poles():
+    min_lat, max_lat, lon_ranges = bounding_box(0.0, 179.99, 5000)
+    assert min_lat < 0 < max_lat
+    assert lon_ranges[0][1] == 180.0 and lon_ranges[1][0] == -180.0
+
+    _, max_lat, lon_ranges = bounding_box(89.99, 0.0, 5000)
+    assert max_lat == 90.0
+    assert lon_ranges == [(-180.0, 180.0)]
+
+
+def test_kd_tree_matches_linear_scan():
+    rng = random.Random(1)
+    points = [(i, rng.uniform(-90, 90), rng.uniform(-180, 180)) for i in range(5000)]
+    tree = KDTree(points, leaf_size=8)
+    for lat, lon, radius in [(52.5, 13.4, 500_000), (0.0, 180.0, 800_000), (-89.0, 0.0, 300_000)]:
+        expected = sorted(
+            (haversine(lat, lon, point_lat, point_lon), point_id)
+            for point_id, point_lat, point_lon in points
+            if haversine(lat, lon, point_lat, point_lon) <= radius
+        )
+        assert [point_id for point_id, _ in tree.within(lat, lon, radius)] == [
+            point_id for _, point_id in expected
+        ]
+
+
+def test_kd_tree_empty():
+    assert KDTree([]).within(0.0, 0.0, 1000) == []
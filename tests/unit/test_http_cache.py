@@ -0,0 +1,83 @@
+from datetime import datetime
+
+from fastapi import Request, Response
+
+from src.api.http_cache import ConditionalGet, collect_versions
+from src.models import Author, Book, Genre
+
+UPDATED_AT = datetime(2024, 1, 2, 3, 4, 5, 600000)
+
+
+def make_book(author_updated_at=UPDATED_AT):
+    return Book(
+        id=1,
+        updated_at=UPDATED_AT,
+        author=Author(id=2, updated_at=author_updated_at),
+        genre=Genre(id=3, updated_at=UPDATED_AT),
+    )
+
+
+def make_http_cache(**headers):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(key.replace("_", "-").encode(), value.encode()) for key, value in headers.items()],
+    }
+    return ConditionalGet(Request(scope), Response())
+
+
+def test_collect_versions_includes_loaded_relationships():
+    versions = collect_versions([make_book()])
+    assert {(table, _id) for table, _id, _ in versions} == {("books", 1), ("authors", 2), ("genres", 3)}
+
+
+def test_object_headers_and_etag_match():
+    http_cache = make_http_cache()
+    assert http_cache.check_object(make_book()) is None
+    etag = http_cache.response.headers["etag"]
+    assert etag.startswith('W/"')
+    assert http_cache.response.headers["last-modified"] == "Tue, 02 Jan 2024 03:04:05 GMT"
+    assert http_cache.response.headers["cache-control"].startswith("public")
+
+    not_modified = make_http_cache(if_none_match=etag).check_object(make_book())
+    assert not_modified.status_code == 304
+
+
+def test_related_change_changes_etag():
+    http_cache = make_http_cache()
+    http_cache.check_object(make_book())
+    etag = http_cache.response.headers["etag"]
+
+    changed = make_book(author_updated_at=datetime(2024, 2, 1))
+    assert make_http_cache(if_none_match=etag).check_object(changed) is None
+
+
+def test_if_modified_since():
+    assert make_http_cache(
+        if_modified_since="Tue, 02 Jan 2024 03:04:05 GMT"
+    ).check_object(make_book()).status_code == 304
+    assert make_http_cache(
+        if_modified_since="Tue, 02 Jan 2024 03:04:04 GMT"
+    ).check_object(make_book()) is None
+
+
+def test_page_has_no_last_modified_and_depends_on_cursor():
+    http_cache = make_http_cache()
+    http_cache.check_page([make_book()], "cursor", public=False)
+    assert "last-modified" not in http_cache.response.headers
+    assert http_cache.response.headers["cache-control"] == "private, no-cache"
+
+    etag = http_cache.response.headers["etag"]
+    assert make_http_cache(if_none_match=etag).check_page([make_book()], None) is None
+
+
+def test_page_total_sets_header_and_changes_etag():
+    http_cache = make_http_cache()
+    http_cache.check_page([make_book()], None)
+    etag = http_cache.response.headers["etag"]
+    assert "x-total-count" not in http_cache.response.headers
+
+    with_total = make_http_cache(if_none_match=etag)
+    assert with_total.check_page([make_book()], None, total=42) is None
+    assert with_total.response.headers["x-total-count"] == "42"
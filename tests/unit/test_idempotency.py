@@ -0,0 +1,125 @@
+import asyncio
+import json
+
+import pytest
+from starlette.responses import JSONResponse
+
+from src.api import idempotency
+from src.api.idempotency import IdempotencyMiddleware
+from src.db.cache import MemoryCache
+
+
+class CountingApp:
+    """Responds with the number of calls, after an optional delay."""
+
+    def __init__(self, delay: float = 0, statuses=()):
+        self.calls = 0
+        self.delay = delay
+        self.statuses = list(statuses)
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        message = await receive()
+        await asyncio.sleep(self.delay)
+        status = self.statuses.pop(0) if self.statuses else 201
+        response = JSONResponse({"calls": self.calls, "body": message["body"].decode()}, status_code=status)
+        await response(scope, receive, send)
+
+
+async def call(app, body=b"{}", key="key-1", token="token-1", method="POST"):
+    headers = [(b"authorization", f"Bearer {token}".encode())]
+    if key is not None:
+        headers.append((b"idempotency-key", key.encode()))
+    scope = {"type": "http", "method": method, "path": "/books/", "query_string": b"", "headers": headers}
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    start = sent[0]
+    body = b"".join(message.get("body", b"") for message in sent[1:])
+    return start["status"], dict(start["headers"]), json.loads(body)
+
+
+@pytest.fixture(autouse=True)
+def memory_cache(monkeypatch):
+    monkeypatch.setattr(idempotency, "cache", MemoryCache(max_entries=100))
+
+
+def test_retry_replays_first_response():
+    async def run():
+        app = CountingApp()
+        middleware = IdempotencyMiddleware(app)
+        first = await call(middleware)
+        retry = await call(middleware)
+        return app.calls, first, retry
+
+    calls, first, retry = asyncio.run(run())
+    assert calls == 1
+    assert retry[0] == first[0] == 201
+    assert retry[2] == first[2] == {"calls": 1, "body": "{}"}
+    assert retry[1][b"idempotent-replayed"] == b"true"
+
+
+def test_key_is_scoped_to_credentials_and_checked_against_body():
+    async def run():
+        app = CountingApp()
+        middleware = IdempotencyMiddleware(app)
+        await call(middleware)
+        other_user = await call(middleware, token="token-2")
+        other_body = await call(middleware, body=b'{"name": "other"}')
+        without_key = await call(middleware, key=None)
+        return app.calls, other_user, other_body, without_key
+
+    calls, other_user, other_body, without_key = asyncio.run(run())
+    assert calls == 3
+    assert other_user[2]["calls"] == 2
+    assert other_body[0] == 422
+    assert without_key[2]["calls"] == 3
+
+
+def test_concurrent_duplicates_are_collapsed():
+    async def run():
+        app = CountingApp(delay=0.2)
+        middleware = IdempotencyMiddleware(app)
+        responses = await asyncio.gather(*(call(middleware) for _ in range(3)))
+        return app.calls, responses
+
+    calls, responses = asyncio.run(run())
+    assert calls == 1
+    assert [body for _, _, body in responses] == [{"calls": 1, "body": "{}"}] * 3
+
+
+def test_server_errors_are_not_stored():
+    async def run():
+        app = CountingApp(statuses=[503])
+        middleware = IdempotencyMiddleware(app)
+        failed = await call(middleware)
+        retry = await call(middleware)
+        return failed, retry
+
+    failed, retry = asyncio.run(run())
+    assert failed[0] == 503
+    assert retry[0] == 201 and retry[2]["calls"] == 2
+
+
+class UnavailableCache(MemoryCache):
+    async def add(self, key, value, ttl):
+        return None
+
+
+def test_requests_are_rejected_when_the_lock_fails(monkeypatch):
+    monkeypatch.setattr(idempotency, "cache", UnavailableCache(max_entries=100))
+
+    async def run():
+        app = CountingApp()
+        status, _, _ = await call(IdempotencyMiddleware(app))
+        return app.calls, status
+
+    assert asyncio.run(run()) == (0, 503)
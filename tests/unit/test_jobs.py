@@ -0,0 +1,114 @@
+import asyncio
+
+from src.core.config import settings
+from src.modules.jobs import queue as jobs_queue
+from src.modules.jobs.queue import Job, MemoryJobQueue, enqueue_many
+from src.modules.jobs.tasks import JobName
+from src.modules.jobs.worker import Worker, retry_delay
+
+
+def run_jobs(queue, handlers, *names):
+    async def run():
+        for name in names:
+            await queue.enqueue(Job(name=name, payload={"value": name}))
+        worker = Worker(queue, handlers, concurrency=2, poll_interval=0.01)
+        task = asyncio.create_task(worker.run())
+        while queue.ready.qsize() or queue.processing:
+            await asyncio.sleep(0.01)
+        worker.stop()
+        await task
+
+    asyncio.run(run())
+
+
+def test_worker_runs_jobs():
+    queue, seen = MemoryJobQueue(max_dead=10), []
+
+    async def handler(value):
+        seen.append(value)
+
+    run_jobs(queue, {"job": handler, "other": handler}, "job", "other")
+    assert sorted(seen) == ["job", "other"]
+
+    stats = asyncio.run(queue.stats())
+    assert stats["processed"] == 2
+    assert stats["ready"] == stats["processing"] == stats["dead"] == 0
+
+
+def test_worker_retries_failed_job():
+    queue = MemoryJobQueue(max_dead=10)
+
+    async def handler(value):
+        raise ValueError(value)
+
+    run_jobs(queue, {"job": handler}, "job")
+    stats = asyncio.run(queue.stats())
+    assert stats["retried"] == 1
+    assert stats["delayed"] == 1
+    run_at, _, job = queue.delayed[0]
+    assert job.attempts == 1
+    assert run_at > job.enqueued_at
+
+
+def test_worker_fails_job_after_max_attempts():
+    queue = MemoryJobQueue(max_dead=10)
+
+    async def handler(value):
+        raise ValueError(value)
+
+    async def run():
+        job = Job(name="job", payload={"value": 1}, attempts=settings.JOBS_MAX_ATTEMPTS - 1)
+        await queue.enqueue(job)
+        worker = Worker(queue, {"job": handler}, concurrency=1, poll_interval=0.01)
+        await worker.process(await queue.dequeue(0.01))
+
+    asyncio.run(run())
+    stats = asyncio.run(queue.stats())
+    assert stats["failed"] == 1
+    assert stats["delayed"] == 0
+    assert [job.attempts for job in queue.dead] == [settings.JOBS_MAX_ATTEMPTS]
+
+
+def test_worker_fails_unknown_job():
+    queue = MemoryJobQueue(max_dead=1)
+    run_jobs(queue, {}, "first", "second")
+    assert [job.name for job in queue.dead] == ["second"]
+    assert asyncio.run(queue.stats())["failed"] == 2
+
+
+def test_memory_queue_promotes_due_jobs():
+    async def run():
+        queue = MemoryJobQueue(max_dead=10)
+        await queue.enqueue(Job(name="later", payload={}), delay=60)
+        await queue.enqueue(Job(name="soon", payload={}), delay=0.01)
+        await asyncio.sleep(0.02)
+        assert await queue.promote_due() == 1
+        assert (await queue.dequeue(0.01)).name == "soon"
+        assert await queue.dequeue(0.01) is None
+
+    asyncio.run(run())
+
+
+def test_retry_delay_backs_off_up_to_max():
+    for attempts in range(1, 20):
+        delay = retry_delay(attempts)
+        expected = min(settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1), settings.JOBS_RETRY_BACKOFF_MAX)
+        assert expected / 2 <= delay <= expected
+
+
+def test_enqueue_many_queues_one_job_per_payload(monkeypatch):
+    queue = MemoryJobQueue(max_dead=10)
+    monkeypatch.setattr(jobs_queue, "job_queue", queue)
+
+    async def run():
+        await enqueue_many(JobName.NOTIFY_BOOK_REQUEST_DECIDED, [
+            {"request_id": 1, "event": "accepted"},
+            {"request_id": 2, "event": "rejected"},
+        ])
+        await enqueue_many(JobName.NOTIFY_BOOK_REQUEST_DECIDED, [])
+        return [await queue.dequeue(0.01) for _ in range(3)]
+
+    first, second, none = asyncio.run(run())
+    assert (first.name, first.payload) == ("notify_book_request_decided", {"request_id": 1, "event": "accepted"})
+    assert second.payload == {"request_id": 2, "event": "rejected"}
+    assert none is None
@@ -0,0 +1,45 @@
+import pytest
+from pydantic import ValidationError
+
+from src.core.config import ProdSettings
+from src.utils.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 2):
+        histogram.observe(value, "/books")
+
+    assert list(histogram.render()) == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/books",le="0.1"} 2',
+        'latency_seconds_bucket{route="/books",le="1"} 3',
+        'latency_seconds_bucket{route="/books",le="+Inf"} 4',
+        'latency_seconds_sum{route="/books"} 2.65',
+        'latency_seconds_count{route="/books"} 4',
+    ]
+
+
+def test_registry_renders_counters_and_gauges():
+    registry = Registry()
+    counter = registry.register(Counter("jobs", "Jobs.", ("name",)))
+    counter.inc('say "hi"\n')
+    counter.inc('say "hi"\n', amount=2)
+    registry.register(Gauge("pool_size", "Pool size.", callback=lambda: 5))
+
+    assert registry.render() == (
+        "# HELP jobs Jobs.\n"
+        "# TYPE jobs counter\n"
+        'jobs_total{name="say \\"hi\\"\\n"} 3\n'
+        "# HELP pool_size Pool size.\n"
+        "# TYPE pool_size gauge\n"
+        "pool_size 5\n"
+    )
+
+
+def test_prod_settings_require_a_metrics_token():
+    assert ProdSettings().METRICS_ENABLED is False
+    assert ProdSettings(METRICS_ENABLED=True, METRICS_TOKEN="secret").METRICS_TOKEN == "secret"
+    with pytest.raises(ValidationError, match="METRICS_TOKEN"):
+        ProdSettings(METRICS_ENABLED=True, METRICS_TOKEN=None)
@@ -0,0 +1,82 @@
+import uuid
+import asyncio
+
+import pytest
+
+from src.modules.notifications.broker import MemoryNotificationBroker, TooManyConnections
+from src.modules.notifications.stream import event_stream
+
+
+def test_broker_delivers_to_streams_of_user():
+    async def run():
+        broker = MemoryNotificationBroker(max_connections=10, max_pending=10, keepalive=60)
+        user_id, other_id = uuid.uuid4(), uuid.uuid4()
+        first, second = await broker.subscribe(user_id), await broker.subscribe(user_id)
+        other = await broker.subscribe(other_id)
+
+        await broker.publish(user_id, '{"n": 1}')
+        assert await first.get() == '{"n": 1}'
+        assert await second.get() == '{"n": 1}'
+        assert other.queue.empty()
+
+        for subscription in (first, second, other):
+            await broker.unsubscribe(subscription)
+        assert broker.connections == 0
+        assert broker.subscriptions == {}
+
+    asyncio.run(run())
+
+
+def test_broker_publishes_many():
+    async def run():
+        broker = MemoryNotificationBroker(max_connections=10, max_pending=10, keepalive=60)
+        user_id = uuid.uuid4()
+        subscription = await broker.subscribe(user_id)
+        await broker.publish_many([(user_id, '{"n": 1}'), (uuid.uuid4(), '{"n": 2}'), (user_id, '{"n": 3}')])
+        assert [await subscription.get(), await subscription.get()] == ['{"n": 1}', '{"n": 3}']
+
+    asyncio.run(run())
+
+
+def test_broker_limits_connections():
+    async def run():
+        broker = MemoryNotificationBroker(max_connections=1, max_pending=10, keepalive=60)
+        subscription = await broker.subscribe(uuid.uuid4())
+        with pytest.raises(TooManyConnections):
+            await broker.subscribe(uuid.uuid4())
+        await broker.unsubscribe(subscription)
+        await broker.subscribe(uuid.uuid4())
+
+    asyncio.run(run())
+
+
+def test_stream_sends_events_and_keepalives():
+    async def run():
+        broker = MemoryNotificationBroker(max_connections=10, max_pending=10, keepalive=0.01)
+        user_id = uuid.uuid4()
+        subscription = await broker.subscribe(user_id)
+        stream = event_stream(broker, subscription)
+
+        assert await anext(stream) == ": keep-alive\n\n"
+        await broker.publish(user_id, '{"n": 1}')
+        assert await anext(stream) == 'data: {"n": 1}\n\n'
+        await stream.aclose()
+        await broker.close()
+        assert broker.connections == 0
+
+    asyncio.run(run())
+
+
+def test_stream_ends_when_client_falls_behind():
+    async def run():
+        broker = MemoryNotificationBroker(max_connections=10, max_pending=2, keepalive=60)
+        user_id = uuid.uuid4()
+        subscription = await broker.subscribe(user_id)
+        for n in range(3):
+            await broker.publish(user_id, f'{{"n": {n}}}')
+
+        events = [event async for event in event_stream(broker, subscription)]
+        assert events == ["event: overflow\ndata: {}\n\n"]
+        assert broker.connections == 0
+
+    asyncio.run(run())
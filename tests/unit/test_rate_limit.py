@@ -0,0 +1,151 @@
+import asyncio
+import uuid
+
+import pytest
+from pydantic import ValidationError
+from starlette.responses import JSONResponse
+
+from src.api import rate_limit
+from src.api.rate_limit import RateLimitMiddleware
+from src.core.app import create_app
+from src.core.config import DevSettings, settings
+from src.db.rate_limit import MemoryRateLimiter
+from src.models import User
+from src.modules.auth.manager import get_jwt_strategy
+
+
+class Clock:
+    def __init__(self, now: float = 6000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+async def ok_app(scope, receive, send):
+    await JSONResponse({"ok": True})(scope, receive, send)
+
+
+async def call(app, path="/api/v1/books/", token=None, client="10.0.0.1", method="GET", origin=None):
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    if origin:
+        headers.append((b"origin", origin.encode()))
+    scope = {"type": "http", "method": method, "path": path, "query_string": b"", "headers": headers,
+             "client": (client, 1234)}
+
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        return messages.pop() if messages else {"type": "http.disconnect"}
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent[0]["status"], {name.decode(): value.decode() for name, value in sent[0]["headers"]}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, "rate_limiter", MemoryRateLimiter(max_keys=100, clock=clock))
+    monkeypatch.setattr(settings, "RATE_LIMIT_WINDOW", 60)
+    monkeypatch.setattr(settings, "RATE_LIMIT_GROUPS", {"/auth": 2, "/books": 3})
+    return clock
+
+
+def test_memory_limiter_slides_previous_window():
+    async def run():
+        clock = Clock()
+        limiter = MemoryRateLimiter(max_keys=10, clock=clock)
+        first = [await limiter.hit("a", 10, 60) for _ in range(11)]
+        # 33 of 60 seconds into the next window, 27 / 60 of the previous one still counts
+        clock.now += 93
+        second = [await limiter.hit("a", 10, 60) for _ in range(7)]
+        clock.now += 120
+        third = await limiter.hit("a", 10, 60)
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert [hit.allowed for hit in first] == [True] * 10 + [False]
+    assert [hit.remaining for hit in first[-3:]] == [1, 0, 0]
+    assert first[-1].reset == 60
+    # 4 of the previous hits count, so 6 more fit
+    assert [hit.allowed for hit in second] == [True] * 6 + [False]
+    assert second[0].remaining == 5 and second[0].reset == 27
+    # Down to 3 previous hits after another 3 seconds
+    assert second[-1].reset == 3
+    assert third.allowed and third.remaining == 9
+
+
+def test_memory_limiter_drops_least_recent_keys():
+    async def run():
+        limiter = MemoryRateLimiter(max_keys=2, clock=Clock())
+        for key in ("a", "b", "a", "c"):
+            await limiter.hit(key, 1, 60)
+        return list(limiter.counters)
+
+    assert asyncio.run(run()) == ["a", "c"]
+
+
+def test_middleware_limits_route_groups(clock):
+    async def run():
+        middleware = RateLimitMiddleware(ok_app)
+        books = [await call(middleware) for _ in range(4)]
+        login = await call(middleware, "/api/v1/auth/jwt/login", method="POST")
+        other_client = await call(middleware, client="10.0.0.2")
+        unlimited = await call(middleware, "/api/v1/notifications/")
+        similar = await call(middleware, "/api/v1/booksellers")
+        preflight = await call(middleware, method="OPTIONS")
+        return books, login, other_client, unlimited, similar, preflight
+
+    books, login, other_client, unlimited, similar, preflight = asyncio.run(run())
+    assert [status for status, _ in books] == [200, 200, 200, 429]
+    assert books[0][1]["ratelimit-limit"] == "3"
+    assert books[0][1]["ratelimit-remaining"] == "2"
+    assert books[0][1]["ratelimit-reset"] == "60"
+    assert books[0][1]["ratelimit-policy"] == "3;w=60"
+    assert books[3][1]["retry-after"] == "60"
+    assert login[0] == 200 and login[1]["ratelimit-remaining"] == "1"
+    assert other_client[0] == 200 and other_client[1]["ratelimit-remaining"] == "2"
+    for status, headers in (unlimited, similar, preflight):
+        assert status == 200 and "ratelimit-limit" not in headers
+
+
+def test_middleware_counts_valid_tokens_per_user(clock):
+    async def run():
+        middleware = RateLimitMiddleware(ok_app)
+        middleware.jwt_strategy = get_jwt_strategy()
+        token = await get_jwt_strategy().write_token(User(id=uuid.uuid4()))
+        client = ("10.0.0.1", 1234)
+        return (
+            middleware.identify({"headers": [(b"authorization", f"Bearer {token}".encode())], "client": client}),
+            middleware.identify({"headers": [(b"authorization", b"Bearer forged")], "client": client}),
+        )
+
+    user, forged = asyncio.run(run())
+    assert user.startswith("user:")
+    assert forged == "ip:10.0.0.1"
+
+
+def test_rejected_requests_carry_cors_headers(clock, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_GROUPS", {"/missing": 1})
+    origin = settings.BACKEND_CORS_ORIGINS[0]
+
+    async def run():
+        app = create_app()
+        return [await call(app, "/api/v1/missing", origin=origin) for _ in range(2)]
+
+    (first, _), (second, headers) = asyncio.run(run())
+    assert (first, second) == (404, 429)
+    assert headers["access-control-allow-origin"] == origin
+    assert "RateLimit-Reset" in headers["access-control-expose-headers"]
+
+
+def test_settings_reject_empty_limits():
+    with pytest.raises(ValidationError):
+        DevSettings(RATE_LIMIT_GROUPS={"/books": 0})
+    with pytest.raises(ValidationError):
+        DevSettings(RATE_LIMIT_WINDOW=0)
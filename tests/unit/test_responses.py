@@ -0,0 +1,62 @@
+import json
+import uuid
+
+from fastapi import Response
+
+from src.api.responses import serialize
+from src.core.config import settings
+from src.models import Author, Book, BookLocation, Genre
+from src.models.book import BookCondition
+from src.schemas.book import BookRead
+from src.schemas.page import Page
+
+
+def make_book():
+    return Book(
+        id=1,
+        name="The Hobbit",
+        description="There and Back Again",
+        condition=BookCondition.USED,
+        page_count=310,
+        owner_id=uuid.UUID(int=1),
+        author=Author(id=2, full_name="J. R. R. Tolkien"),
+        genre=Genre(id=3, name="Fantasy"),
+        locations=[BookLocation(address="1 Main St")],
+    )
+
+
+def test_serialize_disabled_returns_content(monkeypatch):
+    monkeypatch.setattr(settings, "FAST_RESPONSES", False)
+    book = make_book()
+    assert serialize(BookRead, book, Response()) is book
+
+
+def test_serialize_page_keeps_headers(monkeypatch):
+    monkeypatch.setattr(settings, "FAST_RESPONSES", True)
+    response = Response()
+    response.headers["etag"] = 'W/"1"'
+
+    fast_response = serialize(Page[BookRead], Page(items=[make_book()], next_cursor="abc"), response)
+
+    assert fast_response.headers["etag"] == 'W/"1"'
+    assert fast_response.media_type == "application/json"
+    assert json.loads(fast_response.body) == {
+        "items": [{
+            "id": 1,
+            "name": "The Hobbit",
+            "description": "There and Back Again",
+            "condition": "used",
+            "page_count": 310,
+            "owner_id": str(uuid.UUID(int=1)),
+            "author": {"id": 2, "full_name": "J. R. R. Tolkien"},
+            "genre": {"id": 3, "name": "Fantasy"},
+            "locations": [{"address": "1 Main St", "latitude": None, "longitude": None}],
+        }],
+        "next_cursor": "abc",
+    }
+
+
+def test_serialize_passes_responses_through(monkeypatch):
+    monkeypatch.setattr(settings, "FAST_RESPONSES", True)
+    not_modified = Response(status_code=304)
+    assert serialize(BookRead, not_modified, Response()) is not_modified
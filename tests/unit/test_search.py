@@ -0,0 +1,31 @@
+from src.utils.search import InvertedIndex, tokenize
+
+
+def build_index():
+    index = InvertedIndex()
+    index.add(1, [("Dune", 1.0), ("Frank Herbert", 0.8), ("Desert planet", 0.4)])
+    index.add(2, [("Dune Messiah", 1.0), ("Frank Herbert", 0.8), ("Sequel", 0.4)])
+    index.add(3, [("Foundation", 1.0), ("Isaac Asimov", 0.8), ("Galactic empire", 0.4)])
+    return index
+
+
+def test_tokenize():
+    assert tokenize("Dune: Messiah, part-2") == ["dune", "messiah", "part", "2"]
+    assert tokenize(None) == []
+
+
+def test_search_ranks_by_field_weight():
+    index = build_index()
+    assert [doc_id for doc_id, _ in index.search("dune")] == [1, 2]
+    # A name match beats a description match
+    assert [doc_id for doc_id, _ in index.search("messiah planet")] == [2, 1]
+
+
+def test_search_matches_prefixes_and_typos():
+    index = build_index()
+    assert [doc_id for doc_id, _ in index.search("found")] == [3]
+    assert [doc_id for doc_id, _ in index.search("asimv")] == [3]
+
+
+def test_search_without_matches():
+    assert build_index().search("tolkien") == []
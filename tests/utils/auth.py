@@ -1,6 +1,7 @@
 import requests
 
 from src.core import utils
+from src.core.config import settings
 
 
 test_user_email = "admin@gmail.com"
@@ -11,7 +12,7 @@ def authenticate():
     api_url = utils.get_api_url()
 
     r = requests.post(
-        f"{api_url}/auth/jwt/login",
+        f"{api_url}/auth/{settings.AUTH_BACKEND}/login",
         data={"username": test_user_email, "password": test_user_password},
     )
 
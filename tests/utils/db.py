@@ -0,0 +1,46 @@
+import contextlib
+from typing import AsyncIterator, List
+
+from sqlalchemy import event
+from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
+
+from src.core.utils import get_sqlalchemy_uri
+from src.db.redis import auth_redis, cache_redis, jobs_redis
+
+
+@contextlib.asynccontextmanager
+async def rollback_session() -> AsyncIterator[AsyncSession]:
+    """Session whose changes are rolled back once the test is done."""
+    engine = create_async_engine(get_sqlalchemy_uri(), poolclass=NullPool)
+    try:
+        async with engine.connect() as connection:
+            transaction = await connection.begin()
+            async with AsyncSession(bind=connection, expire_on_commit=False) as session:
+                yield session
+            if transaction.is_active:
+                await transaction.rollback()
+    finally:
+        await engine.dispose()
+
+
+@contextlib.contextmanager
+def count_statements(engine: AsyncEngine) -> List[str]:
+    """Collect the SQL statements executed on the engine inside the block."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+async def disconnect_redis() -> None:
+    """Drop pooled Redis connections, which are bound to the current event loop."""
+    for client in (auth_redis, cache_redis, jobs_redis):
+        if client:
+            await client.connection_pool.disconnect()